@@ -0,0 +1,371 @@
+import os
+import re
+import csv
+import json
+import glob
+import time
+import queue
+import argparse
+import threading
+from datetime import datetime
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+from upload_to_blob import upload_pdf_to_blob
+from resume_analysis import extract_text_from_pdf, analyze_resume
+from recommend_jobs_from_faiss import search_faiss_job_ids, search_faiss_job_ids_batch, get_job_details_from_ids
+from store_to_db import insert_many_to_database
+from resume_pipeline import generate_cot_analyses
+from pdf_extractor import extract_text_isolated
+from text_compaction import prepare_resume_text
+from stage_graph import Stage, run_stage_graph
+from reranker import search_top_k, merge_similarity_scores, rerank_jobs
+from tracing import span, enable as enable_tracing
+from llm_gateway import BATCH, priority as llm_priority
+
+# 환경 변수 로드
+load_dotenv()
+
+# 배치 전체 워커 수 (동시에 처리 중인 이력서 수)
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", 8))
+
+# 단계별 동시 실행 상한
+STAGE_LIMITS = {
+    "upload": int(os.getenv("BATCH_UPLOAD_CONCURRENCY", 4)),
+    "extract": int(os.getenv("BATCH_EXTRACT_CONCURRENCY", 4)),
+    "llm": int(os.getenv("BATCH_LLM_CONCURRENCY", 4)),
+    "search": int(os.getenv("BATCH_SEARCH_CONCURRENCY", 8)),
+    "db": int(os.getenv("BATCH_DB_CONCURRENCY", 4)),
+}
+
+# 추출을 문서별 자식 프로세스에서 실행 (손상된 PDF가 워커를 붙잡지 않도록 시간 제한)
+BATCH_EXTRACT_ISOLATED = os.getenv("BATCH_EXTRACT_ISOLATED", "true").lower() in ("1", "true", "yes")
+
+# 몇 건의 이력서 결과를 한 트랜잭션으로 묶어 저장할지
+BATCH_DB_WRITE_SIZE = int(os.getenv("BATCH_DB_WRITE_SIZE", 20))
+
+# 검색 마이크로 배치: 한 요청에 묶을 최대 검색어 수 / 첫 검색어 이후 최대 대기 시간(초)
+SEARCH_BATCH_MAX_SIZE = int(os.getenv("SEARCH_BATCH_MAX_SIZE", 16))
+SEARCH_BATCH_MAX_WAIT = float(os.getenv("SEARCH_BATCH_MAX_WAIT", 0.05))
+
+
+class StageLimiter:
+    """
+    단계 이름별 세마포어로 각 단계의 동시 실행 수를 제한
+    """
+
+    def __init__(self, limits=None):
+        merged = dict(STAGE_LIMITS)
+        merged.update(limits or {})
+        self.limits = merged
+        self._semaphores = {name: threading.BoundedSemaphore(max(1, n)) for name, n in merged.items()}
+
+    def stage(self, name):
+        return self._semaphores[name]
+
+
+class SearchMicroBatcher:
+    """
+    여러 워커가 동시에 요청한 검색어를 모아 search_faiss_job_ids_batch 한 번으로 보낸다.
+    첫 검색어가 들어온 뒤 max_wait초 동안 또는 max_batch_size개가 찰 때까지 모으며,
+    동시에 진행되는 배치 요청 수는 max_in_flight로 제한한다.
+    """
+
+    def __init__(self, max_batch_size=None, max_wait=None, max_in_flight=1, top_k=None):
+        self.max_batch_size = max(1, max_batch_size or SEARCH_BATCH_MAX_SIZE)
+        self.max_wait = SEARCH_BATCH_MAX_WAIT if max_wait is None else max_wait
+        self.top_k = top_k or search_top_k()
+        self._queue = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_in_flight))
+        self._thread = threading.Thread(target=self._collect, name="search-micro-batcher", daemon=True)
+        self._thread.start()
+
+    def search(self, query):
+        future = Future()
+        self._queue.put((query, future))
+        return future.result()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+
+    def _collect(self):
+        closing = False
+        while not closing:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    closing = True
+                    break
+                batch.append(item)
+            self._executor.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch):
+        try:
+            results = search_faiss_job_ids_batch([query for query, _ in batch], self.top_k, raise_errors=True)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+
+def load_manifest(path):
+    """
+    (user_id, pdf_path) 목록 로드
+    - 디렉터리: 파일명 앞부분의 숫자를 user_id로 사용 (예: 42_resume.pdf, user_42.pdf)
+    - .jsonl: {"user_id": .., "pdf_path": ..} 한 줄씩
+    - 그 외: user_id,pdf_path 컬럼을 가진 CSV
+    """
+    items = []
+    if os.path.isdir(path):
+        for pdf_path in sorted(glob.glob(os.path.join(path, "*.pdf"))):
+            match = re.search(r"(\d+)", os.path.basename(pdf_path))
+            if not match:
+                print(f"  user_id를 알 수 없어 건너뜀: {pdf_path}")
+                continue
+            items.append((int(match.group(1)), pdf_path))
+    elif path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    items.append((int(row["user_id"]), row["pdf_path"]))
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                items.append((int(row["user_id"]), row["pdf_path"]))
+    return items
+
+
+def _item_key(user_id, pdf_path):
+    return f"{user_id}:{os.path.abspath(pdf_path)}"
+
+
+def load_checkpoint(checkpoint_path):
+    """
+    체크포인트 파일에서 이미 성공한 항목의 키 집합을 반환
+    """
+    done = set()
+    if not checkpoint_path or not os.path.exists(checkpoint_path):
+        return done
+    with open(checkpoint_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # 중단 시점에 잘린 마지막 줄은 무시
+                continue
+            if record.get("status") == "success":
+                done.add(_item_key(record["user_id"], record["pdf_path"]))
+    return done
+
+
+def process_resume(user_id, pdf_path, limiter, cot_concurrency=None, searcher=None):
+    """
+    이력서 한 건을 기존 파이프라인 단계(업로드 → 추출 → 평가 → 검색 → CoT)로 처리하고
+    insert_many_to_database에 넘길 레코드(dict)를 반환
+    searcher(SearchMicroBatcher)가 주어지면 검색을 다른 이력서와 묶어서 보낸다
+    검색/공고 조회가 실패하면 추천 0건으로 저장하지 않고 예외를 발생시켜 실패 항목으로 남긴다 (재실행 시 다시 처리)
+    """
+    def _upload(ctx):
+        with limiter.stage("upload"):
+            return upload_pdf_to_blob(pdf_path, user_id)
+
+    def _analyze(ctx):
+        with limiter.stage("extract"):
+            raw_text = extract_text_isolated(pdf_path) if BATCH_EXTRACT_ISOLATED else extract_text_from_pdf(pdf_path)
+        text, token_stats = prepare_resume_text(raw_text)
+
+        with limiter.stage("llm"):
+            analysis = analyze_resume(text)
+        skills, category, query = analysis["skills"], analysis["category"], analysis["search_query"]
+
+        if searcher is not None:
+            job_id_results = searcher.search(query)
+        else:
+            with limiter.stage("search"):
+                job_id_results = search_faiss_job_ids(query, top_k=search_top_k(), raise_errors=True)
+
+        with limiter.stage("db"):
+            candidates = get_job_details_from_ids([job["job_id"] for job in job_id_results], raise_errors=True)
+        recommendations = rerank_jobs(merge_similarity_scores(job_id_results, candidates), skills, category)
+
+        with limiter.stage("llm"):
+            cot_analyses = generate_cot_analyses(
+                recommendations,
+                skills=skills,
+                category=category,
+                search_query=query,
+                max_concurrency=cot_concurrency
+            )
+
+        return {
+            "user_id": user_id,
+            "summary": analysis["summary"],
+            "skills": skills,
+            "category": category,
+            "job_recommendations": recommendations,
+            "search_query": query,
+            "cot_analyses": cot_analyses,
+            "sections": (analysis["strengths"], analysis["weaknesses"], analysis["improvement"]),
+            "saved_tokens": token_stats["saved_tokens"],
+        }
+
+    # 업로드는 분석 흐름과 동시에 진행하고 결과 레코드에서 합류
+    results = run_stage_graph([Stage("blob_url", _upload), Stage("record", _analyze)])
+    record = results["record"]
+    record["blob_url"] = results["blob_url"]
+    return record
+
+
+def run_batch(items, checkpoint_path=None, max_workers=None, stage_limits=None, cot_concurrency=None,
+              write_size=None, search_batch_size=None, search_batch_wait=None):
+    """
+    (user_id, pdf_path) 목록을 제한된 워커 풀에서 일괄 처리한다.
+    검색은 search_batch_size개까지 마이크로 배치로 묶고 (1이면 건별 검색),
+    분석이 끝난 결과는 write_size 건씩 모아 한 트랜잭션으로 저장한다.
+    checkpoint_path가 주어지면 이미 성공한 항목은 건너뛰고, 각 결과를 한 줄씩 기록한다.
+    반환값: 항목별 결과 dict 리스트 (status: success / failed / skipped)
+    """
+    limiter = StageLimiter(stage_limits)
+    done = load_checkpoint(checkpoint_path)
+    checkpoint_lock = threading.Lock()
+    results = []
+
+    def _record(result):
+        results.append(result)
+        if not checkpoint_path or result["status"] == "skipped":
+            return
+        with checkpoint_lock, open(checkpoint_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+            f.flush()
+
+    def _finish(result):
+        result["finished_at"] = datetime.now().isoformat()
+        _record(result)
+        if result["status"] == "success":
+            print(f"  [성공] user {result['user_id']} ({result['pdf_path']}) → Resume ID {result['resume_id']}")
+        else:
+            print(f"  [실패] user {result['user_id']} ({result['pdf_path']}): {result['error']}")
+
+    write_size = write_size or BATCH_DB_WRITE_SIZE
+    write_buffer = []  # (user_id, pdf_path, record)
+
+    def _flush():
+        if not write_buffer:
+            return
+        batch = list(write_buffer)
+        write_buffer.clear()
+        try:
+            resume_ids = insert_many_to_database([record for _, _, record in batch])
+        except Exception as e:
+            for user_id, pdf_path, _ in batch:
+                _finish({"user_id": user_id, "pdf_path": pdf_path, "status": "failed", "error": f"DB 저장 실패: {str(e)}"})
+            return
+        for (user_id, pdf_path, record), resume_id in zip(batch, resume_ids):
+            _finish({"user_id": user_id, "pdf_path": pdf_path, "status": "success", "resume_id": resume_id,
+                     "saved_tokens": record["saved_tokens"]})
+
+    search_batch_size = search_batch_size or SEARCH_BATCH_MAX_SIZE
+    searcher = None
+    if search_batch_size > 1:
+        searcher = SearchMicroBatcher(
+            max_batch_size=search_batch_size,
+            max_wait=search_batch_wait,
+            max_in_flight=limiter.limits["search"]
+        )
+
+    def _run(user_id, pdf_path):
+        try:
+            # 일괄 처리의 GPT 호출은 단건 파이프라인 요청보다 뒤로 밀린다
+            with llm_priority(BATCH), span("batch.process_resume", user_id=user_id):
+                return user_id, pdf_path, process_resume(user_id, pdf_path, limiter, cot_concurrency, searcher), None
+        except Exception as e:
+            return user_id, pdf_path, None, e
+
+    pending = []
+    for user_id, pdf_path in items:
+        if _item_key(user_id, pdf_path) in done:
+            _record({"user_id": user_id, "pdf_path": pdf_path, "status": "skipped"})
+        else:
+            pending.append((user_id, pdf_path))
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers or BATCH_MAX_WORKERS) as executor:
+            futures = [executor.submit(_run, user_id, pdf_path) for user_id, pdf_path in pending]
+            for future in as_completed(futures):
+                user_id, pdf_path, record, error = future.result()
+                if error is not None:
+                    _finish({"user_id": user_id, "pdf_path": pdf_path, "status": "failed", "error": str(error)})
+                    continue
+                write_buffer.append((user_id, pdf_path, record))
+                if len(write_buffer) >= write_size:
+                    with limiter.stage("db"):
+                        _flush()
+    finally:
+        if searcher is not None:
+            searcher.close()
+
+    with limiter.stage("db"):
+        _flush()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="이력서 일괄 분석 파이프라인")
+    parser.add_argument("source", type=str, help="PDF 디렉터리 또는 매니페스트(.csv/.jsonl) 경로")
+    parser.add_argument("--checkpoint", type=str, default=None, help="재시작용 체크포인트(JSONL) 경로")
+    parser.add_argument("--workers", type=int, default=None, help=f"동시 처리 이력서 수 (기본값: {BATCH_MAX_WORKERS})")
+    for stage_name, default in STAGE_LIMITS.items():
+        parser.add_argument(f"--{stage_name}-concurrency", type=int, default=None,
+                            help=f"{stage_name} 단계 동시 실행 수 (기본값: {default})")
+    parser.add_argument("--cot-concurrency", type=int, default=None, help="이력서당 CoT 분석 동시 요청 수")
+    parser.add_argument("--write-size", type=int, default=None,
+                        help=f"한 트랜잭션으로 저장할 이력서 수 (기본값: {BATCH_DB_WRITE_SIZE})")
+    parser.add_argument("--search-batch-size", type=int, default=None,
+                        help=f"검색 요청 하나에 묶을 최대 검색어 수, 1이면 건별 검색 (기본값: {SEARCH_BATCH_MAX_SIZE})")
+    parser.add_argument("--search-batch-wait", type=float, default=None,
+                        help=f"검색어를 모으는 최대 대기 시간(초) (기본값: {SEARCH_BATCH_MAX_WAIT})")
+    parser.add_argument("--trace", type=str, default=None, metavar="PATH",
+                        help="단계별 소요 시간을 JSON Lines 파일로 기록")
+    args = parser.parse_args()
+    if args.trace:
+        enable_tracing(args.trace)
+
+    limits = {
+        stage_name: getattr(args, f"{stage_name}_concurrency")
+        for stage_name in STAGE_LIMITS
+        if getattr(args, f"{stage_name}_concurrency")
+    }
+
+    print("\n이력서 일괄 분석 시작\n")
+    batch_items = load_manifest(args.source)
+    print(f"  대상 이력서 수: {len(batch_items)}")
+    batch_results = run_batch(
+        batch_items,
+        checkpoint_path=args.checkpoint,
+        max_workers=args.workers,
+        stage_limits=limits,
+        cot_concurrency=args.cot_concurrency,
+        write_size=args.write_size,
+        search_batch_size=args.search_batch_size,
+        search_batch_wait=args.search_batch_wait
+    )
+
+    counts = {}
+    for r in batch_results:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    print(f"\n일괄 분석 완료: 성공 {counts.get('success', 0)}, 실패 {counts.get('failed', 0)}, 건너뜀 {counts.get('skipped', 0)}")
@@ -0,0 +1,285 @@
+"""
+로컬 스텁(local_stubs.py)으로 파이프라인 전체를 실행해 처리량/지연 시간을 측정하는 벤치마크
+Azure OpenAI, Blob, MySQL, FAISS 검색 서비스 없이 실행할 수 있다.
+
+사용 예:
+    python benchmark_pipeline.py --resumes 40 --concurrency 1,2,4,8 --llm-latency 0.3
+    python benchmark_pipeline.py --compare benchmark_results/20240101-120000.json
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+from datetime import datetime
+
+BENCHMARK_RESULTS_DIR = "benchmark_results"
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values, p):
+    """선형 보간 백분위수 (values는 정렬된 리스트)"""
+    if not values:
+        return None
+    k = (len(values) - 1) * p / 100
+    lower = int(k)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (k - lower)
+
+
+def summarize_trace(trace_path):
+    """계측 파일(JSONL)을 span 이름별 count/mean/p50/p95/p99(ms)와 LLM 토큰 합계로 요약"""
+    durations, tokens, errors = {}, {"prompt_tokens": 0, "completion_tokens": 0}, {}
+    if os.path.exists(trace_path):
+        with open(trace_path, encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                durations.setdefault(record["name"], []).append(record["duration_ms"])
+                if record.get("status") == "error":
+                    errors[record["name"]] = errors.get(record["name"], 0) + 1
+                for kind in tokens:
+                    tokens[kind] += record.get(kind) or 0
+
+    spans = {}
+    for name, values in sorted(durations.items()):
+        values.sort()
+        stats = {"count": len(values), "mean": round(sum(values) / len(values), 3)}
+        for p in PERCENTILES:
+            stats[f"p{p}"] = round(percentile(values, p), 3)
+        if errors.get(name):
+            stats["errors"] = errors[name]
+        spans[name] = stats
+    return spans, tokens
+
+
+def start_environment(workdir, args):
+    """
+    스텁 서버를 띄우고 파이프라인 모듈이 읽는 환경 변수를 설정한다
+    (파이프라인 모듈은 import 시점에 환경 변수를 읽으므로 반드시 import 전에 호출)
+    """
+    import local_stubs
+
+    db_path = os.path.join(workdir, "benchmark.sqlite3")
+    local_stubs.create_sqlite_database(db_path, job_count=args.jobs)
+    openai_stub = local_stubs.start_openai_stub(args.llm_latency, args.llm_jitter, args.stub_rpm)
+    search_stub = local_stubs.start_search_stub(args.jobs, args.search_latency)
+
+    os.environ.update({
+        "OPENAI_ENDPOINT": openai_stub.url,
+        "OPENAI_API_KEY": "benchmark",
+        "OPENAI_DEPLOYMENT": "benchmark",
+        "FAISS_BACKEND": "http",
+        "FAISS_SEARCH_URL": f"{search_stub.url}/search",
+        "FAISS_BATCH_SEARCH_URL": f"{search_stub.url}/search/batch",
+        "AZURE_BLOB_CONTAINER": "benchmark",
+        "LLM_CACHE_ENABLED": "false",
+        "LLM_CACHE_PATH": "",
+        "JOB_CACHE_ENABLED": "true" if args.job_cache else "false",
+        "JOB_CACHE_SHARED_PATH": "",
+        "PIPELINE_TRACE": "false",
+        "LLM_RPM_LIMIT": str(args.llm_rpm),
+        "LLM_TPM_LIMIT": str(args.llm_tpm),
+    })
+    return db_path, openai_stub, search_stub
+
+
+def run_scenario(name, trace_path, func, resumes, concurrency, quiet=True):
+    """func()를 계측을 켠 상태로 실행하고 처리량과 span 통계를 반환"""
+    import tracing
+
+    tracing.enable(trace_path)
+    output = io.StringIO() if quiet else sys.stdout
+    started = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(output):
+            failures = func()
+    finally:
+        elapsed = time.perf_counter() - started
+        tracing.disable()
+
+    spans, tokens = summarize_trace(trace_path)
+    succeeded = resumes - failures
+    result = {
+        "name": name,
+        "concurrency": concurrency,
+        "resumes": resumes,
+        "failures": failures,
+        "wall_seconds": round(elapsed, 3),
+        "resumes_per_second": round(succeeded / elapsed, 3) if elapsed > 0 else None,
+        "llm_tokens": tokens,
+        "spans": spans,
+    }
+    print(f"  {name}: {succeeded}/{resumes}건 성공, {elapsed:.2f}초, {result['resumes_per_second']} resumes/s")
+    return result
+
+
+def run_benchmark(args):
+    workdir = tempfile.mkdtemp(prefix="benchmark_")
+    db_path, openai_stub, search_stub = start_environment(workdir, args)
+
+    # 환경 변수를 설정한 뒤에 파이프라인 모듈을 불러온다
+    import db_pool
+    import llm_gateway
+    import local_stubs
+    import upload_to_blob
+    from batch_pipeline import run_batch
+    from resume_pipeline import run_pipeline
+
+    db_pool.set_connection_factory(local_stubs.sqlite_connection_factory(db_path, args.db_latency))
+
+    print(f"\n합성 이력서 {args.resumes}건 생성 중... ({workdir})")
+    template = args.template if args.template and os.path.exists(args.template) else None
+    pdf_paths = local_stubs.generate_resume_pdfs(os.path.join(workdir, "resumes"), args.resumes,
+                                                template_path=template, pages=args.pages)
+
+    scenarios = []
+    try:
+        # 1. 단건 파이프라인(run_pipeline)을 순차 실행
+        pipeline_paths = pdf_paths[:args.pipeline_resumes]
+
+        def _pipeline():
+            failures = 0
+            for i, pdf_path in enumerate(pipeline_paths, 1):
+                try:
+                    run_pipeline(i, pdf_path, analysis_mode=args.analysis_mode)
+                except Exception as e:
+                    print(f"run_pipeline 실패: {e}", file=sys.stderr)
+                    failures += 1
+            return failures
+
+        if pipeline_paths:
+            print("\n[run_pipeline] 순차 실행")
+            upload_to_blob._blob_service_client = local_stubs.InMemoryBlobService(args.blob_latency)
+            scenarios.append(run_scenario("run_pipeline", os.path.join(workdir, "trace_pipeline.jsonl"),
+                                          _pipeline, len(pipeline_paths), 1, quiet=not args.verbose))
+
+        # 2. 배치 경로(run_batch)를 동시 처리 수를 늘려가며 실행
+        print("\n[run_batch] 동시 처리 수별 실행")
+        for concurrency in args.concurrency:
+            # 동시 처리 수마다 빈 Blob 저장소를 써서 내용 해시로 업로드를 건너뛰지 않도록 한다
+            upload_to_blob._blob_service_client = local_stubs.InMemoryBlobService(args.blob_latency)
+            items = [(1000 * concurrency + i, path) for i, path in enumerate(pdf_paths, 1)]
+
+            def _batch():
+                results = run_batch(items, max_workers=concurrency, cot_concurrency=args.cot_concurrency)
+                return sum(1 for r in results if r["status"] == "failed")
+
+            scenarios.append(run_scenario(f"run_batch@{concurrency}",
+                                          os.path.join(workdir, f"trace_batch_{concurrency}.jsonl"),
+                                          _batch, len(items), concurrency, quiet=not args.verbose))
+    finally:
+        openai_stub.stop()
+        search_stub.stop()
+        db_pool.close_all_pools()
+
+    return {
+        "created_at": datetime.now().isoformat(),
+        "label": args.label,
+        "config": {
+            "resumes": args.resumes,
+            "pages": args.pages,
+            "jobs": args.jobs,
+            "analysis_mode": args.analysis_mode,
+            "cot_concurrency": args.cot_concurrency,
+            "job_cache": args.job_cache,
+            "llm_latency": args.llm_latency,
+            "llm_jitter": args.llm_jitter,
+            "search_latency": args.search_latency,
+            "blob_latency": args.blob_latency,
+            "db_latency": args.db_latency,
+            "llm_rpm": args.llm_rpm,
+            "llm_tpm": args.llm_tpm,
+            "stub_rpm": args.stub_rpm,
+            "python": sys.version.split()[0],
+            "cpu_count": os.cpu_count(),
+        },
+        "stub_requests": {"openai": openai_stub.requests, "search": search_stub.requests,
+                          "openai_rate_limited": openai_stub.rate_limited},
+        "llm_gateway": llm_gateway.gateway.stats(),
+        "scenarios": scenarios,
+    }
+
+
+def print_report(report):
+    print("\n" + "=" * 80)
+    print("벤치마크 결과 (단위: ms)")
+    print("=" * 80)
+    print(f"GPT 게이트웨이: {report['llm_gateway']}, 스텁 429 응답: {report['stub_requests']['openai_rate_limited']}건")
+    for scenario in report["scenarios"]:
+        print(f"\n{scenario['name']}  처리량 {scenario['resumes_per_second']} resumes/s, "
+              f"실패 {scenario['failures']}건, 토큰 {scenario['llm_tokens']}")
+        print(f"  {'span':<40}{'count':>7}{'p50':>11}{'p95':>11}{'p99':>11}")
+        for name, stats in scenario["spans"].items():
+            print(f"  {name:<40}{stats['count']:>7}{stats['p50']:>11.1f}{stats['p95']:>11.1f}{stats['p99']:>11.1f}")
+
+
+def _change(new, old):
+    if not old or new is None:
+        return "   n/a"
+    return f"{(new - old) / old * 100:+6.1f}%"
+
+
+def print_comparison(report, baseline):
+    """같은 이름의 시나리오끼리 처리량과 span p95를 비교"""
+    print("\n" + "=" * 80)
+    print(f"이전 결과와 비교 (기준: {baseline.get('created_at')} {baseline.get('label') or ''})")
+    print("=" * 80)
+    previous = {scenario["name"]: scenario for scenario in baseline.get("scenarios", [])}
+    for scenario in report["scenarios"]:
+        old = previous.get(scenario["name"])
+        if old is None:
+            print(f"\n{scenario['name']}: 기준 결과 없음")
+            continue
+        print(f"\n{scenario['name']}  처리량 {old['resumes_per_second']} → {scenario['resumes_per_second']} resumes/s "
+              f"({_change(scenario['resumes_per_second'], old['resumes_per_second'])})")
+        for name, stats in scenario["spans"].items():
+            old_stats = old["spans"].get(name)
+            if old_stats:
+                print(f"  {name:<40} p95 {old_stats['p95']:>10.1f} → {stats['p95']:>10.1f} "
+                      f"({_change(stats['p95'], old_stats['p95'])})")
+
+
+def _parse_levels(value):
+    return [int(level) for level in value.split(",") if level.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="로컬 스텁 기반 파이프라인 벤치마크")
+    parser.add_argument("--resumes", type=int, default=20, help="생성할 합성 이력서 수 (배치 시나리오마다 전부 처리)")
+    parser.add_argument("--pipeline-resumes", type=int, default=5, help="run_pipeline으로 순차 처리할 이력서 수 (0이면 생략)")
+    parser.add_argument("--pages", type=int, default=2, help="이력서마다 추가할 페이지 수")
+    parser.add_argument("--template", type=str, default="resume.pdf", help="합성 이력서의 바탕이 될 PDF")
+    parser.add_argument("--concurrency", type=_parse_levels, default=[1, 2, 4, 8], help="run_batch 동시 처리 수 목록 (예: 1,2,4,8)")
+    parser.add_argument("--cot-concurrency", type=int, default=None, help="이력서당 CoT 분석 동시 요청 수")
+    parser.add_argument("--analysis-mode", choices=["legacy", "structured"], default=None)
+    parser.add_argument("--jobs", type=int, default=500, help="가짜 채용공고 수")
+    parser.add_argument("--job-cache", action="store_true", help="채용공고 상세 캐시 사용")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="OpenAI 스텁 응답 지연(초)")
+    parser.add_argument("--llm-jitter", type=float, default=0.1, help="OpenAI 스텁 추가 무작위 지연 최대값(초)")
+    parser.add_argument("--search-latency", type=float, default=0.02, help="검색 스텁 응답 지연(초)")
+    parser.add_argument("--blob-latency", type=float, default=0.05, help="Blob 업로드 지연(초)")
+    parser.add_argument("--db-latency", type=float, default=0.005, help="DB 커서 생성당 지연(초)")
+    parser.add_argument("--llm-rpm", type=int, default=0, help="게이트웨이 분당 요청 한도 LLM_RPM_LIMIT (0이면 제한 없음)")
+    parser.add_argument("--llm-tpm", type=int, default=0, help="게이트웨이 분당 토큰 한도 LLM_TPM_LIMIT (0이면 제한 없음)")
+    parser.add_argument("--stub-rpm", type=int, default=0, help="OpenAI 스텁이 429를 반환하기 시작하는 분당 요청 수 (0이면 없음)")
+    parser.add_argument("--label", type=str, default="", help="결과 파일에 남길 설명")
+    parser.add_argument("--output-dir", type=str, default=BENCHMARK_RESULTS_DIR, help="결과(JSON) 저장 디렉터리")
+    parser.add_argument("--compare", type=str, default=None, metavar="PATH", help="비교할 이전 결과 파일")
+    parser.add_argument("--verbose", action="store_true", help="파이프라인 출력 표시")
+    args = parser.parse_args()
+
+    benchmark_report = run_benchmark(args)
+    print_report(benchmark_report)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    output_path = os.path.join(args.output_dir, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(benchmark_report, f, ensure_ascii=False, indent=2)
+    print(f"\n결과 저장: {output_path}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print_comparison(benchmark_report, json.load(f))
@@ -0,0 +1,103 @@
+import os
+import argparse
+import numpy as np
+import pymysql
+from pymysql.cursors import SSCursor
+from recommend_jobs_from_faiss import DB_CONFIG
+from local_faiss_index import FAISS_INDEX_PATH, embed_texts, faiss
+
+# 임베딩 API 한 번에 보낼 공고 수 / 공고당 임베딩할 최대 글자 수
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", 64))
+EMBED_MAX_CHARS = int(os.getenv("EMBED_MAX_CHARS", 4000))
+
+
+def _posting_text(position_title, description):
+    return f"{position_title or ''}\n{description or ''}"[:EMBED_MAX_CHARS]
+
+
+def build_index(output_path=None, batch_size=None, write_faiss=False):
+    """
+    JobPosting 테이블의 공고를 임베딩해 로컬 검색 인덱스 파일로 저장
+    - {output_path}.npy: 정규화된 float32 임베딩 행렬 (검색 시 mmap으로 로드)
+    - {output_path}.ids.npy: 행 순서에 대응하는 job_id
+    - {output_path}.faiss: write_faiss=True이고 faiss가 설치된 경우 IndexFlatIP
+    """
+    output_path = output_path or FAISS_INDEX_PATH
+    batch_size = batch_size or EMBED_BATCH_SIZE
+
+    connection = pymysql.connect(**DB_CONFIG)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM JobPosting")
+            total = cursor.fetchone()[0]
+        print(f"  임베딩 대상 공고 수: {total}")
+        if total == 0:
+            return 0
+
+        matrix = None
+        job_ids = np.zeros(total, dtype=np.int64)
+        row = 0
+        tmp_path = f"{output_path}.npy.tmp"
+
+        # 서버 측 커서로 공고를 조금씩 읽어 메모리 사용량을 일정하게 유지
+        with connection.cursor(SSCursor) as cursor:
+            cursor.execute("SELECT job_id, position_title, description FROM JobPosting ORDER BY job_id")
+            while row < total:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                rows = rows[:total - row]
+                vectors = embed_texts([_posting_text(r[1], r[2]) for r in rows])
+                if matrix is None:
+                    matrix = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32,
+                                                       shape=(total, vectors.shape[1]))
+                matrix[row:row + len(rows)] = vectors
+                job_ids[row:row + len(rows)] = [r[0] for r in rows]
+                row += len(rows)
+                print(f"  {row}/{total} 임베딩 완료")
+    finally:
+        connection.close()
+
+    if matrix is None:
+        return 0
+    matrix.flush()
+    del matrix
+
+    # 검색 프로세스가 행렬과 job_id가 어긋난 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체
+    np.save(f"{output_path}.ids.tmp.npy", job_ids[:row])
+    if row < total:
+        # 빌드 도중 공고가 삭제된 경우 실제로 읽은 행만 남긴다
+        full = np.load(tmp_path, mmap_mode="r")
+        np.save(f"{output_path}.tmp.npy", full[:row])
+        del full
+        os.remove(tmp_path)
+        os.replace(f"{output_path}.tmp.npy", f"{output_path}.npy")
+    else:
+        os.replace(tmp_path, f"{output_path}.npy")
+    os.replace(f"{output_path}.ids.tmp.npy", f"{output_path}.ids.npy")
+
+    if not write_faiss and os.path.exists(f"{output_path}.faiss"):
+        # 이전 빌드의 .faiss 파일이 남아 있으면 새 job_id 순서와 어긋나므로 제거
+        os.remove(f"{output_path}.faiss")
+    elif write_faiss:
+        if faiss is None:
+            print("  faiss 패키지가 없어 .faiss 인덱스는 생성하지 않습니다 (NumPy 인덱스만 사용)")
+        else:
+            vectors = np.load(f"{output_path}.npy", mmap_mode="r")
+            index = faiss.IndexFlatIP(vectors.shape[1])
+            for start in range(0, row, 10000):
+                index.add(np.ascontiguousarray(vectors[start:start + 10000]))
+            faiss.write_index(index, f"{output_path}.faiss")
+
+    print(f"  인덱스 저장 완료: {output_path}.npy ({row}건)")
+    return row
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JobPosting 임베딩을 로컬 검색 인덱스 파일로 내보내기")
+    parser.add_argument("--output", type=str, default=None, help=f"인덱스 경로 (기본값: {FAISS_INDEX_PATH})")
+    parser.add_argument("--batch-size", type=int, default=None, help=f"임베딩 배치 크기 (기본값: {EMBED_BATCH_SIZE})")
+    parser.add_argument("--faiss", action="store_true", help="faiss 설치 시 .faiss 인덱스도 함께 생성")
+    args = parser.parse_args()
+
+    build_index(args.output, args.batch_size, args.faiss)
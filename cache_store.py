@@ -0,0 +1,223 @@
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+# 캐시 미스 표시용 (None도 정상 값으로 캐시할 수 있도록 별도 객체 사용)
+MISS = object()
+
+
+def make_key(*parts) -> str:
+    """
+    여러 구성 요소(텍스트, 프롬프트 템플릿, 배포 이름 등)를 묶어 sha256 캐시 키 생성
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, bytes) else str(part).encode("utf-8")
+        # 구성 요소 경계가 섞이지 않도록 길이를 함께 넣는다
+        digest.update(str(len(data)).encode("ascii") + b":")
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """
+    프로세스 내 LRU 캐시 (항목 수 / 바이트 수 / TTL 기준 제거)
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=None, ttl=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.current_bytes = 0
+        self._data = OrderedDict()  # key -> (value, size, expires_at)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return MISS
+            value, size, expires_at = entry
+            if expires_at is not None and expires_at < time.time():
+                self._remove(key)
+                return MISS
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, size=None, ttl=None):
+        size = size or 0
+        ttl = ttl if ttl is not None else self.ttl
+        if self.max_bytes is not None and size > self.max_bytes:
+            # 캐시 전체보다 큰 값은 저장하지 않는다
+            return
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, size, time.time() + ttl if ttl else None)
+            self.current_bytes += size
+            while self._data and (
+                (self.max_entries and len(self._data) > self.max_entries)
+                or (self.max_bytes is not None and self.current_bytes > self.max_bytes)
+            ):
+                self._remove(next(iter(self._data)))
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.current_bytes = 0
+
+    def _remove(self, key):
+        _, size, _ = self._data.pop(key)
+        self.current_bytes -= size
+
+
+class SQLiteCache:
+    """
+    SQLite 파일 기반 영구 캐시 (값은 JSON으로 저장, 같은 호스트의 프로세스 간 공유 가능)
+    """
+
+    # set 호출 몇 번마다 만료/초과 항목을 정리할지
+    CLEANUP_INTERVAL = 100
+
+    def __init__(self, path, ttl=None, max_entries=None, table="cache"):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.table = table
+        self._conn = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _connection(self):
+        # 실제로 사용될 때 파일을 연다
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.table} (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            # set이 CLEANUP_INTERVAL번 미만인 짧은 프로세스도 정리되도록 열 때 한 번 정리
+            self._evict(self._conn, time.time())
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return MISS
+            value, expires_at = row
+            if expires_at is not None and expires_at < now:
+                conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                conn.commit()
+                return MISS
+            conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+        return json.loads(value)
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        ttl = ttl if ttl is not None else self.ttl
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now + ttl if ttl else None, now)
+            )
+            self._writes += 1
+            if self._writes % self.CLEANUP_INTERVAL == 0:
+                self._evict(conn, now)
+            conn.commit()
+
+    def delete(self, key):
+        with self._lock:
+            conn = self._connection()
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            conn.commit()
+
+    def _evict(self, conn, now):
+        conn.execute(f"DELETE FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+        if self.max_entries:
+            conn.execute(f"""
+                DELETE FROM {self.table} WHERE key IN (
+                    SELECT key FROM {self.table} ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+
+
+class TieredCache:
+    """
+    메모리 LRU(앞단) + 선택적 SQLite(뒷단) 2단 캐시, 적중/미스 카운터 포함
+    sizeof가 주어지면 메모리 캐시에 값의 크기(바이트)를 함께 기록한다
+    """
+
+    def __init__(self, memory=None, disk=None, sizeof=None):
+        self.memory = memory or LRUCache()
+        self.disk = disk
+        self.sizeof = sizeof
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not MISS:
+            self._count("memory_hits")
+            return value
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not MISS:
+                self.memory.set(key, value, size=self._size(value))
+                self._count("disk_hits")
+                return value
+        self._count("misses")
+        return MISS
+
+    def set(self, key, value):
+        self.memory.set(key, value, size=self._size(value))
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def delete(self, key):
+        self.memory.delete(key)
+        if self.disk is not None:
+            self.disk.delete(key)
+
+    def stats(self):
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        return {
+            "hits": hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": hits / total if total else 0.0,
+        }
+
+    def _size(self, value):
+        return self.sizeof(value) if self.sizeof else None
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
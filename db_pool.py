@@ -0,0 +1,279 @@
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+# 환경 변수 로드
+load_dotenv()
+
+# 커넥션 풀 설정
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", 1))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", 5))
+DB_POOL_IDLE_TIMEOUT = float(os.getenv("DB_POOL_IDLE_TIMEOUT", 300))       # 이 시간(초) 이상 유휴 상태면 연결 종료
+DB_POOL_CHECKOUT_TIMEOUT = float(os.getenv("DB_POOL_CHECKOUT_TIMEOUT", 30))  # 빈 연결을 기다리는 최대 시간(초)
+DB_POOL_PING_INTERVAL = float(os.getenv("DB_POOL_PING_INTERVAL", 30))      # 이 시간(초) 이상 쉬었던 연결은 대여 전 ping
+
+
+class PoolTimeoutError(Exception):
+    """커넥션 풀에서 제한 시간 내에 연결을 얻지 못함"""
+
+
+class PooledConnection:
+    """
+    풀에서 대여한 연결 (cursor/commit/rollback 외의 속성은 원래 연결로 위임)
+    마지막 commit/rollback 이후 커서를 연 적이 있는지 기록해, 반납할 때 열린 트랜잭션이 있을 때만 롤백한다
+    (pymysql은 SELECT 결과를 받은 뒤에는 서버의 트랜잭션 상태 플래그를 갱신하지 않으므로 직접 추적)
+    """
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.in_transaction = False
+
+    def cursor(self, *args, **kwargs):
+        self.in_transaction = True
+        return self.raw.cursor(*args, **kwargs)
+
+    def commit(self):
+        self.raw.commit()
+        self.in_transaction = False
+
+    def rollback(self):
+        self.raw.rollback()
+        self.in_transaction = False
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+
+class ConnectionPool:
+    """
+    스레드 안전한 pymysql 커넥션 풀
+    - 최소/최대 연결 수 유지
+    - 대여 시 오래 쉬었던 연결은 ping으로 상태 확인
+    - 유휴 시간이 긴 연결은 최소 크기까지 정리
+    """
+
+    def __init__(self, config, min_size=None, max_size=None, idle_timeout=None,
+                 checkout_timeout=None, ping_interval=None, connect=None):
+        self.config = dict(config)
+        self.min_size = DB_POOL_MIN_SIZE if min_size is None else min_size
+        self.max_size = max(1, DB_POOL_MAX_SIZE if max_size is None else max_size)
+        self.idle_timeout = DB_POOL_IDLE_TIMEOUT if idle_timeout is None else idle_timeout
+        self.checkout_timeout = DB_POOL_CHECKOUT_TIMEOUT if checkout_timeout is None else checkout_timeout
+        self.ping_interval = DB_POOL_PING_INTERVAL if ping_interval is None else ping_interval
+        self._connect = connect or _connection_factory
+        self._idle = []  # (connection, 마지막 반납 시각), 가장 최근 반납한 연결을 먼저 재사용
+        self._size = 0   # 열려 있는 전체 연결 수 (유휴 + 대여 중)
+        self._cond = threading.Condition()
+        self._metrics = {
+            "created": 0,
+            "closed": 0,
+            "checkouts": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "health_check_failures": 0,
+            "reaped": 0,
+        }
+
+    def warm(self):
+        """최소 크기만큼 연결을 미리 열어 둔다"""
+        conns = []
+        try:
+            while True:
+                with self._cond:
+                    if self._size >= self.min_size:
+                        break
+                conns.append(self.acquire())
+        finally:
+            for conn in conns:
+                self.release(conn)
+
+    def acquire(self, timeout=None):
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            conn, last_used = self._checkout_slot(deadline)
+            if conn is None:
+                try:
+                    conn = PooledConnection(self._connect(**self.config))
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                self._bump("created")
+                return conn
+
+            if time.monotonic() - last_used < self.ping_interval or self._is_healthy(conn):
+                return conn
+            self._bump("health_check_failures")
+            self._discard(conn)
+
+    def release(self, conn, discard=False):
+        if not discard and conn.in_transaction:
+            try:
+                # 읽기 전용 사용 후에도 트랜잭션 스냅샷이 남지 않도록 정리 (커밋 직후라면 왕복 없이 바로 반납)
+                conn.rollback()
+            except Exception:
+                discard = True
+        if discard or not getattr(conn, "open", True):
+            self._discard(conn)
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._reap_idle_locked()
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """
+        with 블록 동안 연결을 대여하고, 블록 종료 시 반납 (예외 시 롤백)
+        KeyboardInterrupt 등 Exception이 아닌 중단은 쿼리 도중일 수 있어 연결을 닫는다 (어느 경우든 풀의 자리는 돌려줌)
+        """
+        conn = self.acquire(timeout)
+        interrupted = True
+        try:
+            yield conn
+            interrupted = False
+        except Exception:
+            interrupted = False
+            raise
+        finally:
+            self.release(conn, discard=interrupted)
+
+    def metrics(self):
+        with self._cond:
+            stats = dict(self._metrics)
+            stats.update({
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "max_size": self.max_size,
+            })
+        return stats
+
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def _checkout_slot(self, deadline):
+        """유휴 연결을 꺼내거나 새 연결을 만들 자리를 예약 (새 연결이면 (None, None) 반환)"""
+        waited_from = None
+        with self._cond:
+            while True:
+                self._reap_idle_locked()
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn, last_used = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(
+                        f"{self.config.get('database')} 커넥션 풀 대기 시간 초과 (max_size={self.max_size})"
+                    )
+                if waited_from is None:
+                    waited_from = time.monotonic()
+                    self._metrics["waits"] += 1
+                self._cond.wait(remaining)
+            self._metrics["checkouts"] += 1
+            if waited_from is not None:
+                self._metrics["wait_seconds"] += time.monotonic() - waited_from
+        return conn, last_used
+
+    def _reap_idle_locked(self):
+        if not self.idle_timeout:
+            return
+        now = time.monotonic()
+        # 오래된 연결이 리스트 앞쪽에 있으므로 앞에서부터 정리
+        while self._idle and self._size > self.min_size and now - self._idle[0][1] > self.idle_timeout:
+            conn, _ = self._idle.pop(0)
+            self._size -= 1
+            self._metrics["reaped"] += 1
+            self._metrics["closed"] += 1
+            self._close_quietly(conn)
+
+    def _is_healthy(self, conn):
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception as e:
+            logging.warning(f"DB 연결 상태 확인 실패 ({self.config.get('database')}): {str(e)}")
+            return False
+
+    def _discard(self, conn):
+        self._close_quietly(conn)
+        with self._cond:
+            self._size -= 1
+            self._metrics["closed"] += 1
+            self._cond.notify()
+
+    def _bump(self, name):
+        with self._cond:
+            self._metrics[name] += 1
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+# 새 연결을 만드는 함수 (벤치마크 등에서 로컬 대체 DB로 바꿀 수 있음)
+def _pymysql_connect(**config):
+    # pymysql은 처음 연결할 때 로드 (DB를 쓰지 않는 명령은 import 비용을 치르지 않음)
+    import pymysql
+    return pymysql.connect(**config)
+
+
+_connection_factory = _pymysql_connect
+
+
+def set_connection_factory(factory):
+    """
+    이후 생성되는 풀이 사용할 연결 함수를 바꾼다 (config dict를 키워드 인자로 받음)
+    기존 풀은 모두 닫고 비운다
+    """
+    global _connection_factory
+    close_all_pools()
+    with _pools_lock:
+        _pools.clear()
+        _connection_factory = factory or _pymysql_connect
+
+
+def get_pool(config, **pool_options):
+    """
+    DB 설정(host/port/user/database)별로 하나의 풀을 공유
+    (EMBEDDING_DATABASE_NAME, USER_DATABASE_NAME은 서로 다른 풀을 사용)
+    """
+    key = (config.get("host"), config.get("port"), config.get("user"), config.get("database"))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(config, **pool_options)
+            _pools[key] = pool
+        return pool
+
+
+def pool_metrics():
+    """모든 풀의 지표를 database 이름 기준으로 반환"""
+    with _pools_lock:
+        pools = list(_pools.items())
+    return {f"{key[3]}@{key[0]}:{key[1]}": pool.metrics() for key, pool in pools}
+
+
+def close_all_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_all()
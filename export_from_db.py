@@ -0,0 +1,351 @@
+import os
+import json
+import gzip
+import argparse
+from datetime import datetime
+from dotenv import load_dotenv
+import pymysql
+from pymysql.cursors import SSCursor
+from store_to_db import DB_CONFIG
+from tracing import traced, set_attributes
+
+try:
+    import pyarrow as pa  # 선택 사항: Parquet 내보내기에만 필요
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# 환경 변수 로드
+load_dotenv()
+
+# 키셋 페이지 하나에 읽을 행 수 / 서버 측 커서에서 한 번에 가져올 행 수
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 50000))
+EXPORT_FETCH_SIZE = int(os.getenv("EXPORT_FETCH_SIZE", 2000))
+EXPORT_OUTPUT_DIR = os.getenv("EXPORT_OUTPUT_DIR", "exports")
+# 테이블별 마지막으로 내보낸 위치 (워터마크 시각, 키)를 기록하는 상태 파일
+EXPORT_STATE_PATH = os.getenv("EXPORT_STATE_PATH", "export_state.json")
+EXPORT_GZIP_LEVEL = int(os.getenv("EXPORT_GZIP_LEVEL", 6))
+EXPORT_PARQUET_ROW_GROUP = int(os.getenv("EXPORT_PARQUET_ROW_GROUP", 50000))
+
+# 내보내기 대상: 키셋 페이지는 key, 증분 내보내기는 (watermark, key) 순서로 읽는다
+# 열 종류: int / float / str / json (DB에 JSON 문자열로 저장된 열) / datetime
+EXPORTS = {
+    "resumes": {
+        "source": "Resume r",
+        "key": "r.resume_id",
+        "watermark": "r.uploaded_at",
+        "columns": [
+            ("resume_id", "r.resume_id", "int"),
+            ("user_id", "r.user_id", "int"),
+            ("file_path", "r.file_path", "str"),
+            ("blob_url", "r.blob_url", "str"),
+            ("parsed_json", "r.parsed_json", "json"),
+            ("uploaded_at", "r.uploaded_at", "datetime"),
+        ],
+    },
+    # ResumeEvalResult에는 시각 열이 없으므로 Resume.uploaded_at을 워터마크로 사용
+    "evaluations": {
+        "source": "ResumeEvalResult e JOIN Resume r ON r.resume_id = e.resume_id",
+        "key": "e.resume_id",
+        "watermark": "r.uploaded_at",
+        "columns": [
+            ("resume_id", "e.resume_id", "int"),
+            ("user_id", "r.user_id", "int"),
+            ("evaluation_summary", "e.evaluation_summary", "str"),
+            ("strengths", "e.strengths", "str"),
+            ("weaknesses", "e.weaknesses", "str"),
+            ("improvement", "e.improvement", "str"),
+            ("skills_inferred", "e.skills_inferred", "json"),
+            ("job_category_inferred", "e.job_category_inferred", "str"),
+            ("search_query", "e.search_query", "str"),
+            ("uploaded_at", "r.uploaded_at", "datetime"),
+        ],
+    },
+    "recommendations": {
+        "source": "JobRecommendation",
+        "key": "recommendation_id",
+        "watermark": "recommended_at",
+        "columns": [
+            ("recommendation_id", "recommendation_id", "int"),
+            ("user_id", "user_id", "int"),
+            ("resume_id", "resume_id", "int"),
+            ("job_id", "job_id", "int"),
+            ("score", "score", "float"),
+            ("rank", "`rank`", "int"),
+            ("recommended_reason", "recommended_reason", "str"),
+            ("recommended_at", "recommended_at", "datetime"),
+        ],
+    },
+}
+
+def _connect():
+    # 내보내기는 긴 스트리밍 조회이므로 커넥션 풀과 별도의 전용 연결을 사용
+    return pymysql.connect(**DB_CONFIG)
+
+
+def _positions(spec):
+    """조회 결과 행에서 key / watermark 열의 위치"""
+    exprs = [expr for _, expr, _ in spec["columns"]]
+    return exprs.index(spec["key"]), exprs.index(spec["watermark"])
+
+
+def iter_rows(connection, spec, since=None, chunk_size=None, fetch_size=None):
+    """
+    키셋 페이지 단위로 조회하고 각 페이지는 SSCursor로 fetch_size씩 흘려 보낸다
+    - since가 없으면 key 순서 전체, 있으면 (watermark, key) > since 인 행만 그 순서대로
+    OFFSET을 쓰지 않으므로 뒤쪽 페이지도 인덱스 탐색 한 번으로 시작하고,
+    한 문장이 오래 열려 있지 않아 긴 트랜잭션/잠금을 만들지 않는다
+    """
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    fetch_size = fetch_size or EXPORT_FETCH_SIZE
+    select = ", ".join(expr for _, expr, _ in spec["columns"])
+    key, watermark = spec["key"], spec["watermark"]
+    key_index, watermark_index = _positions(spec)
+
+    if since is None:
+        query = f"SELECT {select} FROM {spec['source']} WHERE {key} > %s ORDER BY {key} LIMIT %s"
+        position = 0
+    else:
+        query = (f"SELECT {select} FROM {spec['source']} "
+                 f"WHERE ({watermark} > %s OR ({watermark} = %s AND {key} > %s)) "
+                 f"ORDER BY {watermark}, {key} LIMIT %s")
+        position = since
+
+    while True:
+        params = (position, chunk_size) if since is None else (position[0], position[0], position[1], chunk_size)
+        count = 0
+        last = None
+        with connection.cursor(SSCursor) as cursor:
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(fetch_size)
+                if not rows:
+                    break
+                count += len(rows)
+                last = rows[-1]
+                yield rows
+        if count < chunk_size:
+            return
+        position = last[key_index] if since is None else (last[watermark_index], last[key_index])
+
+
+def _json_text(value):
+    """
+    JSON 열 값을 출력에 넣을 JSON 텍스트로 변환
+    객체/배열(store_to_db가 json.dumps로 저장한 형태)은 디코딩 없이 원문을 그대로 쓰고,
+    그 밖의 값은 JSON으로 읽히는지 확인해 아니면(예전 형식의 "node.js, react" 같은 일반 문자열) 문자열로 감싼다
+    """
+    if value.lstrip()[:1] in ("{", "["):
+        return value
+    try:
+        json.loads(value)
+        return value
+    except ValueError:
+        return json.dumps(value, ensure_ascii=False)
+
+
+class JsonLinesWriter:
+    """gzip 압축 JSON Lines 출력 (JSON 열은 디코딩/재인코딩 없이 원문을 그대로 삽입)"""
+
+    extension = ".jsonl.gz"
+
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = [(json.dumps(name) + ": ", kind) for name, _, kind in columns]
+        self._file = gzip.open(path, "wt", encoding="utf-8", compresslevel=EXPORT_GZIP_LEVEL)
+
+    def _line(self, row):
+        parts = []
+        for (prefix, kind), value in zip(self.columns, row):
+            if value is None:
+                text = "null"
+            elif kind == "json":
+                if isinstance(value, bytes):
+                    value = value.decode("utf-8")
+                text = _json_text(value)
+            elif kind == "datetime":
+                text = json.dumps(value.isoformat() if hasattr(value, "isoformat") else str(value))
+            elif kind == "float":
+                text = json.dumps(float(value))
+            else:
+                text = json.dumps(value, ensure_ascii=False, default=str)
+            parts.append(prefix + text)
+        return "{" + ", ".join(parts) + "}\n"
+
+    def write_rows(self, rows):
+        self._file.write("".join(self._line(row) for row in rows))
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter:
+    """Parquet 출력 (pyarrow 필요, EXPORT_PARQUET_ROW_GROUP행마다 row group 하나, JSON 열은 문자열로 유지)"""
+
+    extension = ".parquet"
+
+    def __init__(self, path, columns):
+        if pa is None:
+            raise RuntimeError("Parquet 내보내기에는 pyarrow 패키지가 필요합니다 (pip install pyarrow)")
+        types = {
+            "int": pa.int64(),
+            "float": pa.float64(),
+            "str": pa.string(),
+            "json": pa.string(),
+            "datetime": pa.timestamp("us"),
+        }
+        self.path = path
+        self.kinds = [kind for _, _, kind in columns]
+        self.schema = pa.schema([(name, types[kind]) for name, _, kind in columns])
+        self._writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+        self._pending = []
+
+    def write_rows(self, rows):
+        # fetch 단위는 row group으로 쓰기에 작으므로 EXPORT_PARQUET_ROW_GROUP행까지만 모았다가 기록
+        self._pending.extend(rows)
+        if len(self._pending) >= EXPORT_PARQUET_ROW_GROUP:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        arrays = []
+        for kind, field, values in zip(self.kinds, self.schema, zip(*self._pending)):
+            if kind == "float":
+                values = [None if v is None else float(v) for v in values]
+            elif kind in ("str", "json"):
+                values = [v.decode("utf-8") if isinstance(v, bytes) else v for v in values]
+            arrays.append(pa.array(values, type=field.type))
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+        self._pending = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+WRITERS = {"jsonl": JsonLinesWriter, "parquet": ParquetWriter}
+
+
+def load_state(path=None):
+    path = path or EXPORT_STATE_PATH
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(state, path=None):
+    """중간에 중단되어도 상태 파일이 깨지지 않도록 임시 파일에 쓴 뒤 교체"""
+    path = path or EXPORT_STATE_PATH
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+@traced()
+def export_table(connection, name, output_dir=None, fmt="jsonl", since=None, chunk_size=None):
+    """
+    테이블 하나를 스트리밍으로 파일에 내보내고 (행 수, 파일 경로, 마지막 워터마크 위치) 반환
+    메모리에는 fetch 단위 행만 올라가므로 전체 행 수와 관계없이 사용량이 일정하다
+    """
+    spec = EXPORTS[name]
+    writer_class = WRITERS[fmt]
+    output_dir = output_dir or EXPORT_OUTPUT_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}{writer_class.extension}")
+    tmp_path = f"{path}.tmp"
+    key_index, watermark_index = _positions(spec)
+
+    writer = writer_class(tmp_path, spec["columns"])
+    report_every = chunk_size or EXPORT_CHUNK_SIZE
+    total = 0
+    latest = since
+    try:
+        for rows in iter_rows(connection, spec, since, chunk_size):
+            writer.write_rows(rows)
+            if since is not None:
+                latest = (rows[-1][watermark_index], rows[-1][key_index])
+            else:
+                # 전체 내보내기는 key 순서이므로 가장 늦은 (워터마크, key)를 따로 추적
+                positions = [(row[watermark_index], row[key_index]) for row in rows if row[watermark_index] is not None]
+                if positions:
+                    latest = max(positions) if latest is None else max(latest, max(positions))
+            if (total + len(rows)) // report_every > total // report_every:
+                print(f"  {name}: {total + len(rows)}건")
+            total += len(rows)
+    except BaseException:
+        writer.close()
+        os.remove(tmp_path)
+        raise
+    writer.close()
+
+    if total == 0:
+        os.remove(tmp_path)
+        print(f"  {name}: 새로 내보낼 행이 없습니다")
+        return 0, None, latest
+    os.replace(tmp_path, path)
+    set_attributes(rows=total)
+    print(f"  {name}: {total}건 → {path}")
+    return total, path, latest
+
+
+def export_tables(names=None, output_dir=None, fmt="jsonl", incremental=False, since=None,
+                  state_path=None, chunk_size=None):
+    """
+    여러 테이블을 내보내고 테이블별 워터마크를 상태 파일에 기록
+    incremental=True면 상태 파일의 위치 이후 행만, since가 주어지면 그 시각 이후 행만 내보낸다
+    증분 내보내기는 새로 생기거나 워터마크 열이 갱신된 행만 포함하고 삭제는 반영하지 못한다
+    (refresh_recommendations.py가 추천을 삭제한 뒤에는 recommendations를 전체로 다시 내보내야 함)
+    """
+    names = names or list(EXPORTS)
+    state = load_state(state_path)
+    results = {}
+    connection = _connect()
+    try:
+        for name in names:
+            start = None
+            if since is not None:
+                start = (since, 0)
+            elif incremental and name in state:
+                start = (datetime.fromisoformat(state[name]["watermark"]), state[name]["key"])
+
+            total, path, latest = export_table(connection, name, output_dir, fmt, start, chunk_size)
+            results[name] = {"rows": total, "path": path}
+            if latest is not None and latest != start:
+                state[name] = {
+                    "watermark": latest[0].isoformat() if hasattr(latest[0], "isoformat") else str(latest[0]),
+                    "key": latest[1],
+                    "exported_at": datetime.now().isoformat(),
+                    "path": path,
+                }
+                # 테이블 하나가 끝날 때마다 기록해 다음 테이블에서 실패해도 이미 내보낸 위치는 유지
+                save_state(state, state_path)
+    finally:
+        connection.close()
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Resume / ResumeEvalResult / JobRecommendation을 일정한 메모리로 파일에 내보내기")
+    # nargs="*"와 choices를 함께 쓰면 대상을 생략했을 때 빈 리스트가 choices 검사에 걸리므로 직접 확인
+    parser.add_argument("tables", nargs="*", help=f"내보낼 대상 {list(EXPORTS)} (기본값: 전체)")
+    parser.add_argument("--format", choices=list(WRITERS), default="jsonl", help="jsonl (gzip) 또는 parquet (pyarrow 필요)")
+    parser.add_argument("--output-dir", type=str, default=None, help=f"출력 디렉터리 (기본값: {EXPORT_OUTPUT_DIR})")
+    parser.add_argument("--incremental", action="store_true", help="상태 파일에 기록된 위치 이후 행만 내보내기")
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None,
+                        help="uploaded_at/recommended_at이 이 시각 이후인 행만 내보내기 (예: 2024-01-01T00:00:00)")
+    parser.add_argument("--state", type=str, default=None, help=f"상태 파일 경로 (기본값: {EXPORT_STATE_PATH})")
+    parser.add_argument("--chunk-size", type=int, default=None, help=f"키셋 페이지 크기 (기본값: {EXPORT_CHUNK_SIZE})")
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.tables if name not in EXPORTS]
+    if unknown:
+        parser.error(f"알 수 없는 대상: {unknown} (선택 가능: {list(EXPORTS)})")
+    args.tables = args.tables or list(EXPORTS)
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    export_tables(args.tables, args.output_dir, args.format, args.incremental, args.since, args.state, args.chunk_size)
@@ -0,0 +1,291 @@
+import os
+import json
+import time
+import random
+import logging
+import threading
+import contextlib
+import contextvars
+from concurrent.futures import Future
+from datetime import datetime
+from dotenv import load_dotenv
+from cache_store import make_key
+from text_compaction import count_tokens
+from tracing import set_attributes, record_llm_usage
+
+# 환경 변수 로드
+load_dotenv()
+
+# 배포의 분당 요청 수 / 분당 토큰 수 한도 (0이면 제한하지 않음)
+LLM_RPM_LIMIT = int(os.getenv("LLM_RPM_LIMIT", 0))
+LLM_TPM_LIMIT = int(os.getenv("LLM_TPM_LIMIT", 0))
+
+# 버킷에 모아 둘 수 있는 양(초 단위 분량). Azure OpenAI는 한도를 분 단위가 아니라 짧은 구간(1~10초)으로 평가하므로
+# 1분치를 한 번에 몰아 보내지 않도록 버스트를 짧게 잡는다
+LLM_BURST_SECONDS = float(os.getenv("LLM_BURST_SECONDS", 5))
+
+# 배치 요청이 쓸 수 없는 버킷 비율 (단건 이력서 요청을 위해 남겨 둠)
+LLM_INTERACTIVE_RESERVE = float(os.getenv("LLM_INTERACTIVE_RESERVE", 0.2))
+
+# max_tokens를 지정하지 않은 요청의 응답 토큰 추정치
+LLM_DEFAULT_COMPLETION_TOKENS = int(os.getenv("LLM_DEFAULT_COMPLETION_TOKENS", 1000))
+
+# 429 / 일시 오류 재시도 횟수와 지수 백오프 기준·상한(초)
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 4))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", 1))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", 30))
+
+# 요청 우선순위: interactive(단건 파이프라인) 요청이 batch(일괄 처리) 요청보다 먼저 버킷을 사용
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+_priority = contextvars.ContextVar("llm_priority", default=INTERACTIVE)
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """프로세스에서 공유하는 AzureOpenAI 클라이언트 (재시도는 게이트웨이가 담당하므로 SDK 재시도는 끔)"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import AzureOpenAI  # import 비용이 커서 첫 호출 때 로드
+                _client = AzureOpenAI(
+                    api_key=os.getenv("OPENAI_API_KEY"),
+                    api_version="2024-02-15-preview",
+                    azure_endpoint=os.getenv("OPENAI_ENDPOINT"),
+                    max_retries=0
+                )
+    return _client
+
+
+@contextlib.contextmanager
+def priority(level):
+    """with priority(BATCH): 블록 안(및 복사된 컨텍스트의 스레드)의 LLM 요청 우선순위 지정"""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    """분당 limit 속도로 채워지고 burst_seconds 분량까지 모아 둘 수 있는 버킷 (limit이 0이면 항상 통과)"""
+
+    def __init__(self, limit, burst_seconds=None):
+        burst_seconds = LLM_BURST_SECONDS if burst_seconds is None else burst_seconds
+        self.capacity = max(1.0, limit * burst_seconds / 60.0) if limit else 0.0
+        self.level = self.capacity
+        self._rate = limit / 60.0
+        self._updated = time.monotonic()
+
+    def refill(self, now):
+        if self.capacity:
+            self.level = min(self.capacity, self.level + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def shortfall(self, amount, reserve=0.0):
+        """amount를 꺼내고도 reserve 비율이 남으려면 몇 초 기다려야 하는지 (0이면 바로 가능)"""
+        if not self.capacity:
+            return 0.0
+        # 요청 하나가 버킷 대부분을 차지하면 reserve까지 더한 양이 capacity를 넘어 영원히 채워지지 않으므로
+        # 필요한 양은 capacity를 넘지 않게 자른다 (이 경우 버킷이 가득 찼을 때 바로 통과)
+        needed = min(min(amount, self.capacity) + reserve * self.capacity, self.capacity) - self.level
+        return max(0.0, needed / self._rate)
+
+    def take(self, amount):
+        if self.capacity:
+            self.level -= min(amount, self.capacity)
+
+    def give_back(self, amount):
+        if self.capacity:
+            self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """
+    요청 수(RPM)와 추정 토큰 수(TPM) 두 버킷을 함께 확인하는 스케줄러
+    - interactive 요청이 기다리는 동안 batch 요청은 버킷을 쓰지 않는다
+    - batch 요청은 버킷을 LLM_INTERACTIVE_RESERVE 비율 아래로 비우지 않는다
+    - 429를 받으면 Retry-After 동안 모든 요청을 멈춘다
+    """
+
+    def __init__(self, rpm=None, tpm=None, interactive_reserve=None):
+        self.requests = TokenBucket(LLM_RPM_LIMIT if rpm is None else rpm)
+        self.tokens = TokenBucket(LLM_TPM_LIMIT if tpm is None else tpm)
+        self.interactive_reserve = LLM_INTERACTIVE_RESERVE if interactive_reserve is None else interactive_reserve
+        self._paused_until = 0.0
+        self._waiting = {INTERACTIVE: 0, BATCH: 0}
+        self._cond = threading.Condition()
+
+    def acquire(self, tokens, level=INTERACTIVE, deadline=None):
+        """
+        버킷에서 요청 1건과 tokens를 꺼낼 수 있을 때까지 대기하고 대기 시간(초)을 반환
+        deadline(time.monotonic() 기준)까지 꺼낼 수 없으면 TimeoutError 발생
+        """
+        started = time.monotonic()
+        reserve = self.interactive_reserve if level == BATCH else 0.0
+        with self._cond:
+            self._waiting[level] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self.requests.refill(now)
+                    self.tokens.refill(now)
+                    if level == BATCH and self._waiting[INTERACTIVE]:
+                        wait = 0.05
+                    else:
+                        wait = max(self._paused_until - now,
+                                   self.requests.shortfall(1, reserve),
+                                   self.tokens.shortfall(tokens, reserve))
+                    if wait <= 0:
+                        self.requests.take(1)
+                        self.tokens.take(tokens)
+                        return time.monotonic() - started
+                    if deadline is not None and now + wait > deadline:
+                        raise TimeoutError("GPT 요청 한도 대기 중 마감 시각을 넘었습니다")
+                    self._cond.wait(timeout=min(wait, 1.0))
+            finally:
+                self._waiting[level] -= 1
+                self._cond.notify_all()
+
+    def settle(self, estimated, actual):
+        """응답의 실제 토큰 사용량이 추정치보다 적으면 차이를 버킷에 돌려준다"""
+        if actual is not None and actual < estimated:
+            with self._cond:
+                self.tokens.give_back(estimated - actual)
+                self._cond.notify_all()
+
+    def pause(self, seconds):
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class LLMGateway:
+    """
+    모든 GPT 호출이 거치는 게이트웨이
+    - RateLimiter로 RPM/TPM 한도 안에서 요청을 내보내고 interactive 요청을 우선 처리
+    - 429(Retry-After 반영)와 일시 오류는 jitter가 있는 지수 백오프로 재시도
+    - 같은 요청(모델/메시지/파라미터)이 이미 진행 중이면 새로 호출하지 않고 그 결과를 함께 받는다
+    """
+
+    def __init__(self, limiter=None, max_retries=None):
+        self.limiter = limiter or RateLimiter()
+        self.max_retries = LLM_MAX_RETRIES if max_retries is None else max_retries
+        self._inflight = {}  # 요청 키 -> Future
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "coalesced": 0, "rate_limited": 0, "retries": 0, "queue_seconds": 0.0}
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    @staticmethod
+    def estimate_tokens(messages, max_tokens=None):
+        prompt = sum(count_tokens(message.get("content") or "") + 4 for message in messages)
+        return prompt + (max_tokens or LLM_DEFAULT_COMPLETION_TOKENS)
+
+    def chat_completion(self, messages, model=None, deadline=None, **kwargs):
+        """
+        chat.completions.create와 같은 인자를 받아 응답 객체를 반환
+        우선순위는 priority() 컨텍스트로 지정 (기본값 interactive)
+        deadline(time.monotonic() 기준)을 주면 한도 대기, 재시도, 백오프를 모두 포함한 전체 시간이 그 안에 끝나며
+        각 시도의 요청 timeout도 남은 시간으로 줄인다 (넘으면 TimeoutError 또는 마지막 API 오류 발생)
+        """
+        model = model or os.getenv("OPENAI_DEPLOYMENT")
+        key = make_key(model, json.dumps(messages, ensure_ascii=False, sort_keys=True),
+                       json.dumps(kwargs, sort_keys=True, default=str))
+
+        with self._lock:
+            leader = self._inflight.get(key)
+            if leader is None:
+                future = self._inflight[key] = Future()
+        if leader is not None:
+            self._count("coalesced")
+            set_attributes(coalesced=True)
+            return leader.result(timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+        try:
+            response = self._call(messages, model, kwargs, deadline)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(response)
+            return response
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _call(self, messages, model, kwargs, deadline=None):
+        from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+
+        estimated = self.estimate_tokens(messages, kwargs.get("max_tokens"))
+        level = _priority.get()
+        attempt = 0
+        while True:
+            waited = self.limiter.acquire(estimated, level, deadline)
+            self._count("requests")
+            self._count("queue_seconds", waited)
+            request_kwargs = kwargs
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("GPT 호출 마감 시각을 넘었습니다")
+                request_kwargs = dict(kwargs, timeout=min(kwargs.get("timeout") or remaining, remaining))
+            try:
+                response = get_client().chat.completions.create(model=model, messages=messages, **request_kwargs)
+            except RateLimitError as e:
+                self._count("rate_limited")
+                delay = self._retry_after(e) or self._backoff(attempt)
+                # 한도를 넘었으므로 다른 요청도 함께 멈춘다
+                self.limiter.pause(delay)
+                error = e
+            except (APITimeoutError, APIConnectionError, InternalServerError) as e:
+                delay = self._backoff(attempt)
+                error = e
+            else:
+                usage = getattr(response, "usage", None)
+                self.limiter.settle(estimated, getattr(usage, "total_tokens", None))
+                set_attributes(llm_priority=level, llm_queue_ms=round(waited * 1000, 3), llm_attempts=attempt + 1)
+                record_llm_usage(response)
+                return response
+
+            # 재시도 횟수가 남아 있어도 백오프 후 마감 시각을 넘기면 더 기다리지 않는다
+            if attempt >= self.max_retries or (deadline is not None and time.monotonic() + delay >= deadline):
+                raise error
+            logging.warning(f"[{datetime.now()}] GPT 호출 재시도 {attempt + 1}/{self.max_retries} "
+                            f"({delay:.1f}초 후): {type(error).__name__}\n")
+            self._count("retries")
+            time.sleep(delay)
+            attempt += 1
+
+    @staticmethod
+    def _retry_after(error):
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+            value = headers.get(header)
+            if value:
+                try:
+                    return min(float(value) * scale, LLM_BACKOFF_MAX)
+                except ValueError:
+                    continue
+        return None
+
+    @staticmethod
+    def _backoff(attempt):
+        return random.uniform(0.5, 1.0) * min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt)
+
+
+gateway = LLMGateway()
+
+
+def chat_completion(messages, model=None, deadline=None, **kwargs):
+    """공유 게이트웨이로 GPT 호출"""
+    return gateway.chat_completion(messages, model=model, deadline=deadline, **kwargs)
@@ -0,0 +1,159 @@
+import os
+import threading
+import numpy as np
+from openai import AzureOpenAI
+from dotenv import load_dotenv
+from cache_store import MISS, LRUCache
+
+try:
+    import faiss  # 선택 사항: 설치되어 있고 .faiss 파일이 있으면 사용
+except ImportError:
+    faiss = None
+
+# 환경 변수 로드
+load_dotenv()
+
+# 로컬 인덱스 경로 (확장자 제외, {경로}.npy / {경로}.ids.npy / {경로}.faiss)
+FAISS_INDEX_PATH = os.getenv("FAISS_INDEX_PATH", "job_index")
+
+# 임베딩 설정 (인덱스 빌드와 검색어 임베딩에 같은 배포를 사용해야 함)
+EMBED_OPENAI_DEPLOYMENT = os.getenv("EMBED_OPENAI_DEPLOYMENT", "text-embedding-3-large")
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", 4096))
+
+_embed_client = None
+_query_embeddings = LRUCache(max_entries=QUERY_EMBEDDING_CACHE_SIZE)
+
+
+def get_embed_client():
+    global _embed_client
+    if _embed_client is None:
+        _embed_client = AzureOpenAI(
+            api_key=os.getenv("EMBED_OPENAI_API_KEY"),
+            azure_endpoint=os.getenv("EMBED_OPENAI_ENDPOINT"),
+            api_version=os.getenv("EMBED_OPENAI_API_VERSION", "2023-05-15")
+        )
+    return _embed_client
+
+
+def embed_texts(texts):
+    """
+    텍스트 리스트를 L2 정규화된 float32 임베딩 행렬로 변환
+    """
+    response = get_embed_client().embeddings.create(model=EMBED_OPENAI_DEPLOYMENT, input=list(texts))
+    vectors = np.asarray([item.embedding for item in response.data], dtype=np.float32)
+    return normalize(vectors)
+
+
+def embed_query(query: str):
+    """검색어 임베딩 (같은 검색어는 프로세스 내 캐시 재사용)"""
+    return embed_queries([query])[0]
+
+
+def embed_queries(queries):
+    """
+    여러 검색어를 (검색어 수, 차원) 행렬로 임베딩 (캐시에 없는 검색어만 한 번의 API 호출로 계산)
+    """
+    vectors = [_query_embeddings.get(query) for query in queries]
+    missing = list(dict.fromkeys(q for q, v in zip(queries, vectors) if v is MISS))
+    if missing:
+        computed = dict(zip(missing, embed_texts(missing)))
+        for query, vector in computed.items():
+            _query_embeddings.set(query, vector)
+        vectors = [computed[q] if v is MISS else v for q, v in zip(queries, vectors)]
+    return np.vstack(vectors)
+
+
+def normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class LocalJobIndex:
+    """
+    채용공고 임베딩 인덱스 (코사인 유사도 = 정규화 벡터 내적)
+    - {경로}.faiss 파일과 faiss 패키지가 있으면 FAISS 인덱스를 mmap으로 로드
+    - 없으면 {경로}.npy 행렬을 np.load(mmap_mode="r")로 열어 NumPy로 검색
+    """
+
+    def __init__(self, path=None):
+        path = path or FAISS_INDEX_PATH
+        self.path = path
+        self.job_ids = np.load(f"{path}.ids.npy")
+        self.faiss_index = None
+        self.matrix = None
+        self._id_order = None
+        if faiss is not None and os.path.exists(f"{path}.faiss"):
+            self.faiss_index = faiss.read_index(f"{path}.faiss", faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        else:
+            self.matrix = np.load(f"{path}.npy", mmap_mode="r")
+        if len(self) != len(self.job_ids):
+            raise ValueError(f"인덱스 벡터 수와 job_id 수가 다릅니다: {path}")
+
+    def __len__(self):
+        return self.faiss_index.ntotal if self.faiss_index is not None else self.matrix.shape[0]
+
+    def search_vectors(self, query_vectors, top_k=3):
+        """
+        (검색어 수, 차원) 행렬을 받아 검색어별 [{"job_id", "similarity_score"}] 리스트 반환
+        """
+        query_vectors = np.ascontiguousarray(np.atleast_2d(query_vectors), dtype=np.float32)
+        top_k = min(top_k, len(self))
+        if top_k <= 0:
+            return [[] for _ in range(len(query_vectors))]
+
+        if self.faiss_index is not None:
+            scores, positions = self.faiss_index.search(query_vectors, top_k)
+        else:
+            all_scores = query_vectors @ self.matrix.T
+            # 전체 정렬 대신 argpartition으로 top_k 후보만 고른 뒤 정렬
+            positions = np.argpartition(-all_scores, top_k - 1, axis=1)[:, :top_k]
+            scores = np.take_along_axis(all_scores, positions, axis=1)
+            order = np.argsort(-scores, axis=1)
+            positions = np.take_along_axis(positions, order, axis=1)
+            scores = np.take_along_axis(scores, order, axis=1)
+
+        return [
+            [
+                {"job_id": int(self.job_ids[pos]), "similarity_score": float(score)}
+                for pos, score in zip(row_positions, row_scores)
+                if pos >= 0
+            ]
+            for row_positions, row_scores in zip(positions, scores)
+        ]
+
+    def vectors_for(self, job_ids):
+        """
+        job_id 리스트에 해당하는 저장된 임베딩을 {job_id: 벡터}로 반환 (인덱스에 없는 job_id는 빠짐)
+        """
+        if self._id_order is None:
+            self._id_order = np.argsort(self.job_ids, kind="stable")
+        sorted_ids = self.job_ids[self._id_order]
+        wanted = np.asarray(list(job_ids), dtype=np.int64)
+        found = np.searchsorted(sorted_ids, wanted)
+        vectors = {}
+        for job_id, i in zip(wanted, found):
+            if i < len(sorted_ids) and sorted_ids[i] == job_id:
+                pos = int(self._id_order[i])
+                if self.faiss_index is not None:
+                    vectors[int(job_id)] = self.faiss_index.reconstruct(pos)
+                else:
+                    vectors[int(job_id)] = np.asarray(self.matrix[pos], dtype=np.float32)
+        return vectors
+
+    def search(self, query: str, top_k=3):
+        return self.search_vectors(embed_query(query), top_k)[0]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_local_index():
+    """프로세스당 한 번만 인덱스를 로드"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = LocalJobIndex()
+    return _index
@@ -0,0 +1,418 @@
+"""
+외부 서비스(Azure OpenAI, FAISS 검색, Azure Blob, MySQL)를 대신하는 로컬 스텁
+벤치마크와 로컬 재현용이며, 지연 시간을 설정할 수 있다.
+"""
+import io
+import json
+import time
+import random
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SAMPLE_SKILLS = ["Python", "Django", "FastAPI", "MySQL", "Redis", "Docker", "Kubernetes", "AWS",
+                 "Java", "Spring", "React", "TypeScript", "Pandas", "PyTorch", "SQL", "Airflow"]
+SAMPLE_CATEGORIES = ["백엔드 개발자", "프론트엔드 개발자", "데이터 엔지니어", "머신러닝 엔지니어", "DevOps 엔지니어"]
+
+
+# -----------------------------
+# HTTP 스텁 서버 공통
+# -----------------------------
+class _StubServer:
+    def __init__(self, handler_class, latency=0.0, jitter=0.0):
+        handler = type(handler_class.__name__, (handler_class,), {"stub": self})
+        self.latency = latency
+        self.jitter = jitter
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def delay(self):
+        with self._lock:
+            self.requests += 1
+        wait = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if wait > 0:
+            time.sleep(wait)
+
+
+class _JsonHandler(BaseHTTPRequestHandler):
+    stub = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+# -----------------------------
+# OpenAI 호환 스텁 (Azure 경로: /openai/deployments/{배포}/chat/completions, /embeddings)
+# -----------------------------
+class _OpenAIHandler(_JsonHandler):
+    def do_POST(self):
+        request = self._read_json()
+        retry_after = self.stub.over_quota()
+        if retry_after:
+            # Azure OpenAI처럼 분당 요청 한도를 넘으면 Retry-After와 함께 429 응답
+            body = json.dumps({"error": {"code": "429", "message": "Rate limit is exceeded."}}).encode("utf-8")
+            self.send_response(429)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Retry-After", str(max(1, int(retry_after + 0.999))))
+            self.send_header("retry-after-ms", str(int(retry_after * 1000)))
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self.stub.delay()
+        if self.path.split("?")[0].endswith("/embeddings"):
+            inputs = request.get("input") or []
+            inputs = [inputs] if isinstance(inputs, str) else inputs
+            data = [{"object": "embedding", "index": i, "embedding": _fake_embedding(text)} for i, text in enumerate(inputs)]
+            self._send_json({"object": "list", "data": data, "model": request.get("model"),
+                             "usage": {"prompt_tokens": 8 * len(inputs), "total_tokens": 8 * len(inputs)}})
+            return
+
+        if request.get("response_format") and not self.stub.json_mode:
+            # JSON 모드를 지원하지 않는 배포/api_version처럼 400 응답
+            self._send_json({"error": {"code": "BadRequest", "message": "response_format is not supported."}}, status=400)
+            return
+
+        prompt = request.get("messages", [{}])[-1].get("content", "")
+        content = _fake_completion(prompt, json_mode=(request.get("response_format") or {}).get("type") == "json_object")
+        prompt_tokens = len(prompt) // 2
+        completion_tokens = len(content) // 2
+        self._send_json({
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model") or "stub",
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        })
+
+
+def _fake_embedding(text, dim=64):
+    rng = random.Random(text)
+    return [rng.uniform(-1, 1) for _ in range(dim)]
+
+
+def _fake_completion(prompt, json_mode=False):
+    rng = random.Random(prompt)
+    skills = rng.sample(SAMPLE_SKILLS, 4)
+    category = rng.choice(SAMPLE_CATEGORIES)
+    if json_mode:
+        return json.dumps({
+            "strengths": "프로젝트 경험이 구체적입니다.",
+            "weaknesses": "정량적 성과 기술이 부족합니다.",
+            "improvements": "성과를 수치로 표현하세요.",
+            "category": category,
+            "skills": skills,
+            "search_query": ", ".join([category] + skills),
+        }, ensure_ascii=False)
+    if "검색어" in prompt and "이력서 평가 요약" in prompt:
+        return ", ".join([category] + skills)
+    if "채용공고 추천 시스템" in prompt:
+        return "1. 유사도 분석: 주요 기술이 일치합니다.\n2. 기술 매칭: 요구 기술 대부분을 보유했습니다.\n3. 결론: 적절한 추천입니다."
+    return (
+        "1. 강점: 프로젝트 경험이 구체적입니다.\n"
+        "2. 약점: 정량적 성과 기술이 부족합니다.\n"
+        "3. 개선점: 성과를 수치로 표현하세요.\n"
+        f"4. 예상 직무 카테고리: {category}\n"
+        f"5. 기술 스택 목록: {', '.join(skills)}\n"
+    )
+
+
+class _OpenAIStubServer(_StubServer):
+    def __init__(self, latency=0.0, jitter=0.0, rpm_limit=0, json_mode=True):
+        super().__init__(_OpenAIHandler, latency, jitter)
+        self.rpm_limit = rpm_limit
+        self.json_mode = json_mode
+        self.rate_limited = 0
+        self._accepted = []  # 최근 QUOTA_WINDOW초 동안 받은 요청 시각
+
+    # Azure OpenAI처럼 분당 한도를 10초 구간(한도의 1/6)으로 나눠 평가
+    QUOTA_WINDOW = 10.0
+
+    def over_quota(self):
+        """요청 한도를 넘었으면 다음 요청이 가능해질 때까지의 초, 아니면 0"""
+        if not self.rpm_limit:
+            return 0.0
+        now = time.monotonic()
+        window_limit = max(1, int(self.rpm_limit * self.QUOTA_WINDOW / 60))
+        with self._lock:
+            self._accepted = [t for t in self._accepted if now - t < self.QUOTA_WINDOW]
+            if len(self._accepted) >= window_limit:
+                self.rate_limited += 1
+                return self.QUOTA_WINDOW - (now - self._accepted[0])
+            self._accepted.append(now)
+            return 0.0
+
+
+def start_openai_stub(latency=0.0, jitter=0.0, rpm_limit=0, json_mode=True):
+    """rpm_limit을 주면 분당 요청 수를 넘는 요청에 429를, json_mode=False면 response_format 요청에 400을 반환"""
+    return _OpenAIStubServer(latency, jitter, rpm_limit, json_mode).start()
+
+
+# -----------------------------
+# FAISS 검색 스텁 (/search, /search/batch)
+# -----------------------------
+class _SearchHandler(_JsonHandler):
+    def do_POST(self):
+        request = self._read_json()
+        self.stub.delay()
+        top_k = int(request.get("top_k", 3))
+        if self.path.rstrip("/").endswith("/batch"):
+            self._send_json({"results": [self._search(q, top_k) for q in request.get("queries", [])]})
+        else:
+            self._send_json({"results": self._search(request.get("query", ""), top_k)})
+
+    def _search(self, query, top_k):
+        rng = random.Random(query)
+        job_ids = rng.sample(range(1, self.stub.job_count + 1), min(top_k, self.stub.job_count))
+        scores = sorted((rng.uniform(0.5, 0.95) for _ in job_ids), reverse=True)
+        return [{"job_id": job_id, "similarity_score": score} for job_id, score in zip(job_ids, scores)]
+
+
+def start_search_stub(job_count, latency=0.0, jitter=0.0):
+    server = _StubServer(_SearchHandler, latency, jitter)
+    server.job_count = job_count
+    return server.start()
+
+
+# -----------------------------
+# 메모리 Blob 저장소 (upload_to_blob의 BlobServiceClient 대체)
+# -----------------------------
+class InMemoryBlobService:
+    account_name = "stub"
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.blobs = {}  # (container, name) -> (bytes, metadata)
+        self.uploads = 0
+        self._lock = threading.Lock()
+
+    def get_blob_client(self, container, blob):
+        return _InMemoryBlobClient(self, container, blob)
+
+
+class _InMemoryBlobClient:
+    def __init__(self, service, container, name):
+        self._service = service
+        self._key = (container, name)
+        self.url = f"https://{service.account_name}.blob.core.windows.net/{container}/{name}"
+
+    def get_blob_properties(self):
+        from azure.core.exceptions import ResourceNotFoundError
+        with self._service._lock:
+            entry = self._service.blobs.get(self._key)
+        if entry is None:
+            raise ResourceNotFoundError("blob not found")
+        return type("BlobProperties", (), {"metadata": dict(entry[1]), "size": len(entry[0])})()
+
+    def exists(self):
+        with self._service._lock:
+            return self._key in self._service.blobs
+
+    def upload_blob(self, data, overwrite=False, metadata=None, **kwargs):
+        from azure.core.exceptions import ResourceExistsError
+        payload = data.read() if hasattr(data, "read") else bytes(data)
+        if self._service.latency:
+            time.sleep(self._service.latency)
+        with self._service._lock:
+            # overwrite=False는 Azure처럼 조건부 업로드로 처리 (이미 있으면 409)
+            if not overwrite and self._key in self._service.blobs:
+                raise ResourceExistsError("blob already exists")
+            self._service.blobs[self._key] = (payload, metadata or {})
+            self._service.uploads += 1
+
+
+# -----------------------------
+# SQLite 기반 MySQL 대체 (db_pool.set_connection_factory로 연결)
+# -----------------------------
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS JobPosting (
+    job_id INTEGER PRIMARY KEY,
+    position_title TEXT,
+    description TEXT,
+    posted_at TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS Resume (
+    resume_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    file_path TEXT,
+    blob_url TEXT,
+    parsed_json TEXT,
+    uploaded_at TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS ResumeEvalResult (
+    eval_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    resume_id INTEGER,
+    evaluation_summary TEXT,
+    strengths TEXT,
+    weaknesses TEXT,
+    improvement TEXT,
+    skills_inferred TEXT,
+    job_category_inferred TEXT,
+    search_query TEXT
+);
+CREATE TABLE IF NOT EXISTS JobRecommendation (
+    recommendation_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    resume_id INTEGER,
+    job_id INTEGER,
+    score REAL,
+    `rank` INTEGER,
+    recommended_reason TEXT,
+    recommended_at TIMESTAMP
+);
+"""
+
+
+class _SQLiteCursor:
+    """pymysql 커서처럼 %s 자리표시자와 with 문을 지원하는 sqlite3 커서 래퍼"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+        return False
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def execute(self, query, params=None):
+        self._cursor.execute(query.replace("%s", "?"), tuple(params or ()))
+        return self._cursor.rowcount
+
+    def executemany(self, query, rows):
+        self._cursor.executemany(query.replace("%s", "?"), [tuple(row) for row in rows])
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=1):
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+
+class SQLiteConnection:
+    def __init__(self, path, latency=0.0):
+        self.latency = latency
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False,
+                                     detect_types=sqlite3.PARSE_DECLTYPES)
+        self.open = True
+
+    def cursor(self, cursor_class=None):
+        if self.latency:
+            time.sleep(self.latency)
+        return _SQLiteCursor(self._conn.cursor())
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self, reconnect=False):
+        self._conn.execute("SELECT 1")
+
+    def close(self):
+        self.open = False
+        self._conn.close()
+
+
+def create_sqlite_database(path, job_count=500, seed=0):
+    """스키마 생성 후 가짜 채용공고 job_count건 삽입"""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.executescript(SQLITE_SCHEMA)
+    now = datetime.now()
+    rows = []
+    for job_id in range(1, job_count + 1):
+        category = rng.choice(SAMPLE_CATEGORIES)
+        skills = rng.sample(SAMPLE_SKILLS, 5)
+        description = f"{category} 채용. 필수 기술: {', '.join(skills)}. " + "주요 업무 설명 " * rng.randint(20, 120)
+        rows.append((job_id, f"{category} ({skills[0]})", description, now - timedelta(days=rng.randint(0, 60))))
+    conn.executemany("INSERT OR REPLACE INTO JobPosting VALUES (?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def sqlite_connection_factory(path, latency=0.0):
+    """db_pool.set_connection_factory에 넘길 연결 함수 (DB 설정은 무시하고 같은 SQLite 파일 사용)"""
+    def connect(**config):
+        return SQLiteConnection(path, latency)
+    return connect
+
+
+# -----------------------------
+# 합성 이력서 PDF
+# -----------------------------
+def generate_resume_pdfs(output_dir, count, template_path=None, pages=2, seed=0):
+    """
+    template_path(예: resume.pdf)의 페이지에 지원자별 내용을 덧붙여 서로 다른 PDF를 생성
+    템플릿이 없으면 텍스트만으로 구성한 PDF를 만든다
+    """
+    import os
+    import fitz
+
+    rng = random.Random(seed)
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for i in range(count):
+        doc = fitz.open(template_path) if template_path else fitz.open()
+        for page_number in range(pages):
+            # 지원자별 페이지를 앞에 넣어 토큰 예산으로 본문을 자를 때도 이력서마다 내용이 달라지게 한다
+            page = doc.new_page(page_number)
+            skills = rng.sample(SAMPLE_SKILLS, 6)
+            lines = [f"Candidate {i + 1} - page {page_number + 1}", f"Skills: {', '.join(skills)}"]
+            lines += [f"Project {n}: built services with {rng.choice(skills)} and {rng.choice(skills)}"
+                      for n in range(rng.randint(10, 25))]
+            page.insert_text((50, 60), "\n".join(lines), fontsize=10)
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        doc.close()
+        path = os.path.join(output_dir, f"{i + 1}_resume.pdf")
+        with open(path, "wb") as f:
+            f.write(buffer.getvalue())
+        paths.append(path)
+    return paths
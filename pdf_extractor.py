@@ -0,0 +1,149 @@
+import os
+import io
+import time
+import multiprocessing
+from collections import deque
+from multiprocessing.connection import wait
+from dotenv import load_dotenv
+
+# 환경 변수 로드
+load_dotenv()
+
+# 추출 예산: 이 페이지 수 / 글자 수를 넘으면 나머지는 읽지 않는다
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", 30))
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", 60000))
+
+# 프로세스 격리 추출 설정
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", os.cpu_count() or 2))
+PDF_EXTRACT_TIMEOUT = float(os.getenv("PDF_EXTRACT_TIMEOUT", 30))
+PDF_EXTRACT_START_METHOD = os.getenv("PDF_EXTRACT_START_METHOD", "")
+
+# 페이지 구분 문자 (pdftotext와 같이 form feed 사용, 후처리에서 페이지 경계를 알 수 있도록)
+PAGE_SEPARATOR = "\n\f"
+
+
+class PdfExtractionError(Exception):
+    """PDF 텍스트 추출 실패 (손상된 파일, 시간 초과 등)"""
+
+
+def open_pdf(source):
+    """
+    경로 또는 메모리 상의 PDF를 연다 (임시 파일 없이)
+    - 경로: MuPDF가 파일에서 필요한 페이지만 읽는다
+    - bytes / bytearray / memoryview / mmap / BytesIO: 메모리 스트림으로 연다
+    """
+    import fitz  # PyMuPDF (import 비용이 커서 처음 PDF를 열 때 로드)
+
+    if isinstance(source, (str, os.PathLike)):
+        return fitz.open(source)
+    if isinstance(source, io.BytesIO):
+        source = source.getvalue()
+    elif not isinstance(source, bytes):
+        # PyMuPDF 스트림은 bytes만 받으므로 버퍼 객체(mmap 등)는 bytes로 변환
+        source = bytes(source)
+    return fitz.open(stream=source, filetype="pdf")
+
+
+def iter_pdf_pages(source, max_pages=None, max_chars=None):
+    """
+    PDF 페이지 텍스트를 한 페이지씩 생성
+    max_pages / max_chars 예산에 도달하면 남은 페이지는 열지 않고 중단한다
+    """
+    max_pages = PDF_MAX_PAGES if max_pages is None else max_pages
+    max_chars = PDF_MAX_CHARS if max_chars is None else max_chars
+
+    doc = open_pdf(source)
+    try:
+        remaining = max_chars
+        for page_number in range(min(doc.page_count, max_pages)):
+            text = doc.load_page(page_number).get_text()
+            if len(text) >= remaining:
+                yield text[:remaining]
+                return
+            remaining -= len(text)
+            yield text
+    finally:
+        doc.close()
+
+
+def extract_text(source, max_pages=None, max_chars=None) -> str:
+    """예산 안에서 PDF 텍스트 전체를 하나의 문자열로 반환 (페이지 사이는 PAGE_SEPARATOR)"""
+    return PAGE_SEPARATOR.join(iter_pdf_pages(source, max_pages, max_chars))
+
+
+def _mp_context():
+    method = PDF_EXTRACT_START_METHOD
+    if not method:
+        # 스레드가 많은 프로세스에서 fork는 위험하므로 forkserver(가능하면)를 기본으로 사용
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    ctx = multiprocessing.get_context(method)
+    if method == "forkserver":
+        ctx.set_forkserver_preload([__name__, "fitz"])
+    return ctx
+
+
+def _extract_worker(source, max_pages, max_chars, conn):
+    try:
+        conn.send((extract_text(source, max_pages, max_chars), None))
+    except Exception as e:
+        conn.send((None, f"{type(e).__name__}: {str(e)}"))
+    finally:
+        conn.close()
+
+
+def extract_texts_parallel(sources, max_workers=None, timeout=None, max_pages=None, max_chars=None):
+    """
+    여러 PDF를 문서별 자식 프로세스에서 병렬 추출 (동시 실행 수는 max_workers로 제한)
+    timeout초 안에 끝나지 않는 문서는 프로세스를 종료하고 실패로 기록하므로
+    손상된 PDF 하나가 전체 처리를 막지 않는다.
+    반환값: 입력 순서대로 {"text": str 또는 None, "error": str 또는 None} 리스트
+    """
+    max_workers = max(1, max_workers or PDF_EXTRACT_WORKERS)
+    timeout = timeout or PDF_EXTRACT_TIMEOUT
+    ctx = _mp_context()
+
+    results = [None] * len(sources)
+    pending = deque(enumerate(sources))
+    running = {}  # 수신 파이프 -> (입력 순번, 프로세스, 마감 시각)
+
+    while pending or running:
+        while pending and len(running) < max_workers:
+            index, source = pending.popleft()
+            recv_conn, send_conn = ctx.Pipe(duplex=False)
+            proc = ctx.Process(target=_extract_worker, args=(source, max_pages, max_chars, send_conn), daemon=True)
+            proc.start()
+            send_conn.close()
+            running[recv_conn] = (index, proc, time.monotonic() + timeout)
+
+        next_deadline = min(deadline for _, _, deadline in running.values())
+        for conn in wait(list(running), timeout=max(0.0, next_deadline - time.monotonic())):
+            index, proc, _ = running.pop(conn)
+            try:
+                text, error = conn.recv()
+            except EOFError:
+                text, error = None, "추출 프로세스가 결과 없이 종료되었습니다"
+            conn.close()
+            proc.join()
+            results[index] = {"text": text, "error": error}
+
+        now = time.monotonic()
+        for conn, (index, proc, deadline) in list(running.items()):
+            if deadline <= now:
+                proc.kill()
+                proc.join()
+                conn.close()
+                del running[conn]
+                results[index] = {"text": None, "error": f"{timeout:.0f}초 내에 추출이 끝나지 않았습니다"}
+
+    return results
+
+
+def extract_text_isolated(source, timeout=None, max_pages=None, max_chars=None) -> str:
+    """
+    PDF 한 건을 자식 프로세스에서 추출 (시간 초과/오류 시 PdfExtractionError)
+    """
+    result = extract_texts_parallel([source], max_workers=1, timeout=timeout,
+                                    max_pages=max_pages, max_chars=max_chars)[0]
+    if result["error"]:
+        raise PdfExtractionError(result["error"])
+    return result["text"]
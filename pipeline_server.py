@@ -0,0 +1,375 @@
+"""
+run_pipeline을 상주 프로세스에서 실행하는 HTTP 서버
+GPT/Blob 클라이언트, DB 커넥션 풀, 캐시를 한 번만 만들어 두고 요청마다 재사용한다.
+
+    POST /jobs                 {"user_id": 1, "pdf_path": "resume.pdf"} (SERVICE_INPUT_DIR 기준) 또는
+                               Content-Type: application/pdf 본문 + ?user_id=1  → 202 {"job_id", "status"}
+                               (대기열이 가득 차면 503 + Retry-After)
+    GET  /jobs/<job_id>        → 작업 상태 (queued / running / succeeded / failed)
+    GET  /jobs/<job_id>/result → 완료 시 200 {"resume_id"}, 진행 중이면 202, 실패 시 500
+    GET  /health               → 대기열, 기동 시간, 커넥션 풀/GPT 게이트웨이/캐시 지표
+"""
+import time
+
+# 기동 시간 측정 기준 (다른 모듈 import보다 먼저 기록)
+_STARTED = time.perf_counter()
+
+import os
+import json
+import queue
+import uuid
+import logging
+import argparse
+import importlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from dotenv import load_dotenv
+
+# 환경 변수 로드
+load_dotenv()
+
+SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", 8000))
+
+# 동시에 실행할 파이프라인 수 / 대기열 길이 (가득 차면 새 요청을 503으로 거절)
+SERVICE_WORKERS = int(os.getenv("SERVICE_WORKERS", 2))
+SERVICE_QUEUE_SIZE = int(os.getenv("SERVICE_QUEUE_SIZE", 32))
+
+# 끝난 작업 결과를 보관하는 시간(초)
+SERVICE_RESULT_TTL = int(os.getenv("SERVICE_RESULT_TTL", 3600))
+
+# PDF 본문으로 제출된 이력서를 저장할 디렉터리 / 최대 크기
+SERVICE_UPLOAD_DIR = os.getenv("SERVICE_UPLOAD_DIR", "uploads")
+SERVICE_MAX_UPLOAD_BYTES = int(os.getenv("SERVICE_MAX_UPLOAD_BYTES", 20 * 1024 * 1024))
+# JSON의 pdf_path로 제출할 수 있는 파일의 최상위 디렉터리 (비어 있으면 경로 제출을 받지 않고 PDF 업로드만 허용)
+SERVICE_INPUT_DIR = os.getenv("SERVICE_INPUT_DIR", "")
+
+
+def _resolve_input_path(pdf_path):
+    """
+    JSON으로 제출된 pdf_path를 SERVICE_INPUT_DIR 아래의 실제 PDF 파일 경로로 확인
+    업로드 단계가 추출과 동시에 실행되므로 PDF가 아닌 파일이 Blob으로 올라가지 않도록 미리 막는다
+    """
+    if not SERVICE_INPUT_DIR:
+        raise ValueError("pdf_path 제출이 비활성화되어 있습니다 (PDF 본문을 application/pdf로 업로드하세요)")
+    if not pdf_path or not isinstance(pdf_path, str):
+        raise ValueError("pdf_path(문자열)가 필요합니다")
+    root = os.path.realpath(SERVICE_INPUT_DIR)
+    path = os.path.realpath(os.path.join(root, pdf_path))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"pdf_path는 {SERVICE_INPUT_DIR} 아래 파일이어야 합니다")
+    if not os.path.isfile(path):
+        raise ValueError(f"pdf_path 파일이 없습니다: {pdf_path}")
+    with open(path, "rb") as f:
+        if f.read(4) != b"%PDF":
+            raise ValueError("PDF 파일이 아닙니다")
+    return path
+
+
+class QueueFullError(Exception):
+    """대기열이 가득 차 작업을 받을 수 없음"""
+
+
+class PipelineService:
+    """
+    제한된 대기열과 워커 스레드로 run_pipeline 작업을 실행
+    작업 상태는 메모리에 보관하며 끝난 지 SERVICE_RESULT_TTL초가 지난 작업은 정리한다
+    """
+
+    def __init__(self, workers=None, queue_size=None, result_ttl=None):
+        self.workers = workers or SERVICE_WORKERS
+        self.result_ttl = SERVICE_RESULT_TTL if result_ttl is None else result_ttl
+        self._queue = queue.Queue(maxsize=queue_size or SERVICE_QUEUE_SIZE)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._stopping = threading.Event()
+        self.startup = {}
+
+    def warm_up(self):
+        """
+        파이프라인 모듈을 불러오고 클라이언트/커넥션 풀을 미리 만든다
+        (실패한 항목은 경고만 남기고 첫 요청 때 다시 시도)
+        """
+        started = time.perf_counter()
+        import resume_pipeline  # 파이프라인이 쓰는 모듈 전체를 미리 import
+        import db_pool
+        import llm_gateway
+        import store_to_db
+        import recommend_jobs_from_faiss
+        import upload_to_blob
+        from search_client import get_search_client
+        self.startup["import_seconds"] = round(time.perf_counter() - started, 3)
+
+        steps = [
+            ("pdf_library", lambda: importlib.import_module("fitz")),
+            ("llm_client", llm_gateway.get_client),
+            ("blob_client", upload_to_blob.get_blob_service_client),
+            ("search_client", get_search_client),
+            ("user_db_pool", lambda: db_pool.get_pool(store_to_db.DB_CONFIG).warm()),
+            ("job_db_pool", lambda: db_pool.get_pool(recommend_jobs_from_faiss.DB_CONFIG).warm()),
+        ]
+        warm = {}
+        for name, step in steps:
+            step_started = time.perf_counter()
+            try:
+                step()
+                warm[name] = round(time.perf_counter() - step_started, 3)
+            except Exception as e:
+                logging.warning(f"[{datetime.now()}] 서버 준비 단계 실패 ({name}): {str(e)}")
+                warm[name] = f"실패: {type(e).__name__}"
+        self.startup["warm_up"] = warm
+        self.startup["warm_up_seconds"] = round(time.perf_counter() - started, 3)
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"pipeline-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """대기 중인 작업까지 처리한 뒤 워커를 종료 (대기열이 가득 차 있어도 막히지 않음)"""
+        self._stopping.set()
+        for _ in self._threads:
+            try:
+                # 빈 대기열에서 기다리는 워커를 바로 깨운다 (가득 찼으면 워커가 대기열을 비운 뒤 _stopping을 보고 종료)
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+        for thread in self._threads:
+            thread.join()
+
+    def submit(self, user_id, pdf_path, analysis_mode=None, cot_concurrency=None, delete_after=False):
+        """delete_after=True면 작업이 끝난 뒤 pdf_path를 지운다 (업로드로 받은 임시 파일)"""
+        self._purge()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "user_id": user_id,
+            "pdf_path": pdf_path,
+            "analysis_mode": analysis_mode,
+            "cot_concurrency": cot_concurrency,
+            "delete_after": delete_after,
+            "status": "queued",
+            "submitted_at": datetime.now().isoformat(),
+        }
+        with self._lock:
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise QueueFullError(f"대기열이 가득 찼습니다 ({self._queue.maxsize}건)")
+            self._jobs[job["job_id"]] = job
+        return dict(job)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {"queue_depth": self._queue.qsize(), "queue_size": self._queue.maxsize,
+                "workers": self.workers, "jobs": counts}
+
+    def _purge(self):
+        cutoff = time.time() - self.result_ttl
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items() if job.get("finished_ts", cutoff + 1) < cutoff]:
+                del self._jobs[job_id]
+
+    def _update(self, job, **fields):
+        with self._lock:
+            job.update(fields)
+
+    def _work(self):
+        from resume_pipeline import run_pipeline
+
+        while True:
+            try:
+                job = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                if self._stopping.is_set():
+                    break
+                continue
+            if job is None:
+                break
+            started = time.perf_counter()
+            self._update(job, status="running", started_at=datetime.now().isoformat())
+            try:
+                resume_id = run_pipeline(job["user_id"], job["pdf_path"], cot_concurrency=job["cot_concurrency"],
+                                         analysis_mode=job["analysis_mode"])
+                self._update(job, status="succeeded", result={"resume_id": resume_id})
+            except Exception as e:
+                logging.warning(f"[{datetime.now()}] 파이프라인 실패 job {job['job_id']}: {str(e)}")
+                self._update(job, status="failed", error=f"{type(e).__name__}: {e}")
+            finally:
+                self._update(job, finished_at=datetime.now().isoformat(), finished_ts=time.time(),
+                             duration_seconds=round(time.perf_counter() - started, 3))
+                if job["delete_after"]:
+                    try:
+                        os.remove(job["pdf_path"])
+                    except OSError:
+                        pass
+
+
+class PipelineRequestHandler(BaseHTTPRequestHandler):
+    service = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logging.info(f"{self.address_string()} {format % args}")
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        parts = [part for part in urlparse(self.path).path.split("/") if part]
+        if parts == ["health"]:
+            self._send_json(200, self._health())
+        elif len(parts) in (2, 3) and parts[0] == "jobs":
+            job = self.service.get(parts[1])
+            if job is None:
+                self._send_json(404, {"error": "작업을 찾을 수 없습니다"})
+            elif len(parts) == 2:
+                job.pop("finished_ts", None)
+                self._send_json(200, job)
+            elif parts[2] == "result":
+                if job["status"] == "succeeded":
+                    self._send_json(200, job["result"])
+                elif job["status"] == "failed":
+                    self._send_json(500, {"error": job["error"]})
+                else:
+                    self._send_json(202, {"status": job["status"]}, {"Retry-After": "5"})
+            else:
+                self._send_json(404, {"error": "알 수 없는 경로입니다"})
+        else:
+            self._send_json(404, {"error": "알 수 없는 경로입니다"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path.rstrip("/") != "/jobs":
+            self._send_json(404, {"error": "알 수 없는 경로입니다"})
+            return
+        try:
+            request = self._read_submission(parse_qs(url.query))
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        try:
+            job = self.service.submit(**request)
+        except QueueFullError as e:
+            if request["delete_after"]:
+                os.remove(request["pdf_path"])
+            # 백프레셔: 클라이언트가 잠시 뒤 다시 보내도록 안내
+            self._send_json(503, {"error": str(e)}, {"Retry-After": "10"})
+            return
+        self._send_json(202, {"job_id": job["job_id"], "status": job["status"]},
+                        {"Location": f"/jobs/{job['job_id']}"})
+
+    def _read_submission(self, query):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            self.close_connection = True
+            raise ValueError("Content-Length가 올바르지 않습니다")
+        if length < 0 or length > SERVICE_MAX_UPLOAD_BYTES:
+            # 본문을 읽지 않고 거절하므로 남은 바이트가 다음 요청으로 해석되지 않도록 연결을 닫는다
+            self.close_connection = True
+            raise ValueError(f"요청 본문이 너무 큽니다 (최대 {SERVICE_MAX_UPLOAD_BYTES}바이트)")
+        body = self.rfile.read(length)
+
+        if self.headers.get("Content-Type", "").startswith("application/pdf"):
+            # PDF 본문 업로드: 서버 디렉터리에 저장한 뒤 경로로 파이프라인 실행
+            if not body.startswith(b"%PDF"):
+                raise ValueError("PDF 파일이 아닙니다")
+            params = {key: values[0] for key, values in query.items()}
+            os.makedirs(SERVICE_UPLOAD_DIR, exist_ok=True)
+            filename = os.path.basename(params.get("filename") or "resume.pdf")
+            pdf_path = os.path.join(SERVICE_UPLOAD_DIR, f"{uuid.uuid4().hex[:8]}_{filename}")
+            with open(pdf_path, "wb") as f:
+                f.write(body)
+            delete_after = True
+        else:
+            try:
+                params = json.loads(body or b"{}")
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                raise ValueError("JSON 본문을 읽을 수 없습니다")
+            if not isinstance(params, dict):
+                raise ValueError("JSON 본문은 객체여야 합니다 (예: {\"user_id\": 1, \"pdf_path\": \"resume.pdf\"})")
+            pdf_path = _resolve_input_path(params.get("pdf_path"))
+            delete_after = False
+
+        try:
+            user_id = int(params["user_id"])
+            cot_concurrency = int(params["cot_concurrency"]) if params.get("cot_concurrency") else None
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("user_id(정수)가 필요합니다")
+        analysis_mode = params.get("analysis_mode")
+        if analysis_mode not in (None, "legacy", "structured"):
+            raise ValueError("analysis_mode는 legacy 또는 structured입니다")
+        return {"user_id": user_id, "pdf_path": pdf_path, "analysis_mode": analysis_mode,
+                "cot_concurrency": cot_concurrency, "delete_after": delete_after}
+
+    def _health(self):
+        import db_pool
+        import llm_gateway
+        from recommend_jobs_from_faiss import job_cache_stats
+
+        return {
+            "status": "ok",
+            "uptime_seconds": round(time.perf_counter() - _STARTED, 3),
+            "startup": self.service.startup,
+            "service": self.service.stats(),
+            "db_pools": db_pool.pool_metrics(),
+            "llm_gateway": llm_gateway.gateway.stats(),
+            "job_cache": job_cache_stats(),
+        }
+
+
+def serve(host=None, port=None, workers=None, queue_size=None):
+    service = PipelineService(workers=workers, queue_size=queue_size)
+    service.warm_up()
+    service.start()
+
+    handler = type("Handler", (PipelineRequestHandler,), {"service": service})
+    server = ThreadingHTTPServer((host or SERVICE_HOST, port or SERVICE_PORT), handler)
+    server.daemon_threads = True
+    service.startup["ready_seconds"] = round(time.perf_counter() - _STARTED, 3)
+    print(f"이력서 분석 서버 시작: http://{server.server_address[0]}:{server.server_address[1]} "
+          f"(준비 {service.startup['ready_seconds']}초, import {service.startup['import_seconds']}초)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="이력서 분석 파이프라인 HTTP 서버")
+    parser.add_argument("--host", type=str, default=None, help=f"바인드 주소 (기본값: {SERVICE_HOST})")
+    parser.add_argument("--port", type=int, default=None, help=f"포트 (기본값: {SERVICE_PORT})")
+    parser.add_argument("--workers", type=int, default=None, help=f"동시 실행 파이프라인 수 (기본값: {SERVICE_WORKERS})")
+    parser.add_argument("--queue-size", type=int, default=None, help=f"대기열 길이 (기본값: {SERVICE_QUEUE_SIZE})")
+    parser.add_argument("--trace", type=str, default=None, metavar="PATH",
+                        help="단계별 소요 시간을 JSON Lines 파일로 기록")
+    args = parser.parse_args()
+
+    if args.trace:
+        from tracing import enable as enable_tracing
+        enable_tracing(args.trace)
+    serve(args.host, args.port, args.workers, args.queue_size)
@@ -1,16 +1,25 @@
 import os
 import re
+import json
 import requests
-import pymysql
 import logging
 from dotenv import load_dotenv
 from datetime import datetime
+from db_pool import get_pool
+from search_client import get_search_client
+from cache_store import MISS, LRUCache, SQLiteCache, TieredCache
+from tracing import traced, set_attributes
 
 # 환경 변수 로드
 load_dotenv()
 
 # FAISS 검색 API URL
 FAISS_SEARCH_URL = os.getenv("FAISS_SEARCH_URL", "http://localhost:5000/search")
+# 여러 검색어를 한 번에 보내는 배치 검색 API URL ({"queries": [...], "top_k"} → {"results": [[...], ...]})
+FAISS_BATCH_SEARCH_URL = os.getenv("FAISS_BATCH_SEARCH_URL", FAISS_SEARCH_URL.rstrip("/") + "/batch")
+
+# 검색 백엔드 선택: "http" (별도 FAISS 검색 서비스) / "local" (프로세스 내 mmap 인덱스, FAISS_INDEX_PATH)
+FAISS_BACKEND = os.getenv("FAISS_BACKEND", "http").lower()
 
 # DB 설정
 DB_CONFIG = {
@@ -22,48 +31,205 @@ DB_CONFIG = {
     "charset": "utf8mb4"
 }
 
+# 채용공고 상세 캐시 설정
+JOB_CACHE_ENABLED = os.getenv("JOB_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+JOB_CACHE_MAX_BYTES = int(os.getenv("JOB_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+JOB_CACHE_TTL = int(os.getenv("JOB_CACHE_TTL", 3600))
+JOB_CACHE_SHARED_PATH = os.getenv("JOB_CACHE_SHARED_PATH", "")  # 지정 시 같은 호스트 프로세스 간 공유하는 SQLite 캐시 사용
+JOB_CACHE_SHARED_MAX_ENTRIES = int(os.getenv("JOB_CACHE_SHARED_MAX_ENTRIES", 100000))  # SQLite 캐시 최대 항목 수 (오래 안 쓴 항목부터 삭제)
+JOB_CACHE_VALIDATE = os.getenv("JOB_CACHE_VALIDATE", "false").lower() in ("1", "true", "yes")  # posted_at 비교로 캐시 재검증
+
+
+def _job_size(job):
+    return len(json.dumps(job, ensure_ascii=False).encode("utf-8"))
+
+
+job_cache = TieredCache(
+    memory=LRUCache(max_entries=None, max_bytes=JOB_CACHE_MAX_BYTES, ttl=JOB_CACHE_TTL),
+    disk=SQLiteCache(JOB_CACHE_SHARED_PATH, ttl=JOB_CACHE_TTL, max_entries=JOB_CACHE_SHARED_MAX_ENTRIES,
+                     table="job_details") if JOB_CACHE_SHARED_PATH else None,
+    sizeof=_job_size
+)
+
 # 로그 파일 설정
 logging.basicConfig(filename='faiss_failed_queries.log', level=logging.WARNING, encoding='utf-8')
 
 
 
-def search_faiss_job_ids(query: str, top_k: int = 3):
+@traced()
+def search_faiss_job_ids(query: str, top_k: int = 3, raise_errors: bool = False):
     """
     FAISS 검색 API를 호출하여 유사도 기반 job_id 리스트를 반환
+    검색 실패 시 빈 리스트를 반환하며, raise_errors=True면 예외를 그대로 발생시킨다 (결과 없음과 구분이 필요할 때)
     """
+    if FAISS_BACKEND == "local":
+        return _search_local(query, top_k, raise_errors)
+
     payload = {"query": query, "top_k": top_k}
     try:
-        response = requests.post(FAISS_SEARCH_URL, json=payload)
+        response = get_search_client().post(FAISS_SEARCH_URL, payload)
         response.raise_for_status()
         data = response.json()
-        
-        # API 응답 구조 확인을 위한 디버그
-        print(f"DEBUG: API 응답 데이터: {data}")
-        
-        results = data.get("results", [])
-        
-        # 만약 results가 단순 int 리스트라면
-        if results and isinstance(results[0], int):
-            return [{"job_id": job_id, "similarity_score": 0.0} for job_id in results]
-        
-        # 이미 dict 형태라면 그대로 반환
-        return results
-        
-    except requests.exceptions.RequestException as e:
+
+        # API 응답 구조 확인을 위한 디버그 (로그 레벨이 DEBUG일 때만 기록)
+        logging.debug("검색 API 응답 데이터: %s", data)
+
+        return _normalize_results(data.get("results", []))
+
+    except (requests.exceptions.RequestException, ValueError) as e:
         logging.warning(f"[{datetime.now()}] 검색 실패 query: {query}\n오류: {str(e)}\n")
+        if raise_errors:
+            raise
+        return []
+
+
+# 검색 서비스에 배치 API가 없으면(404/405) 이후로는 바로 단건 검색으로 처리
+_batch_endpoint_supported = True
+
+
+@traced()
+def search_faiss_job_ids_batch(queries, top_k: int = 3, raise_errors: bool = False):
+    """
+    여러 검색어를 한 번의 요청으로 검색하여 검색어 순서대로 결과 리스트를 반환
+    (각 원소는 search_faiss_job_ids와 같은 [{"job_id", "similarity_score"}] 형태)
+    """
+    global _batch_endpoint_supported
+    queries = list(queries)
+    if not queries:
         return []
 
+    if FAISS_BACKEND == "local":
+        return _search_local_batch(queries, top_k, raise_errors)
+
+    if not _batch_endpoint_supported:
+        return [search_faiss_job_ids(query, top_k, raise_errors) for query in queries]
+
+    payload = {"queries": queries, "top_k": top_k}
+    try:
+        response = get_search_client().post(FAISS_BATCH_SEARCH_URL, payload)
+        if response.status_code in (404, 405):
+            logging.warning(f"[{datetime.now()}] 배치 검색 API 없음 ({FAISS_BATCH_SEARCH_URL}), 단건 검색으로 전환\n")
+            _batch_endpoint_supported = False
+            return [search_faiss_job_ids(query, top_k, raise_errors) for query in queries]
+        response.raise_for_status()
+        batch_results = response.json().get("results", [])
+        if len(batch_results) != len(queries):
+            raise ValueError(f"배치 검색 결과 수({len(batch_results)})가 검색어 수({len(queries)})와 다릅니다")
+        return [_normalize_results(results) for results in batch_results]
+
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logging.warning(f"[{datetime.now()}] 배치 검색 실패 queries: {queries}\n오류: {str(e)}\n")
+        if raise_errors:
+            raise
+        return [[] for _ in queries]
+
+
+def _normalize_results(results):
+    # 만약 results가 단순 int 리스트라면
+    if results and isinstance(results[0], int):
+        return [{"job_id": job_id, "similarity_score": 0.0} for job_id in results]
+
+    # 이미 dict 형태라면 그대로 반환
+    return results
 
-def get_job_details_from_ids(job_ids):
+
+def _search_local(query: str, top_k: int, raise_errors: bool = False):
     """
-    job_id 리스트를 기반으로 MySQL에서 상세 채용공고 정보 조회
+    로컬 인덱스로 검색 (build_job_index.py로 생성한 파일 사용)
+    """
+    # numpy/faiss는 로컬 백엔드를 쓸 때만 로드
+    from local_faiss_index import get_local_index
+    try:
+        return get_local_index().search(query, top_k)
+    except Exception as e:
+        logging.warning(f"[{datetime.now()}] 로컬 검색 실패 query: {query}\n오류: {str(e)}\n")
+        if raise_errors:
+            raise
+        return []
+
+
+def _search_local_batch(queries, top_k: int, raise_errors: bool = False):
+    from local_faiss_index import get_local_index, embed_queries
+    try:
+        return get_local_index().search_vectors(embed_queries(queries), top_k)
+    except Exception as e:
+        logging.warning(f"[{datetime.now()}] 로컬 배치 검색 실패 queries: {queries}\n오류: {str(e)}\n")
+        if raise_errors:
+            raise
+        return [[] for _ in queries]
+
+
+@traced()
+def get_job_details_from_ids(job_ids, use_cache=True, raise_errors=False):
+    """
+    job_id 리스트를 기반으로 상세 채용공고 정보 조회 (job_ids 순서 유지)
+    캐시에 있는 공고는 재사용하고, 없는 job_id만 MySQL에서 조회한다
+    raise_errors=True면 DB 오류를 빈 결과로 바꾸지 않고 그대로 발생시킨다 (결과에 없는 공고 = 실제로 없는 공고)
     """
     if not job_ids:
         return []
 
+    job_ids = list(dict.fromkeys(job_ids))
+    found = {}
+    if use_cache and JOB_CACHE_ENABLED:
+        for job_id in job_ids:
+            cached = job_cache.get(f"job:{job_id}")
+            if cached is not MISS:
+                found[job_id] = cached
+        if found and JOB_CACHE_VALIDATE:
+            for job_id in _find_stale_job_ids(found):
+                job_cache.delete(f"job:{job_id}")
+                del found[job_id]
+
+    missing = [job_id for job_id in job_ids if job_id not in found]
+    set_attributes(requested=len(job_ids), cache_hits=len(found), db_fetched=len(missing))
+    if missing:
+        for job in _fetch_job_details(missing, raise_errors):
+            found[job["job_id"]] = job
+            if use_cache and JOB_CACHE_ENABLED:
+                job_cache.set(f"job:{job['job_id']}", job)
+
+    # 호출자가 결과를 수정해도 캐시가 바뀌지 않도록 복사본 반환
+    return [dict(found[job_id]) for job_id in job_ids if job_id in found]
+
+
+def invalidate_job_details(job_ids):
+    """공고가 수정/삭제되었을 때 캐시에서 제거"""
+    for job_id in job_ids:
+        job_cache.delete(f"job:{job_id}")
+
+
+def job_cache_stats():
+    return job_cache.stats()
+
+
+def _find_stale_job_ids(cached_jobs):
+    """
+    캐시된 공고의 posted_at을 DB 값과 비교해 바뀐(또는 삭제된) job_id 목록 반환
+    description 없이 posted_at만 조회하므로 전체 조회보다 가볍다
+    """
+    job_ids = list(cached_jobs)
+    try:
+        with get_pool(DB_CONFIG).connection() as connection, connection.cursor() as cursor:
+            placeholders = ','.join(['%s'] * len(job_ids))
+            cursor.execute(f"SELECT job_id, posted_at FROM JobPosting WHERE job_id IN ({placeholders})", job_ids)
+            current = {row[0]: row[1].isoformat() if row[1] else None for row in cursor.fetchall()}
+    except Exception as e:
+        logging.warning(f"[{datetime.now()}] 캐시 재검증 실패 job_ids: {job_ids}\n오류: {str(e)}\n")
+        return []
+    return [
+        job_id for job_id, job in cached_jobs.items()
+        if job_id not in current or current[job_id] != job.get("posted_at")
+    ]
+
+
+@traced("mysql.select_job_postings")
+def _fetch_job_details(job_ids, raise_errors=False):
+    """
+    MySQL JobPosting 테이블에서 상세 채용공고 정보 조회
+    """
     try:
-        connection = pymysql.connect(**DB_CONFIG)
-        with connection.cursor() as cursor:
+        with get_pool(DB_CONFIG).connection() as connection, connection.cursor() as cursor:
             placeholders = ','.join(['%s'] * len(job_ids))
             query = f"""
                 SELECT job_id, position_title, description, posted_at
@@ -85,7 +251,6 @@ def get_job_details_from_ids(job_ids):
             ]
     except Exception as e:
         logging.warning(f"[{datetime.now()}] DB 조회 실패 job_ids: {job_ids}\n오류: {str(e)}\n")
+        if raise_errors:
+            raise
         return []
-    finally:
-        if 'connection' in locals() and connection:
-            connection.close()
\ No newline at end of file
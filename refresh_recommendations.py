@@ -0,0 +1,445 @@
+import os
+import json
+import base64
+import argparse
+import numpy as np
+from datetime import datetime
+from dotenv import load_dotenv
+from db_pool import get_pool
+from cache_store import MISS, SQLiteCache, make_key
+from local_faiss_index import FAISS_INDEX_PATH, EMBED_OPENAI_DEPLOYMENT, embed_texts, get_local_index
+from build_job_index import EMBED_BATCH_SIZE, _posting_text
+from recommend_jobs_from_faiss import DB_CONFIG as JOB_DB_CONFIG, get_job_details_from_ids
+from store_to_db import DB_CONFIG as USER_DB_CONFIG, RECOMMENDATION_INSERT_QUERY
+from resume_pipeline import generate_cot_analyses
+from reranker import RECOMMEND_TOP_K, rerank_jobs
+from tracing import traced, set_attributes
+from llm_gateway import BATCH, priority as llm_priority
+
+# 환경 변수 로드
+load_dotenv()
+
+# 마지막으로 반영한 공고 위치 (posted_at, job_id)를 기록하는 상태 파일
+REFRESH_STATE_PATH = os.getenv("REFRESH_STATE_PATH", "refresh_state.json")
+# 한 번에 읽어 점수를 매길 신규 공고 수 (초과분은 다음 반복에서 처리) / 한 번에 읽을 이력서 수
+REFRESH_MAX_POSTINGS = int(os.getenv("REFRESH_MAX_POSTINGS", 5000))
+REFRESH_USER_CHUNK = int(os.getenv("REFRESH_USER_CHUNK", 500))
+# 이력서별로 재순위화에 넣을 신규 공고 후보 수 (유사도 상위)
+REFRESH_CANDIDATES = int(os.getenv("REFRESH_CANDIDATES", 20))
+# 저장된 search_query / 기존 추천 공고 임베딩을 실행 간 재사용하는 캐시
+REFRESH_QUERY_CACHE_PATH = os.getenv("REFRESH_QUERY_CACHE_PATH", "query_embeddings.sqlite3")
+REFRESH_QUERY_CACHE_TTL = int(os.getenv("REFRESH_QUERY_CACHE_TTL", 30 * 24 * 3600))
+# 신규 공고 최고 유사도가 (기존 추천 최저 유사도 - 이 값)보다 낮은 이력서는 건너뜀 (음수면 필터 끔)
+REFRESH_SIMILARITY_MARGIN = float(os.getenv("REFRESH_SIMILARITY_MARGIN", 0.05))
+
+_query_cache = SQLiteCache(REFRESH_QUERY_CACHE_PATH, ttl=REFRESH_QUERY_CACHE_TTL, table="query_embeddings")
+_job_vector_cache = SQLiteCache(REFRESH_QUERY_CACHE_PATH, ttl=REFRESH_QUERY_CACHE_TTL, table="job_embeddings")
+# 이력서별 기존 추천의 최저 유사도 (추천 job_id 목록이 키에 포함되므로 추천이 바뀌면 자동으로 무효)
+_cutoff_cache = SQLiteCache(REFRESH_QUERY_CACHE_PATH, ttl=REFRESH_QUERY_CACHE_TTL, table="recommendation_cutoffs")
+
+NEW_POSTINGS_QUERY = """
+    SELECT job_id, position_title, description, posted_at
+    FROM JobPosting
+    WHERE posted_at > %s OR (posted_at = %s AND job_id > %s)
+    ORDER BY posted_at, job_id
+    LIMIT %s
+"""
+
+# 사용자별 최신 이력서의 분석 결과만 resume_id 기준 키셋 페이지로 읽는다
+PROFILE_QUERY = """
+    SELECT r.resume_id, r.user_id, e.search_query, e.skills_inferred, e.job_category_inferred
+    FROM Resume r
+    JOIN ResumeEvalResult e ON e.resume_id = r.resume_id
+    WHERE r.resume_id > %s
+      AND r.resume_id = (SELECT MAX(r2.resume_id) FROM Resume r2 WHERE r2.user_id = r.user_id)
+      AND e.search_query IS NOT NULL AND e.search_query <> ''
+    ORDER BY r.resume_id
+    LIMIT %s
+"""
+
+
+def _to_datetime(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+
+def load_state(path=None):
+    path = path or REFRESH_STATE_PATH
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    return _to_datetime(state["posted_at"]), int(state["job_id"])
+
+
+def save_state(watermark, path=None):
+    """중간에 중단되어도 상태 파일이 깨지지 않도록 임시 파일에 쓴 뒤 교체"""
+    path = path or REFRESH_STATE_PATH
+    posted_at, job_id = watermark
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump({"posted_at": posted_at.isoformat(), "job_id": job_id,
+                   "updated_at": datetime.now().isoformat()}, f, ensure_ascii=False)
+    os.replace(f"{path}.tmp", path)
+
+
+def _initial_watermark():
+    """상태 파일이 없으면 마지막 추천 시각 이후 공고부터 반영한다"""
+    with get_pool(USER_DB_CONFIG).connection() as connection, connection.cursor() as cursor:
+        cursor.execute("SELECT MAX(recommended_at) FROM JobRecommendation")
+        row = cursor.fetchone()
+    latest = _to_datetime(row[0]) if row else None
+    return (latest, 0) if latest else None
+
+
+@traced()
+def fetch_new_postings(watermark, limit=None):
+    posted_at, job_id = watermark
+    with get_pool(JOB_DB_CONFIG).connection() as connection, connection.cursor() as cursor:
+        cursor.execute(NEW_POSTINGS_QUERY, (posted_at, posted_at, job_id, limit or REFRESH_MAX_POSTINGS))
+        rows = cursor.fetchall()
+    set_attributes(postings=len(rows))
+    return [
+        {
+            "job_id": row[0],
+            "position_title": row[1],
+            "description": row[2],
+            "posted_at": _to_datetime(row[3]),
+        }
+        for row in rows
+    ]
+
+
+@traced()
+def embed_postings(postings):
+    """신규 공고를 인덱스 빌드와 같은 텍스트/배포로 임베딩 (정규화된 행렬)"""
+    batches = [
+        embed_texts([_posting_text(job["position_title"], job["description"]) for job in postings[start:start + EMBED_BATCH_SIZE]])
+        for start in range(0, len(postings), EMBED_BATCH_SIZE)
+    ]
+    return np.vstack(batches)
+
+
+def _encode_vector(vector):
+    # 캐시 값의 JSON 크기를 줄이기 위해 float32 바이트를 base64로 저장
+    return base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode("ascii")
+
+
+def _decode_vector(value):
+    return np.frombuffer(base64.b64decode(value), dtype=np.float32)
+
+
+def embed_search_queries(queries):
+    """
+    저장된 검색어를 임베딩 (영구 캐시에 없는 검색어만 API 호출)
+    """
+    keys = [make_key(EMBED_OPENAI_DEPLOYMENT, query) for query in queries]
+    vectors = {}
+    for key in dict.fromkeys(keys):
+        cached = _query_cache.get(key)
+        if cached is not MISS:
+            vectors[key] = _decode_vector(cached)
+
+    missing = list(dict.fromkeys(q for q, key in zip(queries, keys) if key not in vectors))
+    for start in range(0, len(missing), EMBED_BATCH_SIZE):
+        batch = missing[start:start + EMBED_BATCH_SIZE]
+        for query, vector in zip(batch, embed_texts(batch)):
+            key = make_key(EMBED_OPENAI_DEPLOYMENT, query)
+            vectors[key] = vector
+            _query_cache.set(key, _encode_vector(vector))
+    set_attributes(queries=len(queries), embedded=len(missing))
+    return np.vstack([vectors[key] for key in keys])
+
+
+@traced()
+def embed_existing_jobs(job_details):
+    """
+    기존 추천 공고의 임베딩을 {job_id: 벡터}로 반환 (신규 공고와 같은 임베딩 공간에서 비교하기 위함)
+    로컬 인덱스(FAISS_INDEX_PATH)에 있으면 저장된 벡터를, 없으면 영구 캐시 또는 같은 텍스트/배포로 임베딩한 값을 사용
+    """
+    vectors = {}
+    if os.path.exists(f"{FAISS_INDEX_PATH}.ids.npy"):
+        vectors.update(get_local_index().vectors_for(job_details))
+
+    keys = {
+        job_id: make_key(EMBED_OPENAI_DEPLOYMENT, "job", job_id, job.get("posted_at"))
+        for job_id, job in job_details.items() if job_id not in vectors
+    }
+    missing = []
+    for job_id, key in keys.items():
+        cached = _job_vector_cache.get(key)
+        if cached is not MISS:
+            vectors[job_id] = _decode_vector(cached)
+        else:
+            missing.append(job_id)
+
+    for start in range(0, len(missing), EMBED_BATCH_SIZE):
+        batch = missing[start:start + EMBED_BATCH_SIZE]
+        texts = [_posting_text(job_details[job_id]["position_title"], job_details[job_id]["description"]) for job_id in batch]
+        for job_id, vector in zip(batch, embed_texts(texts)):
+            vectors[job_id] = vector
+            _job_vector_cache.set(keys[job_id], _encode_vector(vector))
+    set_attributes(jobs=len(job_details), embedded=len(missing))
+    return vectors
+
+
+def _parse_skills(value):
+    if not value:
+        return []
+    try:
+        skills = json.loads(value)
+    except (TypeError, ValueError):
+        return [value]
+    return skills if isinstance(skills, list) else [skills] if skills else []
+
+
+def _fetch_profiles(after_resume_id, limit):
+    with get_pool(USER_DB_CONFIG).connection() as connection, connection.cursor() as cursor:
+        cursor.execute(PROFILE_QUERY, (after_resume_id, limit))
+        rows = cursor.fetchall()
+    return [
+        {
+            "resume_id": row[0],
+            "user_id": row[1],
+            "search_query": row[2],
+            "skills": _parse_skills(row[3]),
+            "category": row[4],
+        }
+        for row in rows
+    ]
+
+
+def _fetch_current_recommendations(resume_ids):
+    """resume_id → 순위순 [{"recommendation_id", "job_id", "score", "rank"}]"""
+    current = {resume_id: [] for resume_id in resume_ids}
+    with get_pool(USER_DB_CONFIG).connection() as connection, connection.cursor() as cursor:
+        placeholders = ','.join(['%s'] * len(resume_ids))
+        cursor.execute(f"""
+            SELECT recommendation_id, resume_id, job_id, score, `rank`
+            FROM JobRecommendation
+            WHERE resume_id IN ({placeholders})
+            ORDER BY resume_id, `rank`
+        """, list(resume_ids))
+        for row in cursor.fetchall():
+            current[row[1]].append({"recommendation_id": row[0], "job_id": row[2], "score": row[3] or 0.0, "rank": row[4]})
+    return current
+
+
+def plan_refresh(profile, current, job_details, existing_similarities, postings, similarities, now=None):
+    """
+    기존 추천 + 유사도 상위 신규 공고를 함께 재순위화해 변경 계획을 반환 (변경 없으면 None)
+    기존 추천도 저장된 score 대신 신규 공고와 같은 임베딩으로 계산한 유사도(existing_similarities)로 비교한다
+    신규 공고가 상위 RECOMMEND_TOP_K에 들어온 경우만 변경으로 보고, 기존 추천끼리의 순서 변동만으로는 다시 쓰지 않는다
+    상세 정보나 유사도가 없는 기존 추천이 하나라도 있으면 비교할 수 없으므로 아무것도 바꾸지 않는다
+    """
+    if any(rec["job_id"] not in job_details or rec["job_id"] not in existing_similarities for rec in current):
+        return None
+
+    existing_ids = {rec["job_id"] for rec in current}
+    candidates = [dict(job_details[rec["job_id"]], similarity_score=existing_similarities[rec["job_id"]])
+                  for rec in current]
+
+    top_n = min(REFRESH_CANDIDATES, len(postings))
+    if top_n <= 0:
+        return None
+    positions = np.argpartition(-similarities, top_n - 1)[:top_n]
+    positions = positions[np.argsort(-similarities[positions])]
+    for pos in positions:
+        job = postings[pos]
+        if job["job_id"] not in existing_ids:
+            candidates.append(dict(job, posted_at=job["posted_at"].isoformat() if job["posted_at"] else None,
+                                   similarity_score=float(similarities[pos])))
+
+    ranked = rerank_jobs(candidates, profile["skills"], profile["category"], top_k=RECOMMEND_TOP_K, now=now)
+    entered = [job for job in ranked if job["job_id"] not in existing_ids]
+    if not entered:
+        return None
+
+    ranks = {job["job_id"]: rank for rank, job in enumerate(ranked, start=1)}
+    return {
+        "profile": profile,
+        "ranked": ranked,
+        "entered": entered,
+        "dropped": [rec["recommendation_id"] for rec in current if rec["job_id"] not in ranks],
+        # 남은 추천은 순위와 함께 score도 신규 추천과 같은 유사도 척도로 다시 쓴다
+        "kept": [
+            (ranks[rec["job_id"]], existing_similarities[rec["job_id"]], rec["recommendation_id"])
+            for rec in current if rec["job_id"] in ranks
+        ],
+    }
+
+
+def may_change(current, best_similarity, cutoff):
+    """
+    신규 공고가 이 이력서의 상위 추천에 들어올 여지가 있는지 (상세 조회/임베딩 전에 거르는 용도)
+    cutoff: 같은 임베딩으로 계산한 기존 추천의 최저 유사도 (모르면 None → 확인 필요)
+    """
+    if REFRESH_SIMILARITY_MARGIN < 0 or cutoff is None or len(current) < RECOMMEND_TOP_K:
+        return True
+    return best_similarity >= cutoff - REFRESH_SIMILARITY_MARGIN
+
+
+def _cutoff_key(profile, recs):
+    return make_key(EMBED_OPENAI_DEPLOYMENT, "cutoff", profile["search_query"], *sorted(rec["job_id"] for rec in recs))
+
+
+@traced()
+def apply_plans(plans):
+    """
+    이력서 묶음의 변경 계획을 하나의 트랜잭션으로 반영
+    빠진 추천 삭제 → 남은 추천 순위/점수 갱신 → 새로 들어온 추천(CoT 포함) 삽입
+    갱신된 행은 recommended_at도 바꿔 export_from_db.py 증분 내보내기에 포함되게 한다
+    (삭제된 행은 증분 내보내기로 알 수 없으므로 추천 테이블은 갱신 후 전체 내보내기가 필요)
+    """
+    now = datetime.now()
+    deletes, updates, inserts = [], [], []
+    for plan in plans:
+        profile = plan["profile"]
+        deletes.extend((recommendation_id,) for recommendation_id in plan["dropped"])
+        updates.extend((rank, score, now, recommendation_id) for rank, score, recommendation_id in plan["kept"])
+        reasons = dict(zip((job["job_id"] for job in plan["entered"]), plan["reasons"]))
+        for rank, job in enumerate(plan["ranked"], start=1):
+            if job["job_id"] in reasons:
+                inserts.append((profile["user_id"], profile["resume_id"], job["job_id"],
+                                job.get("similarity_score", 0.0), rank, reasons[job["job_id"]], now))
+
+    try:
+        with get_pool(USER_DB_CONFIG).connection() as connection, connection.cursor() as cursor:
+            if deletes:
+                cursor.executemany("DELETE FROM JobRecommendation WHERE recommendation_id = %s", deletes)
+            if updates:
+                cursor.executemany("UPDATE JobRecommendation SET `rank` = %s, score = %s, recommended_at = %s "
+                                   "WHERE recommendation_id = %s", updates)
+            if inserts:
+                cursor.executemany(RECOMMENDATION_INSERT_QUERY, inserts)
+            connection.commit()
+    except Exception as e:
+        # 롤백은 커넥션 풀 반납 시 처리됨
+        print(f"추천 갱신 저장 중 오류 발생: {str(e)}")
+        raise
+    set_attributes(deleted=len(deletes), updated=len(updates), inserted=len(inserts))
+
+
+@traced()
+def refresh_chunk(profiles, postings, posting_vectors, dry_run=False, now=None):
+    """
+    이력서 묶음 하나에 대해 신규 공고 점수 계산 → 변경 계획 → CoT → 저장, 변경된 이력서 수와 CoT 수 반환
+    기존 추천의 상세 조회/임베딩은 신규 공고 최고 유사도가 기존 추천 최저 유사도 근처 이상인 이력서만 수행한다
+    """
+    query_vectors = embed_search_queries([profile["search_query"] for profile in profiles])
+    similarities = query_vectors @ posting_vectors.T
+    best_similarities = similarities.max(axis=1)
+
+    current = _fetch_current_recommendations([profile["resume_id"] for profile in profiles])
+    candidates = []
+    for i, profile in enumerate(profiles):
+        recs = current[profile["resume_id"]]
+        cutoff = _cutoff_cache.get(_cutoff_key(profile, recs)) if recs else None
+        if may_change(recs, float(best_similarities[i]), None if cutoff is MISS else cutoff):
+            candidates.append(i)
+    set_attributes(profiles=len(profiles), candidates=len(candidates))
+    if not candidates:
+        return 0, 0
+
+    # DB 오류는 빈 결과 대신 예외로 받아 실행을 멈춘다 (상태 파일이 갱신되지 않으므로 다음 실행에서 다시 처리)
+    existing_job_ids = list(dict.fromkeys(rec["job_id"] for i in candidates for rec in current[profiles[i]["resume_id"]]))
+    job_details = {job["job_id"]: job for job in get_job_details_from_ids(existing_job_ids, raise_errors=True)}
+    if len(job_details) < len(existing_job_ids):
+        print(f"  기존 추천 공고 {len(existing_job_ids) - len(job_details)}건을 찾을 수 없어 해당 이력서는 건너뜁니다")
+    existing_vectors = embed_existing_jobs(job_details)
+
+    plans = []
+    for i in candidates:
+        profile, query_vector = profiles[i], query_vectors[i]
+        recs = current[profile["resume_id"]]
+        existing_similarities = {
+            rec["job_id"]: float(query_vector @ existing_vectors[rec["job_id"]])
+            for rec in recs if rec["job_id"] in existing_vectors
+        }
+        if recs and len(existing_similarities) == len(recs):
+            _cutoff_cache.set(_cutoff_key(profile, recs), min(existing_similarities.values()))
+        plan = plan_refresh(profile, recs, job_details, existing_similarities, postings, similarities[i], now)
+        if plan is not None:
+            plans.append(plan)
+
+    if dry_run:
+        for plan in plans:
+            titles = ", ".join(job["position_title"] for job in plan["entered"])
+            print(f"  [dry-run] user {plan['profile']['user_id']} / resume {plan['profile']['resume_id']}: 신규 추천 {titles}")
+        return len(plans), 0
+
+    # CoT는 새로 들어온 추천에만 생성 (기존 추천의 recommended_reason은 그대로 유지)
+    cot_calls = 0
+    with llm_priority(BATCH):
+        for plan in plans:
+            profile = plan["profile"]
+            plan["reasons"] = generate_cot_analyses(plan["entered"], profile["skills"], profile["category"],
+                                                    profile["search_query"])
+            cot_calls += len(plan["entered"])
+
+    if plans:
+        apply_plans(plans)
+        for plan in plans:
+            ranked = plan["ranked"]
+            _cutoff_cache.set(_cutoff_key(plan["profile"], ranked), min(job.get("similarity_score", 0.0) for job in ranked))
+    return len(plans), cot_calls
+
+
+@traced()
+def refresh_recommendations(state_path=None, since=None, dry_run=False, max_postings=None, user_chunk=None):
+    """
+    마지막 실행 이후 등록된 JobPosting만 임베딩해 기존 추천과 비교하고,
+    순위가 바뀐 이력서의 JobRecommendation만 갱신한다 (evaluate_resume 재호출 없음)
+    """
+    state_path = state_path or REFRESH_STATE_PATH
+    user_chunk = user_chunk or REFRESH_USER_CHUNK
+    max_postings = max_postings or REFRESH_MAX_POSTINGS
+
+    watermark = (since, 0) if since else load_state(state_path) or _initial_watermark()
+    if watermark is None:
+        print("  기준 시각이 없습니다 (상태 파일/추천 이력 없음). --since 로 지정하세요.")
+        return {"postings": 0, "profiles": 0, "changed": 0, "cot_calls": 0}
+
+    totals = {"postings": 0, "profiles": 0, "changed": 0, "cot_calls": 0}
+    now = datetime.now()
+    while True:
+        postings = fetch_new_postings(watermark, max_postings)
+        if not postings:
+            break
+        print(f"  신규 공고 {len(postings)}건 ({watermark[0]} 이후)")
+        posting_vectors = embed_postings(postings)
+
+        after_resume_id = 0
+        while True:
+            profiles = _fetch_profiles(after_resume_id, user_chunk)
+            if not profiles:
+                break
+            changed, cot_calls = refresh_chunk(profiles, postings, posting_vectors, dry_run, now)
+            totals["profiles"] += len(profiles)
+            totals["changed"] += changed
+            totals["cot_calls"] += cot_calls
+            after_resume_id = profiles[-1]["resume_id"]
+            print(f"  이력서 {totals['profiles']}건 확인, 추천 변경 {totals['changed']}건")
+
+        totals["postings"] += len(postings)
+        watermark = (postings[-1]["posted_at"], postings[-1]["job_id"])
+        if not dry_run:
+            save_state(watermark, state_path)
+        if len(postings) < max_postings:
+            break
+
+    print(f"  완료: 신규 공고 {totals['postings']}건, 추천 변경 {totals['changed']}건, CoT 생성 {totals['cot_calls']}건")
+    return totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="신규 채용공고만 반영해 저장된 추천 결과를 증분 갱신")
+    parser.add_argument("--state", type=str, default=None, help=f"상태 파일 경로 (기본값: {REFRESH_STATE_PATH})")
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None,
+                        help="이 시각 이후 공고부터 반영 (예: 2024-01-01T00:00:00, 상태 파일보다 우선)")
+    parser.add_argument("--max-postings", type=int, default=None, help=f"한 번에 처리할 신규 공고 수 (기본값: {REFRESH_MAX_POSTINGS})")
+    parser.add_argument("--user-chunk", type=int, default=None, help=f"한 번에 읽을 이력서 수 (기본값: {REFRESH_USER_CHUNK})")
+    parser.add_argument("--dry-run", action="store_true", help="변경 대상만 출력하고 CoT 생성/DB 저장/상태 갱신은 하지 않음")
+    args = parser.parse_args()
+
+    refresh_recommendations(args.state, args.since, args.dry_run, args.max_postings, args.user_chunk)
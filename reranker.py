@@ -0,0 +1,138 @@
+import os
+import re
+import numpy as np
+from datetime import datetime
+from dotenv import load_dotenv
+from tracing import traced, set_attributes
+
+# 환경 변수 로드
+load_dotenv()
+
+# 재순위화 설정: FAISS에서 RERANK_CANDIDATES개 후보를 받아 로컬 점수로 다시 정렬한 뒤 상위 RECOMMEND_TOP_K개만 사용
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "true").lower() in ("1", "true", "yes")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", 100))
+RECOMMEND_TOP_K = int(os.getenv("RECOMMEND_TOP_K", 3))
+
+# 점수 가중치 (임베딩 유사도 / 기술 스택 겹침 / 직무 카테고리 일치 / 게시일 최신성)
+RERANK_WEIGHT_SIMILARITY = float(os.getenv("RERANK_WEIGHT_SIMILARITY", 0.6))
+RERANK_WEIGHT_SKILLS = float(os.getenv("RERANK_WEIGHT_SKILLS", 0.25))
+RERANK_WEIGHT_CATEGORY = float(os.getenv("RERANK_WEIGHT_CATEGORY", 0.1))
+RERANK_WEIGHT_RECENCY = float(os.getenv("RERANK_WEIGHT_RECENCY", 0.05))
+
+# 최신성 점수가 절반이 되는 게시 경과 일수
+RERANK_RECENCY_HALF_LIFE_DAYS = float(os.getenv("RERANK_RECENCY_HALF_LIFE_DAYS", 30))
+
+
+def search_top_k() -> int:
+    """FAISS 검색에 요청할 후보 수 (재순위화를 끄면 최종 추천 수와 같음)"""
+    return max(RERANK_CANDIDATES, RECOMMEND_TOP_K) if RERANK_ENABLED else RECOMMEND_TOP_K
+
+
+def merge_similarity_scores(job_id_results, jobs):
+    """
+    검색 결과의 similarity_score를 상세 공고 dict에 합친다 (jobs는 검색 순서를 유지해야 함)
+    """
+    scores = {job["job_id"]: job.get("similarity_score", 0.0) for job in job_id_results}
+    for job in jobs:
+        job["similarity_score"] = scores.get(job["job_id"], 0.0)
+    return jobs
+
+
+def _minmax(values):
+    spread = values.max() - values.min()
+    if spread <= 0:
+        return np.zeros_like(values)
+    return (values - values.min()) / spread
+
+
+def _term_pattern(term):
+    # 영문/숫자 단어의 일부는 매칭하지 않는다 ("java"가 "javascript"에, "c"가 "c++"/"c#"에 걸리지 않도록)
+    # 한글은 조사가 바로 붙으므로("파이썬을") 앞뒤 경계를 요구하지 않는다
+    return re.compile(rf"(?<![a-z0-9]){re.escape(term)}(?![a-z0-9+#])")
+
+
+def _contains_matrix(texts, terms):
+    """
+    (후보 수 × 검색어 수) 불리언 행렬: texts[i]에 terms[j]가 단어 단위로 등장하는지
+    긴 본문을 고정 폭 numpy 문자열 배열로 복사하지 않도록 검사는 str에서 수행
+    """
+    if not terms:
+        return np.zeros((len(texts), 0), dtype=bool)
+    patterns = [_term_pattern(term) for term in terms]
+    return np.fromiter((pattern.search(text) is not None for text in texts for pattern in patterns),
+                       dtype=bool, count=len(texts) * len(terms)).reshape(len(texts), len(terms))
+
+
+def _split_terms(values):
+    terms = []
+    for value in values:
+        for term in re.split(r"[\s,/·()]+", (value or "").lower()):
+            if term and term not in terms:
+                terms.append(term)
+    return terms
+
+
+def score_candidates(jobs, skills, category, now=None):
+    """
+    후보 공고별 점수 구성 요소를 벡터로 계산해 dict로 반환 (각 값은 0~1, 길이 = len(jobs))
+    - similarity: 후보 안에서 min-max 정규화한 임베딩 유사도 (점수가 없으면 검색 순위 기반 값)
+    - skills: 이력서 기술 스택 중 공고 제목/본문에 (단어 단위로) 등장하는 비율
+    - category: 직무 카테고리 단어 중 공고 제목에 등장하는 비율
+    - recency: posted_at 경과 일수에 대한 지수 감쇠 (RERANK_RECENCY_HALF_LIFE_DAYS)
+    """
+    n = len(jobs)
+    similarity = np.array([job.get("similarity_score") or 0.0 for job in jobs], dtype=np.float64)
+    if n and np.ptp(similarity) == 0:
+        # 점수 없이 job_id만 받은 경우 검색 서비스의 순서를 유사도로 사용
+        similarity = 1.0 - np.arange(n, dtype=np.float64) / n
+    similarity = _minmax(similarity) if n > 1 else np.ones(n)
+
+    titles = [(job.get("position_title") or "").lower() for job in jobs]
+    texts = [f"{title} {(job.get('description') or '').lower()}" for title, job in zip(titles, jobs)]
+
+    skill_terms = [skill.lower() for skill in (skills or []) if skill and skill.strip()]
+    skill_matches = _contains_matrix(texts, skill_terms)
+    skill_score = skill_matches.mean(axis=1) if skill_terms else np.zeros(n)
+
+    category_terms = _split_terms([category])
+    category_matches = _contains_matrix(titles, category_terms)
+    category_score = category_matches.mean(axis=1) if category_terms else np.zeros(n)
+
+    now = np.datetime64(now or datetime.now(), "s")
+    posted = np.array([job.get("posted_at") or "NaT" for job in jobs], dtype="datetime64[s]")
+    age_days = np.maximum((now - posted) / np.timedelta64(1, "D"), 0.0)
+    recency = np.nan_to_num(np.exp2(-age_days / RERANK_RECENCY_HALF_LIFE_DAYS), nan=0.0)
+
+    return {"similarity": similarity, "skills": skill_score, "category": category_score, "recency": recency}
+
+
+@traced()
+def rerank_jobs(jobs, skills, category, top_k=None, weights=None, now=None):
+    """
+    후보 공고를 (유사도, 기술 겹침, 카테고리 일치, 최신성) 가중합으로 다시 정렬해 상위 top_k개를 반환
+    각 공고에는 rerank_score가 추가되고 similarity_score는 검색 서비스 값을 그대로 유지한다
+    점수가 같으면 원래 검색 순서를 따른다
+    """
+    top_k = top_k or RECOMMEND_TOP_K
+    if not RERANK_ENABLED or len(jobs) <= 1:
+        return jobs[:top_k]
+
+    weights = weights or {
+        "similarity": RERANK_WEIGHT_SIMILARITY,
+        "skills": RERANK_WEIGHT_SKILLS,
+        "category": RERANK_WEIGHT_CATEGORY,
+        "recency": RERANK_WEIGHT_RECENCY,
+    }
+    components = score_candidates(jobs, skills, category, now)
+    total = sum(weights.get(name, 0.0) * values for name, values in components.items())
+
+    # 점수 내림차순, 같은 점수는 원래 순서 (lexsort는 마지막 키가 우선)
+    order = np.lexsort((np.arange(len(jobs)), -total))[:top_k]
+    set_attributes(candidates=len(jobs), top_k=top_k)
+
+    ranked = []
+    for i in order:
+        job = jobs[i]
+        job["rerank_score"] = round(float(total[i]), 6)
+        ranked.append(job)
+    return ranked
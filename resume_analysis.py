@@ -1,27 +1,31 @@
 import os
-import fitz  # PyMuPDF
 import re
-from openai import AzureOpenAI
+import json
+import logging
 from dotenv import load_dotenv
-from typing import Tuple
+from typing import List, Optional, Tuple
+from openai import BadRequestError
+from pydantic import BaseModel, Field, ValidationError
+from cache_store import MISS, LRUCache, SQLiteCache, TieredCache, make_key
+from pdf_extractor import extract_text
+from tracing import traced, set_attributes
+from llm_gateway import chat_completion
 
 load_dotenv()
 
-# GPT 클라이언트 설정
-client = AzureOpenAI(
-    api_key=os.getenv("OPENAI_API_KEY"),
-    azure_endpoint=os.getenv("OPENAI_ENDPOINT"),
-    api_version="2024-02-15-preview"
-)
+# GPT 응답 캐시 설정 (같은 이력서 재제출 시 LLM 호출 생략)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite3")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", 7 * 24 * 3600))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 100000))
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", 1024))
 
-def extract_text_from_pdf(pdf_path: str) -> str:
-    """PDF에서 텍스트 추출"""
-    doc = fitz.open(pdf_path)
-    return "\n".join([page.get_text() for page in doc])
+llm_cache = TieredCache(
+    memory=LRUCache(max_entries=LLM_CACHE_MEMORY_ENTRIES, ttl=LLM_CACHE_TTL),
+    disk=SQLiteCache(LLM_CACHE_PATH, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES) if LLM_CACHE_PATH else None
+)
 
-def evaluate_resume(text: str) -> str:
-    """GPT를 사용해 이력서 평가"""
-    prompt = f"""
+EVALUATE_PROMPT_TEMPLATE = """
 다음은 한 사람의 이력서입니다:
 
 {text}
@@ -34,12 +38,96 @@ def evaluate_resume(text: str) -> str:
 4. 예상 직무 카테고리
 5. 기술 스택 목록
 """
-    response = client.chat.completions.create(
-        model=os.getenv("OPENAI_DEPLOYMENT"),
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.2
-    )
-    return response.choices[0].message.content
+
+SEARCH_QUERY_PROMPT_TEMPLATE = """
+다음 이력서 평가 내용을 바탕으로 FAISS 검색에 적합한 **간결한 키워드 기반 검색어**를 생성해 주세요.
+
+- 문장이 아닌 키워드만 나열해 주세요 (예: 데이터분석, Python, SQL)
+- 핵심 직무와 기술 키워드 중심으로 구성해 주세요
+- 결과는 쉼표(,)로 구분된 단어 10개 이하로 작성해 주세요
+- 100자 이내로 제한해 주세요
+
+이력서 평가 요약:
+{report}
+
+검색어:
+"""
+
+
+# 분석 모드: "legacy" (평가 → 검색어 2회 호출 + 정규식 파싱) / "structured" (JSON 1회 호출)
+RESUME_ANALYSIS_MODE = os.getenv("RESUME_ANALYSIS_MODE", "legacy").lower()
+
+STRUCTURED_PROMPT_TEMPLATE = """
+다음은 한 사람의 이력서입니다:
+
+{text}
+
+이 이력서를 분석하여 아래 JSON 형식으로만 한국어로 답해 주세요. 각 서술 항목에는 **왜 그렇게 판단했는지** 반드시 포함해 주세요.
+
+{{
+  "strengths": "강점과 그 근거",
+  "weaknesses": "약점과 그 근거",
+  "improvements": "개선점과 그 근거",
+  "category": "예상 직무 카테고리 (예: 백엔드 개발자)",
+  "skills": ["기술 스택", "..."],
+  "search_query": "FAISS 검색용 키워드를 쉼표(,)로 구분해 10개 이하, 100자 이내 (예: 데이터분석, Python, SQL)"
+}}
+"""
+
+
+class ResumeAnalysis(BaseModel):
+    """구조화 모드에서 GPT가 반환하는 이력서 분석 결과"""
+    strengths: str
+    weaknesses: str
+    improvements: str
+    category: Optional[str] = None
+    skills: List[str] = Field(default_factory=list)
+    search_query: str = Field(min_length=1)
+
+    def to_report(self) -> str:
+        """기존 평가 리포트와 같은 번호 형식의 텍스트 (evaluation_summary 저장용)"""
+        return (
+            f"1. 강점\n{self.strengths}\n\n"
+            f"2. 약점\n{self.weaknesses}\n\n"
+            f"3. 개선점\n{self.improvements}\n\n"
+            f"4. 예상 직무 카테고리: {self.category or ''}\n\n"
+            f"5. 기술 스택 목록: {', '.join(self.skills)}"
+        )
+
+
+def _cached_completion(template: str, content: str, use_cache: bool, call):
+    """
+    (입력 텍스트, 프롬프트 템플릿, 배포 이름) 해시로 GPT 결과를 캐시
+    """
+    if not (use_cache and LLM_CACHE_ENABLED):
+        return call()
+    key = make_key(os.getenv("OPENAI_DEPLOYMENT"), template, content)
+    cached = llm_cache.get(key)
+    set_attributes(cache_hit=cached is not MISS)
+    if cached is not MISS:
+        return cached
+    result = call()
+    llm_cache.set(key, result)
+    return result
+
+@traced()
+def extract_text_from_pdf(pdf_path, max_pages: int = None, max_chars: int = None) -> str:
+    """PDF에서 텍스트 추출 (경로 또는 bytes, 페이지/글자 수 예산은 PDF_MAX_PAGES / PDF_MAX_CHARS)"""
+    return extract_text(pdf_path, max_pages, max_chars)
+
+@traced()
+def evaluate_resume(text: str, use_cache: bool = True) -> str:
+    """GPT를 사용해 이력서 평가 (use_cache=False면 캐시를 건너뛰고 항상 호출)"""
+    def _call():
+        # GPT 호출은 llm_gateway를 거쳐 RPM/TPM 한도, 우선순위, 429 재시도를 공유한다
+        response = chat_completion(
+            model=os.getenv("OPENAI_DEPLOYMENT"),
+            messages=[{"role": "user", "content": EVALUATE_PROMPT_TEMPLATE.format(text=text)}],
+            temperature=0.2
+        )
+        return response.choices[0].message.content
+
+    return _cached_completion(EVALUATE_PROMPT_TEMPLATE, text, use_cache, _call)
 
 def extract_skills_and_category(report_text: str) -> Tuple[list, str]:
     """
@@ -72,37 +160,92 @@ def extract_skills_and_category(report_text: str) -> Tuple[list, str]:
 #     )
 #     return response.choices[0].message.content.strip()
 
-def generate_search_query(report: str) -> str:
-    prompt = f"""
-다음 이력서 평가 내용을 바탕으로 FAISS 검색에 적합한 **간결한 키워드 기반 검색어**를 생성해 주세요.
+@traced()
+def generate_search_query(report: str, use_cache: bool = True) -> str:
+    def _call():
+        response = chat_completion(
+            model=os.getenv("OPENAI_DEPLOYMENT"),
+            messages=[{"role": "user", "content": SEARCH_QUERY_PROMPT_TEMPLATE.format(report=report)}],
+            temperature=0.2
+        )
+        return response.choices[0].message.content.strip()[:100]  # 100자 이내 제한
 
-- 문장이 아닌 키워드만 나열해 주세요 (예: 데이터분석, Python, SQL)
-- 핵심 직무와 기술 키워드 중심으로 구성해 주세요
-- 결과는 쉼표(,)로 구분된 단어 10개 이하로 작성해 주세요
-- 100자 이내로 제한해 주세요
+    return _cached_completion(SEARCH_QUERY_PROMPT_TEMPLATE, report, use_cache, _call)
 
-이력서 평가 요약:
-{report}
 
-검색어:
-"""
-    response = client.chat.completions.create(
-        model=os.getenv("OPENAI_DEPLOYMENT"),
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.2
-    )
-    return response.choices[0].message.content.strip()[:100]  # 100자 이내 제한
-
-
-def generate_query_from_report(report_text: str) -> Tuple[str, list, str]:
+def generate_query_from_report(report_text: str, use_cache: bool = True) -> Tuple[str, list, str]:
     """
     GPT 리포트에서 기술/직무 추출 → GPT 검색어 생성까지 한 번에
     """
     skills, category = extract_skills_and_category(report_text)
-    gpt_query = generate_search_query(report_text)
+    gpt_query = generate_search_query(report_text, use_cache=use_cache)
     return gpt_query, skills, category
 
 
+@traced()
+def analyze_resume_structured(text: str, use_cache: bool = True) -> ResumeAnalysis:
+    """
+    한 번의 GPT 호출(JSON 모드)로 강점/약점/개선점/직무/기술/검색어를 받아 pydantic으로 검증
+    검증 실패 시 ValidationError / ValueError 발생
+    """
+    def _call():
+        response = chat_completion(
+            model=os.getenv("OPENAI_DEPLOYMENT"),
+            messages=[{"role": "user", "content": STRUCTURED_PROMPT_TEMPLATE.format(text=text)}],
+            response_format={"type": "json_object"},
+            temperature=0.2
+        )
+        content = response.choices[0].message.content
+        # 검증에 실패한 응답은 캐시에 남기지 않는다
+        ResumeAnalysis.model_validate_json(content)
+        return content
+
+    analysis = ResumeAnalysis.model_validate_json(
+        _cached_completion(STRUCTURED_PROMPT_TEMPLATE, text, use_cache, _call)
+    )
+    analysis.search_query = analysis.search_query.strip()[:100]  # 100자 이내 제한
+    analysis.skills = [skill.strip() for skill in analysis.skills if skill and skill.strip()]
+    return analysis
+
+
+def analyze_resume(text: str, mode: str = None, use_cache: bool = True) -> dict:
+    """
+    이력서 분석 → 검색어 생성까지 수행하고 파이프라인이 쓰는 값을 dict로 반환
+    (summary, skills, category, search_query, strengths, weaknesses, improvement)
+    structured 모드가 실패하면(응답 검증 실패, 배포/api_version이 response_format을 거부) 기존 2회 호출 방식으로 대체한다
+    """
+    mode = (mode or RESUME_ANALYSIS_MODE).lower()
+    if mode == "structured":
+        try:
+            analysis = analyze_resume_structured(text, use_cache=use_cache)
+            return {
+                "summary": analysis.to_report(),
+                "skills": analysis.skills,
+                "category": analysis.category,
+                "search_query": analysis.search_query,
+                "strengths": analysis.strengths,
+                "weaknesses": analysis.weaknesses,
+                "improvement": analysis.improvements,
+            }
+        except (ValidationError, ValueError, json.JSONDecodeError) as e:
+            logging.warning(f"구조화 분석 응답 검증 실패, 기존 방식으로 재시도: {str(e)}")
+        except BadRequestError as e:
+            logging.warning(f"구조화 분석 요청 거부(JSON 모드 미지원 등), 기존 방식으로 재시도: {str(e)}")
+
+    summary = evaluate_resume(text, use_cache=use_cache)
+    query, skills, category = generate_query_from_report(summary, use_cache=use_cache)
+    strengths, weaknesses, improvement = parse_resume_sections(summary)
+    return {
+        "summary": summary,
+        "skills": skills,
+        "category": category,
+        "search_query": query,
+        "strengths": strengths,
+        "weaknesses": weaknesses,
+        "improvement": improvement,
+    }
+
+
 def parse_resume_sections(report: str) -> Tuple[str, str, str]:
     """
     GPT 이력서 평가 리포트에서 강점, 약점, 개선점을 파싱한다.
@@ -1,27 +1,31 @@
 import os
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
 from dotenv import load_dotenv
-from openai import AzureOpenAI
 from upload_to_blob import upload_pdf_to_blob
-from resume_analysis import (
-    extract_text_from_pdf,
-    evaluate_resume,
-    extract_skills_and_category,
-    generate_query_from_report,
-)
+from resume_analysis import extract_text_from_pdf, analyze_resume
 from recommend_jobs_from_faiss import search_faiss_job_ids, get_job_details_from_ids
 from store_to_db import insert_to_database
+from text_compaction import prepare_resume_text, truncate_to_tokens
+from stage_graph import Stage, StageError, run_stage_graph
+from reranker import search_top_k, merge_similarity_scores, rerank_jobs
+from tracing import span, traced, enable as enable_tracing
+from llm_gateway import chat_completion
 
 # 환경 변수 로드
 load_dotenv()
 
-# Azure OpenAI 클라이언트 설정
-client = AzureOpenAI(
-    api_key=os.getenv("OPENAI_API_KEY"),
-    api_version="2024-02-15-preview",
-    azure_endpoint=os.getenv("OPENAI_ENDPOINT")
-)
+# CoT 분석 동시 실행 설정 (동시 요청 수 상한, 요청당 타임아웃 초)
+COT_MAX_CONCURRENCY = int(os.getenv("COT_MAX_CONCURRENCY", 4))
+COT_TIMEOUT = float(os.getenv("COT_TIMEOUT", 60))
 
-def generate_cot_analysis(user_skills, user_category, job_description, job_title, similarity_score, search_query):
+# CoT 프롬프트에 넣을 채용공고 본문 토큰 예산
+COT_JOB_DESCRIPTION_TOKENS = int(os.getenv("COT_JOB_DESCRIPTION_TOKENS", 600))
+
+@traced()
+def generate_cot_analysis(user_skills, user_category, job_description, job_title, similarity_score, search_query, timeout=None):
+    job_description = truncate_to_tokens(job_description or "", COT_JOB_DESCRIPTION_TOKENS)
     prompt = f"""당신은 채용공고 추천 시스템의 분석가입니다. 다음 정보를 바탕으로 왜 이 채용공고가 추천되었는지 논리적으로 분석해주세요.
 
 **사용자 정보:**
@@ -32,7 +36,7 @@ def generate_cot_analysis(user_skills, user_category, job_description, job_title
 **추천된 채용공고:**
 - 직무명: {job_title}
 - 유사도 점수: {similarity_score:.3f}
-- 채용공고 내용: {job_description[:1000]}...
+- 채용공고 내용: {job_description}...
 
 **분석 요청사항:**
 1. 유사도 점수가 {similarity_score:.3f}인 이유를 분석해주세요
@@ -44,71 +48,121 @@ def generate_cot_analysis(user_skills, user_category, job_description, job_title
 간결하고 명확하게 단계별로 분석해주세요. 불필요한 수사나 과장은 피하고 객관적 사실에 기반해 설명해주세요."""
     
     try:
-        response = client.chat.completions.create(
+        # timeout은 시도당이 아니라 이 호출 전체(한도 대기, 재시도, 백오프 포함)의 상한
+        response = chat_completion(
             model=os.getenv("OPENAI_DEPLOYMENT", "gpt-4"),
             messages=[
                 {"role": "system", "content": "당신은 채용공고 추천 시스템의 전문 분석가입니다. 객관적이고 논리적인 분석을 제공합니다."},
                 {"role": "user", "content": prompt}
             ],
             max_tokens=800,
-            temperature=0.3
+            temperature=0.3,
+            deadline=time.monotonic() + timeout if timeout else None
         )
         return response.choices[0].message.content.strip()
 
     except Exception as e:
         return f"GPT 분석 생성 중 오류 발생: {str(e)}"
 
-def run_pipeline(user_id, pdf_path):
-    print("\n이력서 자동 분석 파이프라인 시작\n")
+def generate_cot_analyses(recommendations, skills, category, search_query,
+                          max_concurrency=None, timeout=None):
+    """
+    추천 공고별 CoT 분석을 스레드 풀에서 동시에 생성한다.
+    결과 리스트는 recommendations 순서(= 추천 순위)를 그대로 따른다.
+    """
+    if not recommendations:
+        return []
+
+    max_concurrency = max_concurrency or COT_MAX_CONCURRENCY
+    timeout = timeout or COT_TIMEOUT
+
+    def _analyze(job):
+        return generate_cot_analysis(
+            user_skills=skills,
+            user_category=category,
+            job_description=job.get('description', '') or '',
+            job_title=job['position_title'],
+            similarity_score=job.get('similarity_score', 0.0),
+            search_query=search_query,
+            timeout=timeout
+        )
 
-    # 1. Azure Blob 업로드
+    if max_concurrency <= 1 or len(recommendations) == 1:
+        return [_analyze(job) for job in recommendations]
+
+    executor = ThreadPoolExecutor(max_workers=min(max_concurrency, len(recommendations)))
+    try:
+        futures = [executor.submit(contextvars.copy_context().run, _analyze, job) for job in recommendations]
+        # 호출마다 시작 시점부터 timeout 안에 끝나므로(재시도 포함) 전체 대기 시간은 라운드 수만큼 잡는다
+        rounds = -(-len(futures) // max_concurrency)
+        wait(futures, timeout=timeout * rounds)
+
+        results = []
+        for future in futures:
+            if future.done():
+                results.append(future.result())
+            else:
+                future.cancel()
+                results.append(f"GPT 분석 생성 중 오류 발생: {timeout:.0f}초 내에 응답이 없습니다")
+        return results
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+# -----------------------------
+# 파이프라인 단계
+# 각 단계는 선행 단계 결과가 담긴 dict(ctx)를 받아 자기 결과를 반환한다
+# -----------------------------
+def _upload_stage(ctx):
+    # 1. Azure Blob 업로드 (DB 저장 전까지 다른 단계와 동시에 진행)
     print("[1] Azure Blob 업로드 시작...")
-    blob_url = upload_pdf_to_blob(pdf_path, user_id)
+    blob_url = upload_pdf_to_blob(ctx["pdf_path"], ctx["user_id"])
     print(f"  업로드 완료. Blob URL: {blob_url}")
+    return blob_url
 
+def _extract_stage(ctx):
     # 2. PDF 텍스트 추출
     print("\n[2] 이력서에서 텍스트 추출 중...")
-    text = extract_text_from_pdf(pdf_path)
+    raw_text = extract_text_from_pdf(ctx["pdf_path"])
+    text, token_stats = prepare_resume_text(raw_text)
     print("  텍스트 추출 완료")
+    print(f"  텍스트 정리: {token_stats['original_tokens']} → {token_stats['final_tokens']} 토큰 "
+          f"({token_stats['saved_tokens']} 토큰 절감)")
     print("  추출 텍스트 (앞 500자):\n", text[:500], "\n...")
+    return text
 
-    # 3. GPT 이력서 평가
+def _analyze_stage(ctx):
+    # 3. GPT 이력서 평가 (structured 모드면 검색어까지 한 번의 호출로 생성)
     print("\n[3] GPT 기반 이력서 평가 중...")
-    summary = evaluate_resume(text)
+    analysis = analyze_resume(ctx["text"], mode=ctx.get("analysis_mode"))
     print("  평가 완료")
-    print("  평가 요약:\n", summary[:700], "\n...")
+    print("  평가 요약:\n", analysis["summary"][:700], "\n...")
 
-    # 4. 기술스택/카테고리 추출 및 쿼리 생성
+    # 4. 기술스택/카테고리 및 검색 쿼리
     print("\n[4] 기술 스택 및 직무 카테고리 추출...")
-    skills, category = extract_skills_and_category(summary)
-    print(f"  추출된 기술 스택: {skills}")
-    print(f"  추정 직무 카테고리: {category}")
-
-    query_raw = generate_query_from_report(summary)
-    query = ' '.join(query_raw) if isinstance(query_raw, list) else str(query_raw).strip()
-    print(f"  검색 쿼리 생성: '{query}'")
+    print(f"  추출된 기술 스택: {analysis['skills']}")
+    print(f"  추정 직무 카테고리: {analysis['category']}")
+    print(f"  검색 쿼리 생성: '{analysis['search_query']}'")
+    return analysis
 
+def _search_stage(ctx):
     # 5. FAISS 채용공고 추천
     print("\n[5] FAISS 채용공고 추천 시작...")
-    job_id_results = search_faiss_job_ids(query)
+    analysis = ctx["analysis"]
+    job_id_results = search_faiss_job_ids(analysis["search_query"], top_k=search_top_k())
     job_ids = [job["job_id"] for job in job_id_results]
-    recommendations = get_job_details_from_ids(job_ids)
+    candidates = merge_similarity_scores(job_id_results, get_job_details_from_ids(job_ids))
 
-    # 🔥 score 병합
-    for job in recommendations:
-        matched = next((j for j in job_id_results if j["job_id"] == job["job_id"]), {})
-        job["similarity_score"] = matched.get("similarity_score", 0.0)
-    print(f"  추천된 채용공고 수: {len(recommendations)}")
+    # 후보 공고를 기술 스택/직무/최신성까지 반영해 다시 정렬하고 상위 공고만 CoT 분석으로 넘긴다
+    recommendations = rerank_jobs(candidates, analysis["skills"], analysis["category"])
+    print(f"  후보 {len(candidates)}건 중 추천된 채용공고 수: {len(recommendations)}")
 
     # 추천 내용 출력
     print("\n추천 결과 요약")
     if job_id_results and recommendations:
         for i, job in enumerate(recommendations, 1):
-            matched = next((j for j in job_id_results if j["job_id"] == job["job_id"]), {})
-            score = matched.get("similarity_score", 0.0)
-            print(f"{i}. {job['position_title']} (유사도: {score:.3f})")
+            print(f"{i}. {job['position_title']} (유사도: {job['similarity_score']:.3f})")
             print(f"   게시일: {job.get('posted_at', 'N/A')}")
-            print(f"   설명 요약: {job.get('description', '')[:200]}...")
+            print(f"   설명 요약: {(job.get('description') or '')[:200]}...")
             print("-" * 60)
     else:
         print("추천 결과가 없습니다.")
@@ -116,57 +170,93 @@ def run_pipeline(user_id, pdf_path):
             print("  → FAISS에서 유사한 채용공고를 찾지 못했습니다.")
         elif job_id_results and not recommendations:
             print("  → FAISS는 job_id를 반환했지만 DB에서 해당 공고를 찾지 못했습니다.")
+    return recommendations
 
-    # 6. CoT 분석 결과 수집
-    cot_analyses = []
+def _cot_stage(ctx):
+    # 6. CoT 분석 결과 수집 (추천 공고별 GPT 호출을 동시에 실행, 순위 순서 유지)
+    analysis, recommendations = ctx["analysis"], ctx["recommendations"]
+    cot_analyses = generate_cot_analyses(
+        recommendations,
+        skills=analysis["skills"],
+        category=analysis["category"],
+        search_query=analysis["search_query"],
+        max_concurrency=ctx.get("cot_concurrency")
+    )
     if recommendations:
         print("\n" + "="*80)
         print("추천 이유 상세 분석 (GPT Chain of Thought)")
         print("="*80)
 
-        for i, job in enumerate(recommendations, 1):
-            matched = next((j for j in job_id_results if j["job_id"] == job["job_id"]), {})
-            score = matched.get("similarity_score", 0.0)
-
+        for i, (job, cot_analysis) in enumerate(zip(recommendations, cot_analyses), 1):
             print(f"\n[추천 #{i}] {job['position_title']}")
             print("-" * 50)
-
-            cot_analysis = generate_cot_analysis(
-                user_skills=skills,
-                user_category=category,
-                job_description=job.get('description', ''),
-                job_title=job['position_title'],
-                similarity_score=score,
-                search_query=query
-            )
             print(cot_analysis)
-            cot_analyses.append(cot_analysis)
 
             if i < len(recommendations):
                 print("\n" + "="*80)
+    return cot_analyses
 
+def _store_stage(ctx):
     # 7. DB 저장
+    analysis = ctx["analysis"]
     print("\n[6] DB에 결과 저장 중...")
     resume_id = insert_to_database(
-        user_id=user_id,
-        blob_url=blob_url,
-        summary=summary,
-        skills=skills,
-        category=category,
-        job_recommendations=recommendations,
-        search_query=query,
-        cot_analyses=cot_analyses  # ✅ CoT 분석 결과 추가
+        user_id=ctx["user_id"],
+        blob_url=ctx["blob_url"],
+        summary=analysis["summary"],
+        skills=analysis["skills"],
+        category=analysis["category"],
+        job_recommendations=ctx["recommendations"],
+        search_query=analysis["search_query"],
+        cot_analyses=ctx["cot_analyses"],  # ✅ CoT 분석 결과 추가
+        sections=(analysis["strengths"], analysis["weaknesses"], analysis["improvement"])
     )
     print(f"  저장 완료. Resume ID: {resume_id}")
+    return resume_id
+
+# 단계 의존 관계: 업로드는 분석 흐름과 독립적으로 실행되고 DB 저장 단계에서만 합류한다
+PIPELINE_STAGES = [
+    Stage("blob_url", _upload_stage),
+    Stage("text", _extract_stage),
+    Stage("analysis", _analyze_stage, requires=["text"]),
+    Stage("recommendations", _search_stage, requires=["analysis"]),
+    Stage("cot_analyses", _cot_stage, requires=["analysis", "recommendations"]),
+    Stage("resume_id", _store_stage, requires=["blob_url", "analysis", "recommendations", "cot_analyses"]),
+]
+
+def run_pipeline(user_id, pdf_path, cot_concurrency=None, analysis_mode=None, stages=None):
+    print("\n이력서 자동 분석 파이프라인 시작\n")
+
+    with span("run_pipeline", user_id=user_id):
+        try:
+            results = run_stage_graph(stages or PIPELINE_STAGES, initial={
+                "user_id": user_id,
+                "pdf_path": pdf_path,
+                "cot_concurrency": cot_concurrency,
+                "analysis_mode": analysis_mode,
+            })
+        except StageError as e:
+            # 호출하는 쪽은 단계 그래프 도입 전처럼 원래 예외를 받는다 (실패 단계는 여기서 출력)
+            print(f"\n[{e.stage}] 단계 실패: {type(e.error).__name__}: {e.error}")
+            raise e.error from None
 
     print("\n전체 파이프라인 완료")
-    return resume_id
+    return results["resume_id"]
 
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument("user_id", type=int, help="사용자 ID")
     parser.add_argument("pdf_path", type=str, help="PDF 경로")
+    parser.add_argument("--cot-concurrency", type=int, default=None,
+                        help=f"CoT 분석 동시 요청 수 (기본값: {COT_MAX_CONCURRENCY})")
+    parser.add_argument("--analysis-mode", choices=["legacy", "structured"], default=None,
+                        help="legacy: 평가/검색어 2회 호출, structured: JSON 1회 호출 (기본값: RESUME_ANALYSIS_MODE)")
+    parser.add_argument("--trace", type=str, default=None, metavar="PATH",
+                        help="단계별 소요 시간을 JSON Lines 파일로 기록")
     args = parser.parse_args()
 
-    run_pipeline(args.user_id, args.pdf_path)
+    if args.trace:
+        enable_tracing(args.trace)
+    run_pipeline(args.user_id, args.pdf_path, cot_concurrency=args.cot_concurrency,
+                 analysis_mode=args.analysis_mode)
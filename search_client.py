@@ -0,0 +1,208 @@
+import os
+import time
+import random
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+# 환경 변수 로드
+load_dotenv()
+
+# 검색 서비스 HTTP 클라이언트 설정
+SEARCH_CONNECT_TIMEOUT = float(os.getenv("SEARCH_CONNECT_TIMEOUT", 3))
+SEARCH_READ_TIMEOUT = float(os.getenv("SEARCH_READ_TIMEOUT", 10))
+SEARCH_POOL_SIZE = int(os.getenv("SEARCH_POOL_SIZE", 16))  # keep-alive로 유지할 연결 수
+
+# 재시도: 최대 횟수 / 지수 백오프 기준·상한(초, full jitter) / 재시도 예산(최근 요청 대비 비율과 최소 허용 수)
+SEARCH_MAX_RETRIES = int(os.getenv("SEARCH_MAX_RETRIES", 2))
+SEARCH_RETRY_BACKOFF = float(os.getenv("SEARCH_RETRY_BACKOFF", 0.2))
+SEARCH_RETRY_BACKOFF_MAX = float(os.getenv("SEARCH_RETRY_BACKOFF_MAX", 2))
+SEARCH_RETRY_BUDGET_RATIO = float(os.getenv("SEARCH_RETRY_BUDGET_RATIO", 0.2))
+SEARCH_RETRY_BUDGET_MIN = int(os.getenv("SEARCH_RETRY_BUDGET_MIN", 5))
+SEARCH_RETRY_BUDGET_WINDOW = float(os.getenv("SEARCH_RETRY_BUDGET_WINDOW", 10))
+
+# 서킷 브레이커: 연속 실패 횟수 / 차단 유지 시간(초)
+SEARCH_CIRCUIT_FAILURES = int(os.getenv("SEARCH_CIRCUIT_FAILURES", 5))
+SEARCH_CIRCUIT_RESET_TIMEOUT = float(os.getenv("SEARCH_CIRCUIT_RESET_TIMEOUT", 30))
+
+# 재시도할 응답 상태 코드
+RETRYABLE_STATUS = {429, 502, 503, 504}
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """서킷 브레이커가 열려 있어 요청을 보내지 않음"""
+
+
+class RetryBudget:
+    """
+    최근 window초 동안의 요청 수 대비 재시도 수를 제한
+    (서비스 장애 시 모든 요청이 재시도하며 부하를 몇 배로 키우는 것을 막음)
+    """
+
+    def __init__(self, ratio=None, min_retries=None, window=None):
+        self.ratio = SEARCH_RETRY_BUDGET_RATIO if ratio is None else ratio
+        self.min_retries = SEARCH_RETRY_BUDGET_MIN if min_retries is None else min_retries
+        self.window = window or SEARCH_RETRY_BUDGET_WINDOW
+        self._requests = deque()
+        self._retries = deque()
+        self._lock = threading.Lock()
+
+    def _trim(self, now):
+        for events in (self._requests, self._retries):
+            while events and now - events[0] > self.window:
+                events.popleft()
+
+    def record_request(self):
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            self._requests.append(now)
+
+    def try_acquire(self):
+        """재시도 가능하면 True (재시도 1회를 예산에서 차감)"""
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            if len(self._retries) >= self.min_retries + self.ratio * len(self._requests):
+                return False
+            self._retries.append(now)
+            return True
+
+
+class CircuitBreaker:
+    """
+    연속 failure_threshold번 실패하면 reset_timeout초 동안 요청을 즉시 거부(open)하고,
+    그 뒤 한 요청만 시험적으로 보내(half-open) 성공하면 다시 닫는다
+    """
+
+    def __init__(self, failure_threshold=None, reset_timeout=None):
+        self.failure_threshold = failure_threshold or SEARCH_CIRCUIT_FAILURES
+        self.reset_timeout = SEARCH_CIRCUIT_RESET_TIMEOUT if reset_timeout is None else reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._trial_in_flight = False
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                if self.state != "open":
+                    logging.warning(f"[{datetime.now()}] 검색 서비스 서킷 브레이커 열림 "
+                                    f"({self._failures}회 연속 실패, {self.reset_timeout:.0f}초간 요청 차단)\n")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+class SearchClient:
+    """
+    검색 서비스용 HTTP 클라이언트
+    - requests.Session으로 연결을 재사용 (keep-alive, 스레드 간 공유)
+    - 연결/응답 타임아웃
+    - 연결 오류, 타임아웃, 응답 본문 끊김, 429/5xx 응답은 지수 백오프 + jitter로 재시도 (재시도 예산 안에서만)
+    - 연속 실패 시 서킷 브레이커가 열려 CircuitOpenError로 즉시 실패
+    재시도 대상이 아닌 응답(예: 404)은 그대로 반환하므로 상태 코드 처리는 호출하는 쪽 몫이다
+    """
+
+    def __init__(self, connect_timeout=None, read_timeout=None, max_retries=None,
+                 retry_budget=None, circuit_breaker=None, pool_size=None):
+        self.timeout = (connect_timeout or SEARCH_CONNECT_TIMEOUT, read_timeout or SEARCH_READ_TIMEOUT)
+        self.max_retries = SEARCH_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_budget = retry_budget or RetryBudget()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+
+        pool_size = pool_size or SEARCH_POOL_SIZE
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _backoff(self, attempt, response=None):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), SEARCH_RETRY_BACKOFF_MAX)
+            except ValueError:
+                pass
+        return random.uniform(0, min(SEARCH_RETRY_BACKOFF_MAX, SEARCH_RETRY_BACKOFF * 2 ** attempt))
+
+    def post(self, url, payload):
+        if not self.circuit_breaker.allow():
+            raise CircuitOpenError(f"검색 서비스 서킷 브레이커가 열려 있습니다: {url}")
+        self.retry_budget.record_request()
+
+        attempt = 0
+        while True:
+            response, error = None, None
+            try:
+                response = self.session.post(url, json=payload, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError) as e:
+                error = e
+            except BaseException:
+                # 재시도하지 않는 오류도 실패로 기록해야 half-open 시험 요청이 결과 없이 남지 않는다
+                self.circuit_breaker.record_failure()
+                raise
+
+            if error is None and response.status_code not in RETRYABLE_STATUS:
+                # 4xx는 서비스가 응답하고 있다는 뜻이므로 서킷 브레이커에는 성공으로 기록
+                if response.status_code >= 500:
+                    self.circuit_breaker.record_failure()
+                else:
+                    self.circuit_breaker.record_success()
+                return response
+
+            if attempt >= self.max_retries or not self.retry_budget.try_acquire():
+                self.circuit_breaker.record_failure()
+                if error is not None:
+                    raise error
+                return response
+
+            delay = self._backoff(attempt, response)
+            if response is not None:
+                response.close()
+            logging.debug(f"검색 요청 재시도 {attempt + 1}/{self.max_retries} ({delay:.2f}초 후): "
+                          f"{error or response.status_code}")
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self):
+        self.session.close()
+
+
+_search_client = None
+_client_lock = threading.Lock()
+
+
+def get_search_client():
+    """프로세스에서 공유하는 SearchClient (처음 사용할 때 생성)"""
+    global _search_client
+    if _search_client is None:
+        with _client_lock:
+            if _search_client is None:
+                _search_client = SearchClient()
+    return _search_client
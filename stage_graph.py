@@ -0,0 +1,95 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from tracing import span
+
+
+class Stage:
+    """
+    파이프라인 단계 선언
+    - name: 결과가 저장될 이름
+    - func: 결과 dict(선행 단계 결과 + 초기 입력)를 받아 이 단계의 결과를 반환
+    - requires: 먼저 끝나야 하는 단계 이름 목록
+    """
+
+    def __init__(self, name, func, requires=()):
+        self.name = name
+        self.func = func
+        self.requires = tuple(requires)
+
+    def __repr__(self):
+        return f"Stage({self.name!r}, requires={list(self.requires)})"
+
+
+class StageError(Exception):
+    """단계 실행 중 발생한 예외 (stage 속성에 실패한 단계 이름)"""
+
+    def __init__(self, stage, error):
+        super().__init__(f"[{stage}] {type(error).__name__}: {error}")
+        self.stage = stage
+        self.error = error
+
+
+def _validate(stages, initial):
+    names = [stage.name for stage in stages]
+    if len(set(names)) != len(names):
+        raise ValueError(f"중복된 단계 이름이 있습니다: {names}")
+    known = set(names) | set(initial)
+    for stage in stages:
+        missing = [dep for dep in stage.requires if dep not in known]
+        if missing:
+            raise ValueError(f"{stage.name} 단계의 선행 단계가 없습니다: {missing}")
+
+    # 위상 정렬로 순환 의존 검사
+    remaining = {stage.name: set(stage.requires) - set(initial) for stage in stages}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"단계 간 순환 의존이 있습니다: {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+def _run_stage(stage, ctx):
+    with span(f"stage.{stage.name}"):
+        return stage.func(ctx)
+
+
+def run_stage_graph(stages, initial=None, max_workers=None):
+    """
+    선행 단계가 모두 끝난 단계부터 스레드 풀에서 바로 실행한다.
+    서로 의존하지 않는 단계(예: Blob 업로드와 텍스트 추출/분석)는 동시에 진행된다.
+    한 단계라도 실패하면 아직 시작하지 않은 단계는 실행하지 않고 StageError를 발생시킨다.
+    반환값: 초기 입력과 모든 단계 결과가 담긴 dict
+    """
+    results = dict(initial or {})
+    _validate(stages, results)
+
+    pending = list(stages)
+    running = {}  # future -> stage name
+    error = None
+
+    with ThreadPoolExecutor(max_workers=max_workers or max(1, len(stages))) as executor:
+        while pending or running:
+            if error is None:
+                for stage in [s for s in pending if all(dep in results for dep in s.requires)]:
+                    pending.remove(stage)
+                    # 각 단계에는 그 시점까지의 결과 스냅샷을 넘긴다 (계측 컨텍스트도 함께 전달)
+                    future = executor.submit(contextvars.copy_context().run, _run_stage, stage, dict(results))
+                    running[future] = stage.name
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    if error is None:
+                        error = StageError(name, e)
+
+    if error is not None:
+        raise error from error.error
+    return results
@@ -1,8 +1,9 @@
 import os
-import pymysql
 import json
 from datetime import datetime
 from dotenv import load_dotenv
+from db_pool import get_pool
+from tracing import traced
 from resume_analysis import parse_resume_sections  # 🔥 GPT 평가 텍스트에서 강점/약점/개선점 파싱
 
 # 환경 변수 로드
@@ -18,6 +19,28 @@ DB_CONFIG = {
     "charset": "utf8mb4"
 }
 
+RESUME_INSERT_QUERY = """
+    INSERT INTO Resume (user_id, file_path, blob_url, parsed_json, uploaded_at)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+EVAL_INSERT_QUERY = """
+    INSERT INTO ResumeEvalResult (
+        resume_id, evaluation_summary, strengths, weaknesses, improvement,
+        skills_inferred, job_category_inferred, search_query
+    )
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+RECOMMENDATION_INSERT_QUERY = """
+    INSERT INTO JobRecommendation (
+        user_id, resume_id, job_id, score, `rank`, recommended_reason, recommended_at
+    )
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+@traced()
 def insert_to_database(
     user_id,
     blob_url,
@@ -26,73 +49,98 @@ def insert_to_database(
     category,
     job_recommendations,
     search_query=None,
-    cot_analyses=None
+    cot_analyses=None,
+    sections=None
 ):
     """
     분석 결과를 Resume, ResumeEvalResult, JobRecommendation 테이블에 저장
+    sections: (강점, 약점, 개선점) - 구조화 분석 결과가 있으면 리포트 정규식 파싱 대신 사용
     """
+    resume_id = insert_many_to_database([{
+        "user_id": user_id,
+        "blob_url": blob_url,
+        "summary": summary,
+        "skills": skills,
+        "category": category,
+        "job_recommendations": job_recommendations,
+        "search_query": search_query,
+        "cot_analyses": cot_analyses,
+        "sections": sections,
+    }])[0]
+    print(f"  Resume 저장 완료: ID {resume_id}")
+    print(f"  추천 결과 {len(job_recommendations) if job_recommendations else 0}개 저장 완료")
+    return resume_id
+
+
+@traced()
+def insert_many_to_database(records):
+    """
+    여러 이력서의 분석 결과를 하나의 트랜잭션으로 저장하고 resume_id 리스트를 반환
+    records: insert_to_database 인자와 같은 키를 가진 dict 리스트
+    Resume은 resume_id(lastrowid)가 필요해 건별로, ResumeEvalResult/JobRecommendation은
+    전체를 executemany 한 번씩으로 삽입한다.
+    """
+    if not records:
+        return []
+
+    now = datetime.now()
+    resume_ids = []
+    eval_rows = []
+    recommendation_rows = []
+
     try:
-        connection = pymysql.connect(**DB_CONFIG)
-        with connection.cursor() as cursor:
-            # -----------------------------
-            # 1. Resume 테이블 삽입
-            # -----------------------------
-            analysis_data = {
-                "summary": summary,
-                "skills": skills if isinstance(skills, list) else [skills] if skills else [],
-                "category": category,
-                "analysis_timestamp": datetime.now().isoformat()
-            }
-
-            file_path = blob_url or f"resume_{user_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-
-            cursor.execute("""
-                INSERT INTO Resume (user_id, file_path, blob_url, parsed_json, uploaded_at)
-                VALUES (%s, %s, %s, %s, %s)
-            """, (
-                user_id,
-                file_path,
-                blob_url,
-                json.dumps(analysis_data, ensure_ascii=False),
-                datetime.now()
-            ))
-
-            resume_id = cursor.lastrowid
+        with get_pool(DB_CONFIG).connection() as connection, connection.cursor() as cursor:
+            for record in records:
+                user_id = record["user_id"]
+                blob_url = record.get("blob_url")
+                summary = record["summary"]
+                skills = record.get("skills")
+                category = record.get("category")
+                job_recommendations = record.get("job_recommendations")
+                cot_analyses = record.get("cot_analyses")
 
-            # -----------------------------
-            # 2. ResumeEvalResult 테이블 삽입
-            # -----------------------------
-            strengths, weaknesses, improvement = parse_resume_sections(summary)
-
-            cursor.execute("""
-                INSERT INTO ResumeEvalResult (
-                    resume_id, evaluation_summary, strengths, weaknesses, improvement,
-                    skills_inferred, job_category_inferred, search_query
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                resume_id,
-                summary,
-                strengths,
-                weaknesses,
-                improvement,
-                json.dumps(skills, ensure_ascii=False),
-                category,
-                search_query or ""
-            ))
+                # -----------------------------
+                # 1. Resume 테이블 삽입
+                # -----------------------------
+                analysis_data = {
+                    "summary": summary,
+                    "skills": skills if isinstance(skills, list) else [skills] if skills else [],
+                    "category": category,
+                    "analysis_timestamp": now.isoformat()
+                }
 
-            # -----------------------------
-            # 3. JobRecommendation 테이블 삽입
-            # -----------------------------
-            if job_recommendations:
-                recommendation_query = """
-                    INSERT INTO JobRecommendation (
-                        user_id, resume_id, job_id, score, `rank`, recommended_reason, recommended_at
-                    )
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """
-
-                for rank, job in enumerate(job_recommendations, start=1):
+                file_path = blob_url or f"resume_{user_id}_{now.strftime('%Y%m%d_%H%M%S')}.pdf"
+
+                cursor.execute(RESUME_INSERT_QUERY, (
+                    user_id,
+                    file_path,
+                    blob_url,
+                    json.dumps(analysis_data, ensure_ascii=False),
+                    now
+                ))
+
+                resume_id = cursor.lastrowid
+                resume_ids.append(resume_id)
+
+                # -----------------------------
+                # 2. ResumeEvalResult 행 준비
+                # -----------------------------
+                strengths, weaknesses, improvement = record.get("sections") or parse_resume_sections(summary)
+                eval_rows.append((
+                    resume_id,
+                    summary,
+                    strengths,
+                    weaknesses,
+                    improvement,
+                    json.dumps(skills, ensure_ascii=False),
+                    category,
+                    record.get("search_query") or ""
+                ))
+
+                # -----------------------------
+                # 3. JobRecommendation 행 준비
+                # -----------------------------
+                for rank, job in enumerate(job_recommendations or [], start=1):
                     if isinstance(job, dict):
                         job_id = job.get('job_id')
                         score = job.get('similarity_score', 0.0)
@@ -102,29 +150,20 @@ def insert_to_database(
 
                     if job_id:
                         reason = cot_analyses[rank - 1] if cot_analyses and len(cot_analyses) >= rank else None
-                        cursor.execute(recommendation_query, (
-                            user_id,
-                            resume_id,
-                            job_id,
-                            score,
-                            rank,
-                            reason,
-                            datetime.now()
-                        ))
+                        recommendation_rows.append((user_id, resume_id, job_id, score, rank, reason, now))
+
+            # pymysql은 INSERT ... VALUES 형태의 executemany를 다중 행 INSERT로 묶어 전송
+            cursor.executemany(EVAL_INSERT_QUERY, eval_rows)
+            if recommendation_rows:
+                cursor.executemany(RECOMMENDATION_INSERT_QUERY, recommendation_rows)
 
             # -----------------------------
             # COMMIT & 반환
             # -----------------------------
             connection.commit()
-            print(f"  Resume 저장 완료: ID {resume_id}")
-            print(f"  추천 결과 {len(job_recommendations) if job_recommendations else 0}개 저장 완료")
-            return resume_id
+            return resume_ids
 
     except Exception as e:
+        # 롤백은 커넥션 풀 반납 시 처리됨
         print(f"DB 저장 중 오류 발생: {str(e)}")
-        if 'connection' in locals():
-            connection.rollback()
         raise
-    finally:
-        if 'connection' in locals() and connection:
-            connection.close()
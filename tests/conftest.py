@@ -0,0 +1,24 @@
+import os
+import sys
+
+# 저장소 최상위 모듈(resume_pipeline.py 등)을 테스트에서 바로 import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+import pytest
+
+
+@pytest.fixture
+def openai_stub(monkeypatch):
+    """로컬 OpenAI 호환 스텁에 연결된 GPT 게이트웨이 (재시도/한도 없음)"""
+    from openai import AzureOpenAI
+    import llm_gateway
+    import local_stubs
+
+    stub = local_stubs.start_openai_stub()
+    client = AzureOpenAI(api_key="test", api_version="2024-02-15-preview", azure_endpoint=stub.url, max_retries=0)
+    monkeypatch.setattr(llm_gateway, "_client", client)
+    monkeypatch.setattr(llm_gateway, "gateway",
+                        llm_gateway.LLMGateway(limiter=llm_gateway.RateLimiter(rpm=0, tpm=0), max_retries=0))
+    yield stub
+    stub.stop()
@@ -0,0 +1,40 @@
+import pytest
+import requests
+
+import batch_pipeline
+
+ANALYSIS = {"summary": "s", "skills": ["Python"], "category": "백엔드", "search_query": "python",
+            "strengths": "", "weaknesses": "", "improvement": ""}
+
+
+@pytest.fixture
+def stub_pipeline(monkeypatch):
+    monkeypatch.setattr(batch_pipeline, "BATCH_EXTRACT_ISOLATED", False)
+    monkeypatch.setattr(batch_pipeline, "upload_pdf_to_blob", lambda path, user_id: f"blob://{user_id}")
+    monkeypatch.setattr(batch_pipeline, "extract_text_from_pdf", lambda path: "Python 개발자")
+    monkeypatch.setattr(batch_pipeline, "analyze_resume", lambda text: dict(ANALYSIS))
+    monkeypatch.setattr(batch_pipeline, "generate_cot_analyses", lambda recs, **kwargs: ["이유"] * len(recs))
+    saved = []
+    monkeypatch.setattr(batch_pipeline, "insert_many_to_database",
+                        lambda records: saved.extend(records) or list(range(1, len(records) + 1)))
+    return saved
+
+
+def _fail_search(query, top_k=3, raise_errors=False):
+    assert raise_errors
+    raise requests.exceptions.ConnectionError("search down")
+
+
+@pytest.mark.parametrize("search_batch_size", [1, 4])
+def test_failed_search_is_not_checkpointed_as_success(tmp_path, monkeypatch, stub_pipeline, search_batch_size):
+    monkeypatch.setattr(batch_pipeline, "search_faiss_job_ids", _fail_search)
+    monkeypatch.setattr(batch_pipeline, "search_faiss_job_ids_batch",
+                        lambda queries, top_k=3, raise_errors=False: _fail_search(None, top_k, raise_errors))
+    checkpoint = str(tmp_path / "checkpoint.jsonl")
+
+    results = batch_pipeline.run_batch([(1, "a.pdf")], checkpoint_path=checkpoint,
+                                       search_batch_size=search_batch_size)
+
+    assert [result["status"] for result in results] == ["failed"]
+    assert stub_pipeline == []
+    assert batch_pipeline.load_checkpoint(checkpoint) == set()
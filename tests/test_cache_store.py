@@ -0,0 +1,26 @@
+import time
+
+from cache_store import MISS, SQLiteCache
+
+
+def test_sqlite_cache_keeps_at_most_max_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr(SQLiteCache, "CLEANUP_INTERVAL", 10)
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), max_entries=5)
+    for i in range(30):
+        cache.set(f"k{i}", i)
+
+    count, = cache._connection().execute(f"SELECT COUNT(*) FROM {cache.table}").fetchone()
+    assert count <= 5
+    assert cache.get("k29") == 29
+    assert cache.get("k0") is MISS
+
+
+def test_sqlite_cache_purges_expired_entries_on_open(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = SQLiteCache(path, ttl=0.01)
+    cache.set("old", 1)
+    time.sleep(0.05)
+
+    reopened = SQLiteCache(path, ttl=0.01)
+    count, = reopened._connection().execute(f"SELECT COUNT(*) FROM {reopened.table}").fetchone()
+    assert count == 0
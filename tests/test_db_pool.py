@@ -0,0 +1,55 @@
+import pytest
+
+from db_pool import ConnectionPool
+
+
+class FakeConnection:
+    def __init__(self, **config):
+        self.rollbacks = 0
+        self.open = True
+
+    def cursor(self):
+        return object()
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def ping(self, reconnect=False):
+        pass
+
+    def close(self):
+        self.open = False
+
+
+def _pool(**options):
+    return ConnectionPool({"database": "test"}, min_size=0, max_size=1, connect=FakeConnection, **options)
+
+
+def test_release_after_commit_skips_rollback():
+    pool = _pool()
+    with pool.connection() as conn:
+        conn.cursor()
+        conn.commit()
+    assert conn.raw.rollbacks == 0
+
+
+def test_release_after_read_rolls_back():
+    pool = _pool()
+    with pool.connection() as conn:
+        conn.cursor()
+    assert conn.raw.rollbacks == 1
+
+
+def test_interrupted_block_frees_the_slot():
+    pool = _pool(checkout_timeout=0.1)
+    with pytest.raises(KeyboardInterrupt):
+        with pool.connection() as conn:
+            raise KeyboardInterrupt
+    assert not conn.raw.open
+    assert pool.metrics()["size"] == 0
+    # max_size=1이어도 자리가 반납되었으므로 다시 대여할 수 있다
+    with pool.connection():
+        pass
@@ -0,0 +1,50 @@
+import gzip
+import json
+from datetime import datetime
+
+import pytest
+
+from export_from_db import EXPORTS, JsonLinesWriter, _json_text, parse_args
+
+
+@pytest.mark.parametrize("value, expected", [
+    ('["Python", "SQL"]', ["Python", "SQL"]),
+    ('{"summary": "s"}', {"summary": "s"}),
+    ("node.js, react", "node.js, react"),
+    ("true story", "true story"),
+    ("2021", 2021),
+    ("-", "-"),
+    ("", ""),
+])
+def test_json_text_is_always_valid_json(value, expected):
+    assert json.loads(_json_text(value)) == expected
+
+
+def test_jsonl_writer_writes_valid_lines(tmp_path):
+    path = tmp_path / "evaluations.jsonl.gz"
+    columns = EXPORTS["evaluations"]["columns"]
+    writer = JsonLinesWriter(str(path), columns)
+    writer.write_rows([
+        (1, 7, "요약", "강점", "약점", "개선", "node.js, react", "백엔드", "python", datetime(2024, 1, 1)),
+        (2, 8, None, None, None, None, '["Python"]', None, "", datetime(2024, 1, 2)),
+    ])
+    writer.close()
+
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    assert rows[0]["skills_inferred"] == "node.js, react"
+    assert rows[0]["uploaded_at"] == "2024-01-01T00:00:00"
+    assert rows[1]["skills_inferred"] == ["Python"]
+    assert rows[1]["evaluation_summary"] is None
+
+
+def test_parse_args_defaults_to_all_tables():
+    assert parse_args([]).tables == list(EXPORTS)
+    args = parse_args(["--incremental"])
+    assert args.incremental and args.tables == list(EXPORTS)
+    assert parse_args(["evaluations"]).tables == ["evaluations"]
+
+
+def test_parse_args_rejects_unknown_table():
+    with pytest.raises(SystemExit):
+        parse_args(["unknown"])
@@ -0,0 +1,37 @@
+import threading
+
+from llm_gateway import BATCH, INTERACTIVE, RateLimiter, TokenBucket
+
+
+def _acquire_within(limiter, tokens, level, timeout=2.0):
+    """acquire가 timeout 안에 끝나면 대기 시간을, 아니면 None을 반환"""
+    result = []
+    thread = threading.Thread(target=lambda: result.append(limiter.acquire(tokens, level)), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    return result[0] if result else None
+
+
+def test_shortfall_is_zero_on_full_bucket_with_reserve():
+    bucket = TokenBucket(12, burst_seconds=5)  # capacity 1.0
+    assert bucket.capacity == 1.0
+    assert bucket.shortfall(1, reserve=0.2) == 0.0
+
+
+def test_batch_acquire_does_not_hang_with_small_rpm():
+    limiter = RateLimiter(rpm=12, tpm=0, interactive_reserve=0.2)
+    assert _acquire_within(limiter, 100, BATCH) is not None
+
+
+def test_batch_acquire_larger_than_unreserved_share():
+    # capacity 5000 토큰, evaluate_resume 정도(7000 토큰 추정) 요청
+    limiter = RateLimiter(rpm=0, tpm=60000, interactive_reserve=0.2)
+    assert _acquire_within(limiter, 7000, BATCH) is not None
+
+
+def test_batch_keeps_reserve_for_interactive():
+    limiter = RateLimiter(rpm=0, tpm=60000, interactive_reserve=0.2)
+    assert _acquire_within(limiter, 3000, BATCH) is not None
+    # 남은 2000 중 1000을 쓰면 reserve(1000) 아래로 내려가므로 batch는 기다려야 한다
+    assert limiter.tokens.shortfall(1500, reserve=0.2) > 0
+    assert _acquire_within(limiter, 1500, INTERACTIVE) is not None
@@ -0,0 +1,87 @@
+import time
+
+import pytest
+
+import pipeline_server
+
+
+@pytest.fixture
+def input_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline_server, "SERVICE_INPUT_DIR", str(tmp_path / "inputs"))
+    (tmp_path / "inputs").mkdir()
+    (tmp_path / "inputs" / "resume.pdf").write_bytes(b"%PDF-1.7\n")
+    (tmp_path / "inputs" / "notes.txt").write_text("secret")
+    (tmp_path / ".env").write_text("KEY=secret")
+    return tmp_path / "inputs"
+
+
+def test_resolves_pdf_under_input_dir(input_dir):
+    assert pipeline_server._resolve_input_path("resume.pdf") == str(input_dir / "resume.pdf")
+
+
+@pytest.mark.parametrize("path", ["../.env", "/etc/passwd", "notes.txt", "missing.pdf", ""])
+def test_rejects_paths_outside_input_dir_or_non_pdf(input_dir, path):
+    with pytest.raises(ValueError):
+        pipeline_server._resolve_input_path(path)
+
+
+def test_path_submission_disabled_without_input_dir(monkeypatch):
+    monkeypatch.setattr(pipeline_server, "SERVICE_INPUT_DIR", "")
+    with pytest.raises(ValueError):
+        pipeline_server._resolve_input_path("resume.pdf")
+
+
+@pytest.fixture
+def server(input_dir):
+    import threading
+    from http.server import ThreadingHTTPServer
+
+    service = pipeline_server.PipelineService(workers=1, queue_size=1)
+    handler = type("Handler", (pipeline_server.PipelineRequestHandler,), {"service": service})
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _post(server, body):
+    import http.client
+    import json
+
+    connection = http.client.HTTPConnection(*server.server_address, timeout=5)
+    connection.request("POST", "/jobs", body=body, headers={"Content-Type": "application/json"})
+    response = connection.getresponse()
+    payload = json.loads(response.read())
+    connection.close()
+    return response.status, payload
+
+
+@pytest.mark.parametrize("body", [b'[1, 2]', b'"resume.pdf"', b'42', b'{"user_id": 1, "pdf_path": 3}'])
+def test_non_object_json_body_is_rejected(server, body):
+    status, payload = _post(server, body)
+    assert status == 400
+    assert "error" in payload
+
+
+def test_stop_does_not_hang_on_full_queue(monkeypatch, input_dir):
+    import threading
+
+    service = pipeline_server.PipelineService(workers=2, queue_size=1)
+    release = threading.Event()
+    monkeypatch.setattr("resume_pipeline.run_pipeline", lambda *args, **kwargs: release.wait(5))
+    service.start()
+    for _ in range(2):
+        service.submit(1, str(input_dir / "resume.pdf"))
+        while service.stats()["queue_depth"]:
+            time.sleep(0.01)
+    service.submit(1, str(input_dir / "resume.pdf"))  # 두 워커가 실행 중이고 대기열(1건)이 가득 찬 상태
+
+    stopper = threading.Thread(target=service.stop, daemon=True)
+    stopper.start()
+    time.sleep(0.2)
+    release.set()
+    stopper.join(5)
+    assert not stopper.is_alive()
+    assert service.stats()["jobs"] == {"succeeded": 3}
@@ -0,0 +1,56 @@
+import numpy as np
+
+from refresh_recommendations import may_change, plan_refresh
+
+PROFILE = {"resume_id": 1, "user_id": 1, "search_query": "백엔드 Python", "skills": ["Python"], "category": "백엔드 개발자"}
+
+
+def _job(job_id, title="백엔드 개발자", description="Python"):
+    return {"job_id": job_id, "position_title": title, "description": description, "posted_at": "2024-01-01T00:00:00"}
+
+
+def _current(*job_ids):
+    return [{"recommendation_id": 100 + i, "job_id": job_id, "score": 0.0, "rank": i + 1}
+            for i, job_id in enumerate(job_ids)]
+
+
+def test_no_change_when_new_postings_score_lower_on_same_embedding():
+    details = {job_id: _job(job_id) for job_id in (1, 2, 3)}
+    # 저장된 score(0.0)가 아니라 같은 임베딩으로 계산한 유사도로 비교해야 한다
+    existing = {1: 0.9, 2: 0.85, 3: 0.8}
+    postings = [dict(_job(10), posted_at=None), dict(_job(11), posted_at=None)]
+    plan = plan_refresh(PROFILE, _current(1, 2, 3), details, existing, postings, np.array([0.3, 0.2]))
+    assert plan is None
+
+
+def test_new_posting_that_outranks_existing_is_planned():
+    details = {job_id: _job(job_id) for job_id in (1, 2, 3)}
+    existing = {1: 0.9, 2: 0.5, 3: 0.4}
+    postings = [dict(_job(10), posted_at=None), dict(_job(11), posted_at=None)]
+    plan = plan_refresh(PROFILE, _current(1, 2, 3), details, existing, postings, np.array([0.95, 0.1]), now=None)
+    assert [job["job_id"] for job in plan["entered"]] == [10]
+    assert plan["dropped"] == [102]
+    assert [job["job_id"] for job in plan["ranked"]][0] == 10
+
+
+def test_missing_job_details_never_drop_recommendations():
+    postings = [dict(_job(500), posted_at=None)]
+    plan = plan_refresh(PROFILE, _current(1, 2, 3), {}, {}, postings, np.array([0.01]))
+    assert plan is None
+
+
+def test_kept_recommendations_are_rescored_on_the_same_scale():
+    details = {job_id: _job(job_id) for job_id in (1, 2, 3)}
+    existing = {1: 0.9, 2: 0.5, 3: 0.4}
+    postings = [dict(_job(10), posted_at=None)]
+    plan = plan_refresh(PROFILE, _current(1, 2, 3), details, existing, postings, np.array([0.95]))
+    assert sorted(plan["kept"]) == [(2, 0.9, 100), (3, 0.5, 101)]
+
+
+def test_profiles_far_below_existing_recommendations_are_skipped():
+    current = _current(1, 2, 3)
+    assert not may_change(current, 0.3, cutoff=0.8)
+    assert may_change(current, 0.78, cutoff=0.8)
+    # 캐시된 기준값이 없거나 추천이 모자라면 확인 필요
+    assert may_change(current, 0.3, cutoff=None)
+    assert may_change(current[:1], 0.3, cutoff=0.8)
@@ -0,0 +1,19 @@
+import pytest
+
+from reranker import _contains_matrix
+
+
+@pytest.mark.parametrize("term, text, expected", [
+    ("java", "javascript 프론트엔드 개발", False),
+    ("java", "java/spring 백엔드", True),
+    ("c", "c++ 게임 서버 개발", False),
+    ("c", "c# .net 개발", False),
+    ("c", "임베디드 c 개발", True),
+    ("r", "react 및 redux 경험", False),
+    ("r", "통계 분석(r, python)", True),
+    ("c++", "c++ 게임 서버 개발", True),
+    ("node.js", "node.js 기반 api", True),
+    ("파이썬", "파이썬을 활용한 데이터 처리", True),
+])
+def test_skill_terms_match_whole_words(term, text, expected):
+    assert bool(_contains_matrix([text], [term])[0, 0]) is expected
@@ -0,0 +1,18 @@
+from resume_analysis import analyze_resume
+
+
+def test_structured_mode_returns_json_fields(openai_stub):
+    result = analyze_resume("Python 백엔드 개발자 이력서", mode="structured", use_cache=False)
+    assert result["skills"] and result["search_query"]
+    assert openai_stub.requests == 1
+
+
+def test_structured_mode_falls_back_when_response_format_is_rejected(openai_stub):
+    # JSON 모드를 지원하지 않는 배포는 400(BadRequestError)을 반환한다
+    openai_stub.json_mode = False
+    result = analyze_resume("Python 백엔드 개발자 이력서", mode="structured", use_cache=False)
+
+    assert result["summary"].startswith("1. 강점")
+    assert result["skills"] and result["search_query"]
+    # 거부된 구조화 요청 1회 + 기존 방식(평가, 검색어) 2회
+    assert openai_stub.requests == 3
@@ -0,0 +1,58 @@
+import time
+
+from resume_pipeline import generate_cot_analyses, generate_cot_analysis
+
+RECOMMENDATIONS = [
+    {"job_id": i, "position_title": f"백엔드 개발자 {i}", "description": f"Python 공고 {i}", "similarity_score": 0.9 - i / 10}
+    for i in range(4)
+]
+
+
+def _generate(**kwargs):
+    return generate_cot_analyses(RECOMMENDATIONS, ["Python"], "백엔드 개발자", "백엔드 Python", **kwargs)
+
+
+def test_concurrent_cot_keeps_recommendation_order(openai_stub):
+    sequential = _generate(max_concurrency=1)
+
+    openai_stub.latency, openai_stub.jitter = 0.05, 0.2  # 응답이 요청 순서와 다르게 끝나도록
+    concurrent = _generate(max_concurrency=4)
+    assert concurrent == sequential
+    assert not any(text.startswith("GPT 분석 생성 중 오류") for text in concurrent)
+
+
+def test_cot_calls_run_concurrently(openai_stub):
+    openai_stub.latency = 0.3
+    started = time.perf_counter()
+    results = _generate(max_concurrency=4)
+    elapsed = time.perf_counter() - started
+    assert len(results) == 4
+    assert elapsed < 0.3 * 4 * 0.6  # 순차 실행(1.2초)보다 확실히 빠름
+    assert openai_stub.requests == 4
+
+
+def test_cot_timeout_returns_error_per_call(openai_stub):
+    openai_stub.latency = 2.0
+    started = time.perf_counter()
+    results = _generate(max_concurrency=4, timeout=0.3)
+    elapsed = time.perf_counter() - started
+    assert elapsed < 1.5
+    assert len(results) == 4
+    assert all(text.startswith("GPT 분석 생성 중 오류") for text in results)
+
+
+def test_cot_timeout_covers_gateway_retries(openai_stub, monkeypatch):
+    import llm_gateway
+
+    # 재시도를 켜도 호출 하나가 timeout을 넘기지 않아야 한다 (시도당 timeout × 재시도 횟수가 아님)
+    monkeypatch.setattr(llm_gateway, "gateway",
+                        llm_gateway.LLMGateway(limiter=llm_gateway.RateLimiter(rpm=0, tpm=0), max_retries=4))
+    monkeypatch.setattr(llm_gateway, "LLM_BACKOFF_BASE", 0.05)
+    openai_stub.latency = 2.0
+    job = RECOMMENDATIONS[0]
+    started = time.perf_counter()
+    result = generate_cot_analysis(["Python"], "백엔드 개발자", job["description"], job["position_title"],
+                                   job["similarity_score"], "백엔드 Python", timeout=0.4)
+    elapsed = time.perf_counter() - started
+    assert elapsed < 0.4 * 2
+    assert result.startswith("GPT 분석 생성 중 오류")
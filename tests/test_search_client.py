@@ -0,0 +1,108 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from search_client import CircuitBreaker, CircuitOpenError, RetryBudget, SearchClient
+
+
+class FakeSearchServer(ThreadingHTTPServer):
+    """responses에 넣은 (상태 코드, 지연 초)를 차례로 돌려주고, 다 쓰면 200을 반환"""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.responses = []
+        self.calls = 0
+        self.url = f"http://127.0.0.1:{self.server_address[1]}/search"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        server = self.server
+        server.calls += 1
+        status, delay = server.responses.pop(0) if server.responses else (200, 0)
+        if delay:
+            time.sleep(delay)
+        body = json.dumps({"results": [{"job_id": 1, "similarity_score": 0.9}]}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    server = FakeSearchServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _client(**kwargs):
+    kwargs.setdefault("retry_budget", RetryBudget(ratio=1.0, min_retries=100))
+    kwargs.setdefault("circuit_breaker", CircuitBreaker(failure_threshold=2, reset_timeout=0.2))
+    return SearchClient(connect_timeout=1, **kwargs)
+
+
+def test_retries_retryable_status_then_succeeds(server, monkeypatch):
+    monkeypatch.setattr("search_client.SEARCH_RETRY_BACKOFF", 0.01)
+    server.responses = [(503, 0), (502, 0)]
+    response = _client(max_retries=2).post(server.url, {"query": "python"})
+    assert response.status_code == 200
+    assert server.calls == 3
+
+
+def test_read_timeout_raises_after_retries(server, monkeypatch):
+    monkeypatch.setattr("search_client.SEARCH_RETRY_BACKOFF", 0.01)
+    server.responses = [(200, 0.5), (200, 0.5)]
+    client = _client(read_timeout=0.1, max_retries=1)
+    with pytest.raises(requests.exceptions.Timeout):
+        client.post(server.url, {"query": "python"})
+    assert server.calls == 2
+
+
+def test_circuit_opens_and_recovers(server):
+    server.responses = [(500, 0), (500, 0)]
+    client = _client(max_retries=0)
+    assert client.post(server.url, {}).status_code == 500
+    assert client.post(server.url, {}).status_code == 500
+    assert client.circuit_breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        client.post(server.url, {})
+    assert server.calls == 2
+
+    time.sleep(0.25)
+    assert client.post(server.url, {}).status_code == 200
+    assert client.circuit_breaker.state == "closed"
+
+
+def test_half_open_trial_with_unexpected_error_does_not_stick(server, monkeypatch):
+    client = _client(max_retries=0)
+    breaker = client.circuit_breaker
+    breaker.record_failure()
+    breaker.record_failure()
+    time.sleep(0.25)
+
+    def broken_post(*args, **kwargs):
+        raise requests.exceptions.ContentDecodingError("bad gzip")
+
+    monkeypatch.setattr(client.session, "post", broken_post)
+    with pytest.raises(requests.exceptions.ContentDecodingError):
+        client.post(server.url, {})
+    assert breaker.state == "open"
+
+    # 다음 reset_timeout 뒤에는 다시 시험 요청을 보낼 수 있어야 한다
+    monkeypatch.undo()
+    time.sleep(0.25)
+    assert client.post(server.url, {}).status_code == 200
+    assert breaker.state == "closed"
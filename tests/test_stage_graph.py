@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+
+import resume_pipeline
+from stage_graph import Stage, StageError, run_stage_graph
+
+
+def _sleeping(seconds, value=None):
+    def run(ctx):
+        time.sleep(seconds)
+        return value
+    return run
+
+
+def test_upload_overlaps_extraction_in_pipeline_graph():
+    # 실제 PIPELINE_STAGES의 의존 관계를 유지하고 각 단계만 지연 함수로 바꾼다
+    delays = {"blob_url": 0.4, "text": 0.3, "analysis": 0.1}
+    stages = [Stage(s.name, _sleeping(delays.get(s.name, 0.0), s.name), s.requires)
+              for s in resume_pipeline.PIPELINE_STAGES]
+
+    started = time.perf_counter()
+    resume_id = resume_pipeline.run_pipeline(1, "resume.pdf", stages=stages)
+    elapsed = time.perf_counter() - started
+
+    assert resume_id == "resume_id"
+    # 순차 실행이면 0.8초, 업로드가 추출/분석과 겹치면 약 0.4초
+    assert elapsed < 0.65
+
+
+def test_stage_receives_results_of_its_requirements():
+    seen = {}
+
+    def record(ctx):
+        seen.update(ctx)
+        return "done"
+
+    results = run_stage_graph(
+        [Stage("a", lambda ctx: 1), Stage("b", lambda ctx: ctx["a"] + 1, requires=["a"]),
+         Stage("c", record, requires=["b"])],
+        initial={"x": 0},
+    )
+    assert results == {"x": 0, "a": 1, "b": 2, "c": "done"}
+    assert seen == {"x": 0, "a": 1, "b": 2}
+
+
+def test_failure_stops_dependent_stages_and_raises_stage_error():
+    ran = threading.Event()
+
+    def fail(ctx):
+        raise ValueError("PDF를 읽을 수 없습니다")
+
+    with pytest.raises(StageError) as info:
+        run_stage_graph([Stage("text", fail), Stage("analysis", lambda ctx: ran.set(), requires=["text"])])
+    assert info.value.stage == "text"
+    assert isinstance(info.value.error, ValueError)
+    assert not ran.is_set()
+
+
+def test_run_pipeline_reraises_original_exception():
+    def fail(ctx):
+        raise FileNotFoundError("resume.pdf")
+
+    stages = [Stage(s.name, fail if s.name == "text" else _sleeping(0.0), s.requires)
+              for s in resume_pipeline.PIPELINE_STAGES]
+    with pytest.raises(FileNotFoundError):
+        resume_pipeline.run_pipeline(1, "resume.pdf", stages=stages)
+
+
+def test_cycle_is_rejected():
+    with pytest.raises(ValueError):
+        run_stage_graph([Stage("a", lambda ctx: 1, requires=["b"]), Stage("b", lambda ctx: 1, requires=["a"])])
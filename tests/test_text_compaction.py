@@ -0,0 +1,27 @@
+from text_compaction import compact_resume_text
+
+
+def test_year_lines_in_body_survive():
+    text = "홍길동\n경력\n2019\n백엔드 개발자\n2021\nPython, Django\n1"
+    compacted = compact_resume_text(text).splitlines()
+    assert "2019" in compacted
+    assert "2021" in compacted
+    assert "1" not in compacted
+
+
+def test_page_numbers_at_page_edges_are_removed():
+    pages = [
+        "홍길동 이력서\n경력 요약\n- 1 -",
+        "2\n프로젝트 경험\n2020\n추천 시스템 구축",
+        "기술 스택\nPython\nPage 3 of 3",
+    ]
+    compacted = compact_resume_text("\f".join(pages)).splitlines()
+    assert "- 1 -" not in compacted
+    assert "2" not in compacted
+    assert "Page 3 of 3" not in compacted
+    assert "2020" in compacted
+
+
+def test_bare_number_not_matching_page_is_kept_at_edge():
+    compacted = compact_resume_text("학력\n서울대학교\n2015").splitlines()
+    assert "2015" in compacted
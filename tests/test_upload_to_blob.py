@@ -0,0 +1,70 @@
+from urllib.parse import unquote
+
+import pytest
+
+import upload_to_blob
+from local_stubs import InMemoryBlobService
+
+
+@pytest.fixture
+def blob_service(monkeypatch):
+    service = InMemoryBlobService()
+    monkeypatch.setattr(upload_to_blob, "_blob_service_client", service)
+    monkeypatch.setattr(upload_to_blob, "AZURE_CONTAINER", "resumes")
+    return service
+
+
+def _write(path, data):
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_same_content_is_stored_once(tmp_path, blob_service):
+    first = _write(tmp_path / "이력서.pdf", b"%PDF-1.4 same")
+    second = _write(tmp_path / "resume_copy.pdf", b"%PDF-1.4 same")
+
+    url_a = upload_to_blob.upload_pdf_to_blob(first, user_id=1)
+    url_b = upload_to_blob.upload_pdf_to_blob(second, user_id=2)
+
+    assert url_a == url_b
+    assert len(blob_service.blobs) == 1
+    assert blob_service.uploads == 1
+    assert url_a.endswith(f"/resumes/resumes/{upload_to_blob.file_sha256(first)}.pdf")
+    # 한글 파일 이름이 URL에 들어가지 않으므로 퍼센트 인코딩되지 않는다
+    assert "%" not in url_a
+
+
+def test_different_content_gets_different_blob(tmp_path, blob_service):
+    first = _write(tmp_path / "resume.pdf", b"%PDF-1.4 v1")
+    url_a = upload_to_blob.upload_pdf_to_blob(first, user_id=1)
+    second = _write(tmp_path / "resume.pdf", b"%PDF-1.4 v2")
+    url_b = upload_to_blob.upload_pdf_to_blob(second, user_id=1)
+
+    assert url_a != url_b
+    assert blob_service.uploads == 2
+
+
+def test_original_filename_is_kept_in_metadata(tmp_path, blob_service):
+    path = _write(tmp_path / "이력서.pdf", b"%PDF-1.4")
+    upload_to_blob.upload_pdf_to_blob(path, user_id=1)
+
+    (_, metadata), = blob_service.blobs.values()
+    value = metadata[upload_to_blob.FILENAME_METADATA_KEY]
+    assert value.isascii()
+    assert unquote(value) == "이력서.pdf"
+
+
+def test_existing_blob_is_not_sent_again(tmp_path, blob_service, monkeypatch):
+    import local_stubs
+
+    calls = []
+    original = local_stubs._InMemoryBlobClient.upload_blob
+    monkeypatch.setattr(local_stubs._InMemoryBlobClient, "upload_blob",
+                        lambda self, data, **kwargs: calls.append(1) or original(self, data, **kwargs))
+    path = _write(tmp_path / "resume.pdf", b"%PDF-1.4 same")
+
+    upload_to_blob.upload_pdf_to_blob(path, user_id=1)
+    upload_to_blob.upload_pdf_to_blob(path, user_id=2)
+
+    # 두 번째 업로드는 존재 확인만 하고 본문을 보내지 않는다
+    assert len(calls) == 1
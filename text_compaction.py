@@ -0,0 +1,144 @@
+import os
+import re
+import math
+import logging
+from collections import Counter
+from dotenv import load_dotenv
+
+# 환경 변수 로드
+load_dotenv()
+
+# 이력서 본문 토큰 예산 / 토크나이저 인코딩
+# tiktoken은 처음 쓸 때 인코딩(BPE) 파일을 내려받으므로, 네트워크가 없는 서버는 TIKTOKEN_CACHE_DIR에 미리 받아 둔다
+RESUME_MAX_TOKENS = int(os.getenv("RESUME_MAX_TOKENS", 6000))
+TOKENIZER_ENCODING = os.getenv("TOKENIZER_ENCODING", "cl100k_base")
+
+# 페이지 위/아래 몇 줄까지를 머리글/바닥글 후보로 볼지
+HEADER_FOOTER_LINES = 2
+
+# "- 3 -", "3 / 10", "Page 3 of 10", "3 페이지"처럼 쪽 번호 형태가 분명한 줄
+PAGE_NUMBER_PATTERN = re.compile(
+    r"^(?:page\s*\d{1,4}(?:\s*(?:/|of)\s*\d{1,4})?"
+    r"|[-–—]\s*\d{1,4}\s*[-–—]"
+    r"|\d{1,4}\s*(?:/|of)\s*\d{1,4}"
+    r"|\d{1,4}\s*(?:쪽|페이지|page))$",
+    re.IGNORECASE
+)
+# 숫자만 있는 줄 ("2021" 같은 연도일 수도 있으므로 페이지 순서와 같을 때만 쪽 번호로 본다)
+BARE_NUMBER_PATTERN = re.compile(r"^\d{1,4}$")
+
+_encoding = None
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken  # 선택 사항: 없으면 글자 수 기반 추정치 사용
+            _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+        except Exception as e:
+            # tiktoken이 없거나 인코딩 파일을 받을 수 없는 환경이면 추정치로 대체 (토큰 예산은 근사값이 됨)
+            logging.warning(f"tiktoken 인코딩({TOKENIZER_ENCODING})을 사용할 수 없어 글자 수 기반 추정치로 토큰 수를 계산합니다: {str(e)}")
+            _encoding = False
+    return _encoding or None
+
+
+def count_tokens(text: str) -> int:
+    """텍스트 토큰 수 (tiktoken이 없으면 한글 1자≈1토큰, 그 외 4자≈1토큰으로 추정)"""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return non_ascii + (len(text) - non_ascii + 3) // 4
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    텍스트를 max_tokens 이내로 자른다 (가능하면 줄 경계에서 자름)
+    """
+    if not text or max_tokens <= 0:
+        return ""
+    encoding = _get_encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        truncated = encoding.decode(tokens[:max_tokens])
+    else:
+        total = count_tokens(text)
+        if total <= max_tokens:
+            return text
+        truncated = text[:int(len(text) * max_tokens / total)]
+        while truncated and count_tokens(truncated) > max_tokens:
+            truncated = truncated[:int(len(truncated) * 0.95)]
+
+    # 마지막 줄이 중간에서 잘렸다면 이전 줄바꿈까지 되돌린다 (너무 많이 잃지 않는 선에서)
+    cut = truncated.rfind("\n")
+    if cut > len(truncated) * 0.8:
+        truncated = truncated[:cut]
+    return truncated.rstrip()
+
+
+def _is_page_number(line: str, page_number: int) -> bool:
+    if BARE_NUMBER_PATTERN.match(line):
+        return int(line) == page_number
+    return bool(PAGE_NUMBER_PATTERN.match(line))
+
+
+def _strip_page_numbers(lines, page_number):
+    """쪽 번호는 페이지의 첫 줄/마지막 줄에 있을 때만 제거 (본문 중간의 숫자 줄은 유지)"""
+    if lines and _is_page_number(lines[-1], page_number):
+        lines = lines[:-1]
+    if lines and _is_page_number(lines[0], page_number):
+        lines = lines[1:]
+    return lines
+
+
+def compact_resume_text(text: str) -> str:
+    """
+    추출된 이력서 텍스트 정리 (페이지는 form feed로 구분됨, pdf_extractor.PAGE_SEPARATOR)
+    - 공백 정규화, 빈 줄 제거
+    - 페이지 첫 줄/마지막 줄의 쪽 번호 제거
+    - 대부분(80% 이상)의 페이지 위/아래에 반복되는 머리글/바닥글 제거
+    - 중복 줄은 처음 한 번만 유지
+    """
+    pages = []
+    for page_number, page in enumerate(text.split("\f"), start=1):
+        lines = [re.sub(r"\s+", " ", line).strip() for line in page.splitlines()]
+        pages.append(_strip_page_numbers([line for line in lines if line], page_number))
+
+    header_footer = set()
+    if len(pages) >= 2:
+        edge_counts = Counter()
+        for lines in pages:
+            edge_counts.update(set(lines[:HEADER_FOOTER_LINES] + lines[-HEADER_FOOTER_LINES:]))
+        min_pages = max(2, math.ceil(len(pages) * 0.8))
+        header_footer = {line for line, n in edge_counts.items() if n >= min_pages}
+
+    seen = set()
+    compacted = []
+    for lines in pages:
+        for line in lines:
+            if line in header_footer or line in seen:
+                continue
+            seen.add(line)
+            compacted.append(line)
+    return "\n".join(compacted)
+
+
+def prepare_resume_text(text: str, max_tokens: int = None):
+    """
+    evaluate_resume에 넣기 전 이력서 텍스트를 정리하고 토큰 예산에 맞춘다
+    반환값: (정리된 텍스트, {"original_tokens", "final_tokens", "saved_tokens"})
+    """
+    max_tokens = RESUME_MAX_TOKENS if max_tokens is None else max_tokens
+    original_tokens = count_tokens(text)
+    prepared = truncate_to_tokens(compact_resume_text(text), max_tokens)
+    final_tokens = count_tokens(prepared)
+    return prepared, {
+        "original_tokens": original_tokens,
+        "final_tokens": final_tokens,
+        "saved_tokens": original_tokens - final_tokens,
+    }
@@ -0,0 +1,201 @@
+import os
+import json
+import time
+import uuid
+import threading
+import functools
+import contextvars
+from datetime import datetime
+from dotenv import load_dotenv
+
+# 환경 변수 로드
+load_dotenv()
+
+# 계측 설정 (기본값은 꺼짐, 꺼져 있으면 span/traced는 거의 비용이 없음)
+PIPELINE_TRACE = os.getenv("PIPELINE_TRACE", "false").lower() in ("1", "true", "yes")
+PIPELINE_TRACE_FILE = os.getenv("PIPELINE_TRACE_FILE", "pipeline_trace.jsonl")
+PIPELINE_TRACE_OTEL = os.getenv("PIPELINE_TRACE_OTEL", "false").lower() in ("1", "true", "yes")
+PIPELINE_TRACE_PROMETHEUS_PORT = int(os.getenv("PIPELINE_TRACE_PROMETHEUS_PORT", 0))
+
+_enabled = False
+_current_span = contextvars.ContextVar("current_span", default=None)
+_writer = None
+_otel_tracer = None
+_prom_histogram = None
+_prom_tokens = None
+
+
+class _NoopSpan:
+    """계측이 꺼져 있을 때 사용하는 빈 span"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _JsonLinesWriter:
+    def __init__(self, path):
+        self._file = open(path, "a", encoding="utf-8", buffering=1)
+        self._lock = threading.Lock()
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class Span:
+    """
+    시간 측정 구간 (with 블록)
+    종료 시 {"trace_id", "span_id", "parent_id", "name", "start", "duration_ms", "status", ...속성}을 기록
+    """
+
+    def __init__(self, name, attributes):
+        parent = _current_span.get()
+        self.name = name
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self._token = None
+        self._otel_cm = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self._start_wall = time.time()
+        self._start = time.perf_counter()
+        self._token = _current_span.set(self)
+        if _otel_tracer is not None:
+            self._otel_cm = _otel_tracer.start_as_current_span(self.name)
+            self._otel_span = self._otel_cm.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._start
+        _current_span.reset(self._token)
+        status = "ok" if exc_type is None else "error"
+
+        record = {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": datetime.fromtimestamp(self._start_wall).isoformat(),
+            "duration_ms": round(duration * 1000, 3),
+            "status": status,
+        }
+        if exc_type is not None:
+            record["error"] = f"{exc_type.__name__}: {exc}"
+        record.update(self.attributes)
+
+        if _writer is not None:
+            _writer.write(record)
+        if _prom_histogram is not None:
+            _prom_histogram.labels(self.name, status).observe(duration)
+            for kind in ("prompt_tokens", "completion_tokens"):
+                if self.attributes.get(kind):
+                    _prom_tokens.labels(self.name, kind).inc(self.attributes[kind])
+        if self._otel_cm is not None:
+            for key, value in self.attributes.items():
+                if isinstance(value, (str, bool, int, float)):
+                    self._otel_span.set_attribute(key, value)
+            self._otel_cm.__exit__(exc_type, exc, tb)
+        return False
+
+
+def span(name, **attributes):
+    """with span("단계 이름", 속성=값): 형태로 구간 시간을 기록"""
+    if not _enabled:
+        return _NOOP_SPAN
+    return Span(name, attributes)
+
+
+def traced(name=None):
+    """함수 호출 전체를 span으로 감싸는 데코레이터"""
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with Span(span_name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def set_attributes(**attributes):
+    """현재 span에 속성 추가 (계측이 꺼져 있거나 span 밖이면 무시)"""
+    if _enabled:
+        current = _current_span.get()
+        if current is not None:
+            current.set(**attributes)
+
+
+def record_llm_usage(response):
+    """OpenAI 응답의 토큰 사용량을 현재 span에 기록"""
+    if not _enabled:
+        return
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        set_attributes(
+            prompt_tokens=getattr(usage, "prompt_tokens", None),
+            completion_tokens=getattr(usage, "completion_tokens", None),
+            total_tokens=getattr(usage, "total_tokens", None),
+        )
+
+
+def enable(path=None, otel=None, prometheus_port=None):
+    """
+    계측 활성화
+    - path: JSON Lines 출력 파일
+    - otel: True면 OpenTelemetry span도 생성 (opentelemetry-api 필요, exporter 설정은 애플리케이션 몫)
+    - prometheus_port: 지정 시 prometheus_client로 /metrics 노출
+    """
+    global _enabled, _writer, _otel_tracer, _prom_histogram, _prom_tokens
+    path = path or PIPELINE_TRACE_FILE
+    otel = PIPELINE_TRACE_OTEL if otel is None else otel
+    prometheus_port = prometheus_port or PIPELINE_TRACE_PROMETHEUS_PORT
+
+    if _writer is None and path:
+        _writer = _JsonLinesWriter(path)
+    if otel and _otel_tracer is None:
+        from opentelemetry import trace
+        _otel_tracer = trace.get_tracer("ai-mvp1.pipeline")
+    if prometheus_port and _prom_histogram is None:
+        from prometheus_client import Counter, Histogram, start_http_server
+        _prom_histogram = Histogram("pipeline_span_seconds", "파이프라인 구간별 소요 시간", ["name", "status"])
+        _prom_tokens = Counter("pipeline_llm_tokens", "LLM 토큰 사용량", ["name", "kind"])
+        start_http_server(prometheus_port)
+    _enabled = True
+
+
+def disable():
+    global _enabled, _writer
+    _enabled = False
+    if _writer is not None:
+        _writer.close()
+        _writer = None
+
+
+def is_enabled():
+    return _enabled
+
+
+if PIPELINE_TRACE:
+    enable()
@@ -1,17 +1,151 @@
 # upload_to_blob.py
 import os
-from azure.storage.blob import BlobServiceClient
+import hashlib
+import threading
+from urllib.parse import quote
 from dotenv import load_dotenv
+from tracing import traced, set_attributes
 
 load_dotenv()
 
 AZURE_CONTAINER = os.getenv("AZURE_BLOB_CONTAINER")
 BLOB_CONN_STR = os.getenv("AZURE_BLOB_CONN_STRING")
-blob_service_client = BlobServiceClient.from_connection_string(BLOB_CONN_STR)
 
-def upload_pdf_to_blob(local_path: str, user_id: int) -> str:
-    filename = f"user_{user_id}_{os.path.basename(local_path)}"
-    blob_client = blob_service_client.get_blob_client(container=AZURE_CONTAINER, blob=filename)
+# 업로드 설정: 블록 크기 / 이 크기 이하면 한 번에 업로드 / 블록 병렬 업로드 수
+BLOB_BLOCK_SIZE = int(os.getenv("BLOB_BLOCK_SIZE", 4 * 1024 * 1024))
+BLOB_MAX_SINGLE_PUT_SIZE = int(os.getenv("BLOB_MAX_SINGLE_PUT_SIZE", 8 * 1024 * 1024))
+BLOB_MAX_CONCURRENCY = int(os.getenv("BLOB_MAX_CONCURRENCY", 4))
+
+# Blob 이름은 내용 해시로 정하고, 원래 파일 이름은 메타데이터에 기록 (Blob 메타데이터 값은 ASCII만 허용되어 URL 인코딩)
+BLOB_NAME_PREFIX = os.getenv("BLOB_NAME_PREFIX", "resumes/")
+FILENAME_METADATA_KEY = "original_filename"
+
+_blob_service_client = None
+_client_lock = threading.Lock()
+
+
+def get_blob_service_client():
+    """처음 사용할 때 BlobServiceClient를 생성 (import 시점에는 연결 문자열이 필요 없음)"""
+    global _blob_service_client
+    if _blob_service_client is None:
+        with _client_lock:
+            if _blob_service_client is None:
+                from azure.storage.blob import BlobServiceClient
+                _blob_service_client = BlobServiceClient.from_connection_string(
+                    BLOB_CONN_STR,
+                    max_block_size=BLOB_BLOCK_SIZE,
+                    max_single_put_size=BLOB_MAX_SINGLE_PUT_SIZE
+                )
+    return _blob_service_client
+
+
+def file_sha256(local_path: str) -> str:
+    digest = hashlib.sha256()
     with open(local_path, "rb") as f:
-        blob_client.upload_blob(f, overwrite=True)
-    return f"https://{blob_service_client.account_name}.blob.core.windows.net/{AZURE_CONTAINER}/{filename}"
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _blob_name(digest: str) -> str:
+    # 같은 내용이면 사용자/파일 이름과 관계없이 같은 Blob을 가리킨다 (이름이 ASCII라 URL도 인코딩되지 않음)
+    return f"{BLOB_NAME_PREFIX}{digest}.pdf"
+
+
+def _metadata(local_path: str) -> dict:
+    return {FILENAME_METADATA_KEY: quote(os.path.basename(local_path))}
+
+
+def _public_url(blob_client) -> str:
+    # SAS 연결 문자열이면 URL에 토큰이 붙으므로 저장용 URL에서는 제거
+    return blob_client.url.split("?", 1)[0]
+
+
+@traced()
+def upload_pdf_to_blob(local_path: str, user_id: int, max_concurrency: int = None) -> str:
+    """
+    PDF를 내용 해시(sha256) 이름의 Blob에 업로드하고 URL 반환
+    - 같은 이름의 Blob이 이미 있으면(같은 내용) 본문을 보내지 않고 기존 URL을 반환
+    - 없으면 덮어쓰지 않는 조건부 업로드 (그 사이 다른 요청이 먼저 올렸다면 ResourceExistsError → 그대로 사용)
+    - BLOB_MAX_SINGLE_PUT_SIZE보다 큰 파일은 BLOB_BLOCK_SIZE 블록으로 나눠 병렬 업로드
+    user_id는 호출 호환을 위해 받지만 Blob 이름에는 쓰지 않는다 (사용자 연결은 Resume 테이블이 담당)
+    """
+    from azure.core.exceptions import ResourceExistsError
+    from azure.storage.blob import ContentSettings
+
+    size = os.path.getsize(local_path)
+    blob_client = get_blob_service_client().get_blob_client(container=AZURE_CONTAINER,
+                                                             blob=_blob_name(file_sha256(local_path)))
+    skipped = blob_client.exists()
+    if not skipped:
+        try:
+            with open(local_path, "rb") as f:
+                blob_client.upload_blob(
+                    f,
+                    overwrite=False,
+                    max_concurrency=max_concurrency or BLOB_MAX_CONCURRENCY,
+                    metadata=_metadata(local_path),
+                    content_settings=ContentSettings(content_type="application/pdf")
+                )
+        except ResourceExistsError:
+            skipped = True
+    set_attributes(skipped=skipped, bytes=size)
+    return _public_url(blob_client)
+
+
+_async_blob_service_client = None
+_async_client_loop = None
+
+
+def get_async_blob_service_client():
+    """
+    실행 중인 이벤트 루프에서 재사용할 aio BlobServiceClient (aiohttp 세션이 루프에 묶이므로 루프가 바뀌면 새로 생성)
+    """
+    # aio 클라이언트는 aiohttp에 의존하므로 async 업로드를 쓸 때만 로드
+    import asyncio
+    from azure.storage.blob.aio import BlobServiceClient as AsyncBlobServiceClient
+
+    global _async_blob_service_client, _async_client_loop
+    loop = asyncio.get_running_loop()
+    if _async_blob_service_client is None or _async_client_loop is not loop:
+        _async_blob_service_client = AsyncBlobServiceClient.from_connection_string(
+            BLOB_CONN_STR,
+            max_block_size=BLOB_BLOCK_SIZE,
+            max_single_put_size=BLOB_MAX_SINGLE_PUT_SIZE
+        )
+        _async_client_loop = loop
+    return _async_blob_service_client
+
+
+async def close_async_blob_service_client():
+    """이벤트 루프를 끝내기 전에 호출해 aio 클라이언트의 연결을 정리"""
+    global _async_blob_service_client, _async_client_loop
+    if _async_blob_service_client is not None:
+        await _async_blob_service_client.close()
+        _async_blob_service_client = None
+        _async_client_loop = None
+
+
+async def upload_pdf_to_blob_async(local_path: str, user_id: int, max_concurrency: int = None) -> str:
+    """
+    upload_pdf_to_blob의 asyncio 버전 (azure.storage.blob.aio 사용, aiohttp 필요)
+    """
+    import asyncio
+    from azure.core.exceptions import ResourceExistsError
+    from azure.storage.blob import ContentSettings
+
+    digest = await asyncio.to_thread(file_sha256, local_path)
+    blob_client = get_async_blob_service_client().get_blob_client(container=AZURE_CONTAINER, blob=_blob_name(digest))
+    if not await blob_client.exists():
+        try:
+            with open(local_path, "rb") as f:
+                await blob_client.upload_blob(
+                    f,
+                    overwrite=False,
+                    max_concurrency=max_concurrency or BLOB_MAX_CONCURRENCY,
+                    metadata=_metadata(local_path),
+                    content_settings=ContentSettings(content_type="application/pdf")
+                )
+        except ResourceExistsError:
+            pass
+    return _public_url(blob_client)